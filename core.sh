@@ -171,12 +171,15 @@ function show_help {
     echo "        -P <profile name>"
     echo "        -p <path_repo>"
     echo "        -r <benchmarking rounds> (default: 3)"
-    echo "        -b <benchmark regexp> include these benchmarks to run"
+    echo "        -b <benchmark regexp> include these benchmarks to run ('-' to read"
+    echo "           them from stdin, one per line, optionally followed by a tab"
+    echo "           and the number of rounds for this benchmark)"
     echo "        -B <benchmark regexp> exclude these benchamrks from running"
     echo "        -m <make and deploy command> (default: 'make -j8 install', '' to skip the compilation)"
     echo "        -N <log folder's name> (default: current date and time)"
     echo "        -T <path> source the test definitions from this folder"
     echo "        -k dry run, do not compile any version or execute any benchmark"
+    echo "        -D build the versions without deploying them, to prepare the next runs"
     echo "        -c configuration shell script to be run after user_parameters.sh"
     echo ""
     echo "    Other actions:"
@@ -189,14 +192,19 @@ function show_help {
 source "$ezBenchDir/user_parameters.sh"
 
 # First find the profile, if it is set
-optString="h?P:p:n:N:H:r:b:B:m:T:lLkc:"
+optString="h?P:p:n:N:H:r:b:B:m:T:lLkDc:"
 profile="default"
 list_built_versions=0
+coreLockFile="$ezBenchDir/lock"
 while getopts "$optString" opt; do
     case "$opt" in
     k)
         dry_run=1
         ;;
+    D)  prebuild=1
+        # Only one instance can prebuild, but alongside a normal instance
+        coreLockFile="$ezBenchDir/prebuild.lock"
+        ;;
     P)  profile=$OPTARG
         ;;
     L)  list_built_versions=1
@@ -238,6 +246,7 @@ source "$profileDir/profile"
 
 if [ "$list_built_versions" -eq 1 ]; then
     display_repo_info
+    echo "Builds folder: $PROFILE_DEPLOY_BASE_DIR"
     echo -n "Available versions: "
     profile_get_built_versions
     echo ""
@@ -291,6 +300,7 @@ unset test_exec_time
 # Start again the argument parsing, this time with every option
 unset OPTIND
 typeset -A testsList
+typeset -A testsListRounds
 typeset -A testExcludeList
 conf_scripts=""
 while getopts "$optString" opt; do
@@ -309,9 +319,10 @@ while getopts "$optString" opt; do
             idx=${#testsList[@]}
             testsList[$idx]="$OPTARG"
         else
-            while read test; do
+            while IFS=$'\t' read test test_rounds; do
                 idx=${#testsList[@]}
                 testsList[$idx]="$test"
+                testsListRounds[$idx]="$test_rounds"
             done
         fi
         ;;
@@ -329,6 +340,8 @@ while getopts "$optString" opt; do
     k)
         dry_run=1
         ;;
+    D)
+        ;;
     c)
         source "$OPTARG"
         conf_scripts="$conf_scripts $OPTARG"
@@ -348,6 +361,30 @@ echo "Configuration scripts used: $conf_scripts"
 profile_repo_check
 display_repo_info
 
+# Build the versions in the background, without deploying them, so as they
+# only need to be deployed when their benchmarks get run
+if [ -n "$prebuild" ]
+then
+    if [ -z "$makeAndDeployCmd" ] || [ -z "$prebuildCmd" ]; then
+        echo "The profile '$profile' cannot prebuild versions, exit."
+        exit 0
+    fi
+
+    # Do not interfere with the compilation of the normal instance
+    PROFILE_TMP_BUILD_DIR="$DEPLOY_BASE_DIR/$profile/tmp-prebuild"
+
+    versionList=$(profile_get_version_list $@)
+    if [ $? -ne 0 ]; then
+        echo $versionList
+        exit 50
+    fi
+
+    for version in $versionList; do
+        eval "$prebuildCmd"
+    done
+    exit 0
+fi
+
 # redirect the output to both a log file and stdout
 if [ -z "$dry_run" ]
 then
@@ -360,11 +397,44 @@ then
     abortFile="$logsFolder/requestExit"
 fi
 
+# The background build of the next versions (core.sh -D) may need to be paused
+# during the benchmark runs to avoid adding noise. The process group of the
+# build is then found in the prebuild.pgid file of the report.
+function prebuild_pause {
+    [ -f "$logsFolder/prebuild.pgid" ] || return 0
+    kill -STOP -- -$(cat "$logsFolder/prebuild.pgid") 2> /dev/null
+    return 0
+}
+
+function prebuild_resume {
+    [ -f "$logsFolder/prebuild.pgid" ] || return 0
+    kill -CONT -- -$(cat "$logsFolder/prebuild.pgid") 2> /dev/null
+    return 0
+}
+
+# Stop the background build, which releases the locks of the versions it holds
+function prebuild_kill {
+    [ -f "$logsFolder/prebuild.pgid" ] || return 0
+    local pgid=$(cat "$logsFolder/prebuild.pgid")
+    [ "$pgid" == "$$" ] && return 0
+    kill -TERM -- -$pgid 2> /dev/null
+    kill -CONT -- -$pgid 2> /dev/null
+    return 0
+}
+
 # functions to call on exit
 function __ezbench_finish__ {
     exitcode=$?
     action=$1
 
+    # Never leave the background build paused. When exiting on an error or
+    # an interruption, SmartEzbench may not start the next runs: stop it
+    if [ -z "$prebuild" ] && [ "$exitcode" != "0" -o "$action" == "reboot" ]; then
+        prebuild_kill
+    else
+        prebuild_resume
+    fi
+
     # Execute the user-defined post hook
     callIfDefined ezbench_post_hook
 
@@ -418,9 +488,11 @@ typeset -A testUnit
 typeset -A testType
 typeset -A testPrevFps
 typeset -A testMissing
+typeset -A testRounds
 total_round_time=0
 for (( t=0; t<${#testsList[@]}; t++ )); do
     test=${testsList[$t]}
+    test_rounds=${testsListRounds[$t]:-$rounds}
     basetest=$(echo "$test" | cut -d [ -f 1)
     subtests=$(echo $test | cut -s -d '[' -f 2- | rev | cut -d ']' -f 2- | rev)
 
@@ -452,8 +524,10 @@ for (( t=0; t<${#testsList[@]}; t++ )); do
             testUnit[$total_tests]="${availTestUnits[$a]}"
             testType[$total_tests]="${availTestTypes[$a]}"
             testInvert[$total_tests]="${availTestIsInvert[$a]}"
+            testRounds[$total_tests]="$test_rounds"
 
-            last_result="$logsFolder/${last_version}_result_${basetest}"
+            last_result="$logsFolder/${last_version}/${last_version}_result_${basetest}"
+            [ -e "$last_result" ] || last_result="$logsFolder/${last_version}_result_${basetest}"
             if [ -e "$last_result" ]; then
                 testPrevFps[$total_tests]=$(cat "$last_result")
             fi
@@ -464,7 +538,7 @@ for (( t=0; t<${#testsList[@]}; t++ )); do
                 availTestExecTime[$a]=$time
             fi
 
-            total_round_time=$(dc <<<"$total_round_time ${availTestExecTime[$a]} +p")
+            total_round_time=$(dc <<<"$total_round_time ${availTestExecTime[$a]} $test_rounds * +p")
         fi
     done
     if [ $found -eq 0 ]; then
@@ -474,6 +548,7 @@ for (( t=0; t<${#testsList[@]}; t++ )); do
 done
 total_round_time=$(printf '%.0f' "$total_round_time")
 unset last_version
+unset test_rounds
 
 # Check if there are any tests that were not found
 if [[ ${#testMissing[@]} > 0 ]]; then
@@ -515,7 +590,7 @@ num_versions=$(wc -w <<< $versionList)
 printf "Testing %d versions: %s\n" $num_versions "$(echo "$versionList" | tr '\n' ' ')"
 
 # Estimate the execution time
-secs=$(( ($total_round_time * $rounds) * $num_versions + $compilations_needed * $avgBuildTime))
+secs=$(( $total_round_time * $num_versions + $compilations_needed * $avgBuildTime))
 
 finishDate=$(date +"%y-%m-%d - %T" --date="$secs seconds")
 printf "Estimated finish date: $finishDate (%02dh:%02dm:%02ds)\n\n" $(($secs/3600)) $(($secs%3600/60)) $(($secs%60))
@@ -533,12 +608,48 @@ bad_color=$c_bright_red
 good_color=$c_bright_green
 meh_color=$c_bright_yellow
 
+# Results are stored in one folder per version. Move the results of reports
+# created before this layout got introduced to the version's folder to avoid
+# mixing both layouts for the same version.
+function version_logs_folder_setup {
+    # Accessible variables
+    # $version           [RO]: SHA1 id of the current version
+    # $versionLogsFolder [WO]: Folder receiving the logs of the version
+
+    versionLogsFolder="$logsFolder/$version"
+    mkdir -p "$versionLogsFolder" || exit 31
+
+    for legacy_file in "$logsFolder/${version}"_* "$logsFolder/${version}".*; do
+        [ -f "$legacy_file" ] || continue
+        mv "$legacy_file" "$versionLogsFolder/" || exit 31
+    done
+}
+
+function version_binary {
+    # Print the version whose build is used for $1. It differs from $1 when the
+    # profile re-uses the build of a version producing identical binaries.
+    callIfDefined profile_repo_binary_version "$1" || echo "$1"
+}
+
+function record_identical_build {
+    # Accessible variables
+    # $version           [RO]: SHA1 id of the current version
+
+    local binary_version=$(version_binary "$version")
+    [ "$binary_version" == "$version" ] && return 0
+
+    local identical_builds="$logsFolder/identical_builds"
+    grep -q "^$version " "$identical_builds" 2> /dev/null && return 0
+    echo "$version $binary_version" >> "$identical_builds"
+}
+
 function compile_and_deploy {
     # Accessible variables
-    # $version     [RO]: SHA1 id of the current version
-    # $versionName [RO]: Name of the version
+    # $version           [RO]: SHA1 id of the current version
+    # $versionName       [RO]: Name of the version
+    # $versionLogsFolder [RO]: Folder receiving the logs of the version
 
-    profile_repo_get_patch $version > "$logsFolder/$1.patch"
+    profile_repo_get_patch $version > "$versionLogsFolder/$1.patch"
 
     # early exit if the deployed version is the wanted version
     deployed_version=$(profile_repo_deployed_version)
@@ -550,9 +661,12 @@ function compile_and_deploy {
         echo "$human_name" >> "$versionListLog"
     fi
     echo "$human_name"
-    [ $? -eq 0 ] && [[ "$deployed_version" =~ "$version" ]] && return 0
+    if [ $? -eq 0 ] && [[ "$deployed_version" =~ "$version" || "$deployed_version" =~ "$(version_binary "$version")" ]]; then
+        record_identical_build
+        return 0
+    fi
 
-    compile_logs=$logsFolder/${version}_compile_log
+    compile_logs=$versionLogsFolder/${version}_compile_log
 
     # Compile the version and check for failure. If it failed, go to the next version.
     export REPO_COMPILE_AND_DEPLOY_VERSION=$version
@@ -587,11 +701,12 @@ function compile_and_deploy {
 
     # Check that the deployed image is the right one
     deployed_version=$(profile_repo_deployed_version)
-    if [ $? -eq 0 ] && [[ ! "$deployed_version" =~ "$version" ]]
+    if [ $? -eq 0 ] && [[ ! "$deployed_version" =~ "$version" && ! "$deployed_version" =~ "$(version_binary "$version")" ]]
     then
         printf "    ${c_bright_red}ERROR${c_reset}: The deployed version ($deployed_version) does not match the wanted one($version)\n"
         exit 73
     fi
+    record_identical_build
 }
 
 if [ $rounds -eq 0 ]
@@ -623,6 +738,7 @@ do
     [ -e "$abortFile" ] && continue
 
     # compile and deploy the version
+    version_logs_folder_setup
     compile_and_deploy $version
 
     # Iterate through the tests
@@ -633,14 +749,14 @@ do
         benchSubtests="${testSubTests[$t]}"
 
         # Generate the logs file names
-        fps_logs=$logsFolder/${version}_${testType[$t]}_${testNames[$t]}
+        fps_logs=$versionLogsFolder/${version}_${testType[$t]}_${testNames[$t]}
         error_logs=${fps_logs}.errors
 
         # Find the first run id available
         if [ -f "$fps_logs" ]; then
             # The logs file exist, look for the number of runs
             run=0
-            while [ -f "${fps_logs}#${run}" ]
+            while [ -f "${fps_logs}#${run}" ] || [ -f "${fps_logs}#${run}.gz" ] || [ -f "${fps_logs}#${run}.zst" ]
             do
                 run=$((run+1))
             done
@@ -664,7 +780,7 @@ do
         processHookFuncName=${testNames[$t]}_process
 
         # Run the benchmark
-        for (( c=$run; c<$run+$rounds; c++ ))
+        for (( c=$run; c<$run+${testRounds[$t]}; c++ ))
         do
             # Exit if asked to
             [ -e "$abortFile" ] && continue
@@ -676,7 +792,9 @@ do
             callIfDefined benchmark_run_pre_hook
 
             # This function will return multiple fps readings
+            prebuild_pause
             "$runFuncName" > "$run_log_file" 2> /dev/null
+            prebuild_resume
 
             callIfDefined benchmark_run_post_hook
             callIfDefined "$postHookFuncName"
@@ -704,7 +822,7 @@ do
             result=$(echo "$statistics" | cut -d ' ' -f 1)
             statistics=$(echo "$statistics" | cut -d ' ' -f 2-)
         }
-        echo $result > $logsFolder/${version}_result_${testNames[$t]}
+        echo $result > $versionLogsFolder/${version}_result_${testNames[$t]}
         if [ -z "${testPrevFps[$t]}" ]; then
             testPrevFps[$t]=$result
         fi
@@ -759,4 +877,4 @@ endTime=$(date +%s)
 runtime=$((endTime-startTime))
 printf "Actual run time: %02dh:%02dm:%02ds\n\n" $((runtime/3600)) $((runtime%3600/60)) $((runtime%60))
 
-) 200>"$ezBenchDir/lock"
+) 200>"$coreLockFile"
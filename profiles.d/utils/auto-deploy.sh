@@ -42,6 +42,101 @@ function repo_deploy_version() {
     return 0
 }
 
+# Print the version whose build is used by the version $1. It differs from $1
+# when re-using the build of another version (see auto_deploy_reuse_build).
+function profile_repo_binary_version() {
+    local path="$PROFILE_DEPLOY_BASE_DIR/$1"
+    if [ -L "$path" ]; then
+        local target=$(readlink "$path")
+        echo "${target##*/}"
+    else
+        echo "$1"
+    fi
+}
+
+# Lock the deployment folder of $version, to prevent building the same version
+# in the background (core.sh -D) and in the foreground at the same time.
+# Waiting for the background build resumes it first, as it may have been left
+# paused, and gives up after BUILD_LOCK_TIMEOUT seconds (1 hour by default).
+# Inputs:
+#   - $version: the version to lock
+#   - $1: extra arguments for flock
+function auto_deploy_lock_version() {
+    mkdir -p "$PROFILE_DEPLOY_BASE_DIR" 2> /dev/null
+    exec 202>"$PROFILE_DEPLOY_BASE_DIR/.$version.lock"
+    [ -n "$1" ] && { flock $1 -x 202; return $?; }
+    flock -n -x 202 && return 0
+
+    callIfDefined prebuild_resume
+    flock -w ${BUILD_LOCK_TIMEOUT:-3600} -x 202 && return 0
+    echo "ERROR: Timeout while waiting for the build of the version $version in the background"
+    exec 202>&-
+    return 1
+}
+
+function auto_deploy_unlock_version() {
+    flock -u 202
+    exec 202>&-
+}
+
+# Record the use of $version in the build cache (see utils/build_cache.py) and
+# remove the least recently used versions when the builds take more space than
+# BUILD_CACHE_QUOTA (user_parameters.sh). The deployed version is kept and the
+# versions used by the running reports get removed last.
+# Inputs:
+#   - $version: the version used
+#   - $1: hit, miss or prebuilt
+#   - $2: key of the build of $version, when it got built successfully
+function auto_deploy_build_cache_update() {
+    local build_cache="$ezBenchDir/utils/build_cache.py"
+    "$build_cache" -d "$PROFILE_DEPLOY_BASE_DIR" $1 "$version" ${2:+-K "$2"}
+
+    [ -z "$BUILD_CACHE_QUOTA" ] && return 0
+    local deployed_dir=$(readlink "$PROFILE_DEPLOY_DIR")
+    "$build_cache" -d "$PROFILE_DEPLOY_BASE_DIR" -q "$BUILD_CACHE_QUOTA" -P "$profile" \
+                   -k "$version" -k "${deployed_dir##*/}" evict
+    return 0
+}
+
+# Print the key of the build of $version: a hash of the content of the paths of
+# the repo listed in BUILD_DEDUP_PATHS, of the build function of the profile and
+# of BUILD_DEDUP_CONFIG (the configure options, for example). The versions with
+# the same key are expected to produce the same build. Nothing is printed when
+# BUILD_DEDUP_PATHS is not set.
+# Inputs:
+#   - $repoDir
+#   - $version: the version to get the key of
+function auto_deploy_build_key() {
+    [ -z "$BUILD_DEDUP_PATHS" ] && return 0
+    GIT_DIR="$repoDir/.git" git rev-parse -q --verify "$version^{commit}" > /dev/null || return 0
+
+    {
+        echo "$profile"
+        declare -f repo_compile_version
+        echo "$BUILD_DEDUP_CONFIG"
+        for path in $BUILD_DEDUP_PATHS; do
+            echo "$path $(GIT_DIR="$repoDir/.git" git rev-parse -q --verify "$version:$path")"
+        done
+    } | sha1sum | cut -d ' ' -f 1
+}
+
+# Make $version use the build of a version with the same build key, if any.
+# The results of both versions then come from identical binaries.
+# Inputs:
+#   - $version: the version to be built
+#   - $1: key of the build of $version
+function auto_deploy_reuse_build() {
+    [ -z "$1" ] && return 1
+
+    local build_cache="$ezBenchDir/utils/build_cache.py"
+    local same_build
+    same_build=$("$build_cache" -d "$PROFILE_DEPLOY_BASE_DIR" -K "$1" lookup) || return 1
+    "$build_cache" -d "$PROFILE_DEPLOY_BASE_DIR" -t "$same_build" alias "$version" || return 1
+
+    echo "$(date +"%m-%d-%Y-%T"): Version $version builds the same as version $same_build, re-use its build!"
+    return 0
+}
+
 function auto_deploy_make_and_deploy() {
     # Return error codes:
     # 71: Compilation error
@@ -53,13 +148,32 @@ function auto_deploy_make_and_deploy() {
         return 72
     fi
 
+    # Wait for the background build of this version to be over, if any
+    auto_deploy_lock_version || return 72
+    __auto_deploy_make_and_deploy__
+    local exit_code=$?
+    auto_deploy_unlock_version
+
+    return $exit_code
+}
+
+function __auto_deploy_make_and_deploy__() {
     # First, check if we already have compiled the wanted version
     repo_deploy_version
     local depl_version=$(profile_repo_deployed_version)
 
-    # If we did not get the expected version, let's compile it
-    if [[ "$depl_version" != "$version" ]]
+    # If we did not get the expected version, let's compile it, unless a
+    # version with the same build key has already been compiled
+    local build_key
+    if [[ "$depl_version" != "$version" && "$depl_version" != "$(profile_repo_binary_version "$version")" ]]
     then
+        build_key=$(auto_deploy_build_key)
+        if auto_deploy_reuse_build "$build_key"; then
+            repo_deploy_version
+            auto_deploy_build_cache_update hit
+            return 0
+        fi
+
         echo "$(date +"%m-%d-%Y-%T"): Start compiling version $version"
         local compile_start=$(date +%s)
 
@@ -89,16 +203,69 @@ function auto_deploy_make_and_deploy() {
         local avgBuildTime=$(profile_repo_compilation_time)
         local avgBuildTime=$(bc <<< "0.75*$avgBuildTime + 0.25*$build_time")
         profile_repo_set_compilation_time $avgBuildTime
+        "$ezBenchDir/timing_DB/timing.py" -n build -k "$profile" -a $build_time
 
         # Now deploy the version that we compiled
         repo_deploy_version
+        [ $compile_error -ne 0 ] && build_key=""
+        auto_deploy_build_cache_update miss "$build_key"
     else
         echo "$(date +"%m-%d-%Y-%T"): Found a cached version of the compilation, re-use it!"
+        auto_deploy_build_cache_update hit
+    fi
+
+    return $compile_error
+}
+
+# Compile $version to its deployment folder, without deploying it. Versions
+# already built or being built by the foreground instance are skipped. The
+# compile hooks are not called, as they may expect the version to be deployed.
+function auto_deploy_prebuild() {
+    # Return error codes:
+    # 71: Compilation error
+
+    [ -d "$DEPLOY_BASE_DIR" ] || return 71
+    auto_deploy_lock_version -n || return 0
+
+    local dep_version_dir=$(profile_repo_deployment_version_dir)
+    if [ -d "$dep_version_dir" ]; then
+        auto_deploy_unlock_version
+        return 0
+    fi
+
+    local build_key=$(auto_deploy_build_key)
+    if auto_deploy_reuse_build "$build_key"; then
+        auto_deploy_unlock_version
+        return 0
+    fi
+
+    echo "$(date +"%m-%d-%Y-%T"): Start prebuilding version $version"
+    local compile_start=$(date +%s)
+
+    local compile_error=71
+    profile_repo_compile_start $version && {
+        repo_compile_version
+        compile_error=$?
+        profile_repo_compile_stop
+    }
+
+    local build_time=$(($(date +%s)-$compile_start))
+    echo "$(date +"%m-%d-%Y-%T"): Done prebuilding version $version (exit code=$compile_error). Build time = $build_time."
+
+    # Do not leave half-built versions behind, the foreground instance will
+    # report the error when trying to compile it again
+    if [ $compile_error -ne 0 ]; then
+        rm -rf "$dep_version_dir"
+    else
+        "$ezBenchDir/timing_DB/timing.py" -n build -k "$profile" -a $build_time
+        auto_deploy_build_cache_update prebuilt "$build_key"
     fi
 
+    auto_deploy_unlock_version
     return $compile_error
 }
 
 # TODO: Add a function that says how long it would take to test
 
 makeAndDeployCmd="auto_deploy_make_and_deploy"
+prebuildCmd="auto_deploy_prebuild"
@@ -182,6 +182,11 @@ def reports_to_html(reports, output, output_unit = None, title = None,
 				result.average_raw = float("{0:.2f}".format(average_raw))
 				result.average = float("{0:.2f}".format(average))
 				result.margin_str = float("{0:.2f}".format(result.margin() * 100))
+				result.dropped_str = ""
+				if result.dropped is not None:
+					result.dropped_str = "<tr><td><b>Dropped</b></td><td>{} warm-up samples, {} outlier samples, {} outlier runs</td></tr>".format(
+						result.dropped["warmup_samples"], result.dropped["outlier_samples"],
+						len(result.dropped["outlier_runs"]))
 
 				# Compare to the target
 				if (not result.benchmark.full_name in db["targets"] or
@@ -412,6 +417,9 @@ def reports_to_html(reports, output, output_unit = None, title = None,
 	<tr><td><b>Author:</b></td><td>${cgi.escape(db["commits"][commit]['commit'].author)}</td></tr>\\
 	<tr><td><b>Commit date:</b></td><td>${db["commits"][commit]['commit'].commit_date}</td></tr>\\
 	<tr><td><b>Build exit code:</b></td><td bgcolor='${db["commits"][commit]['build_color']}'><center>${db["commits"][commit]['build_error']}</center></td></tr>\\
+	% if db["commits"][commit]['commit'].same_build_as is not None:
+	<tr><td><b>Identical build of:</b></td><td>${db["commits"][commit]['commit'].same_build_as}</td></tr>\\
+	% endif
 	% if len(db["commits"][commit]['commit'].bugs) > 0:
 	<tr><td><b>Referenced bugs</b></td><td><ul>\\
 	% for bug in db["commits"][commit]['commit'].bugs:
@@ -475,7 +483,7 @@ def reports_to_html(reports, output, output_unit = None, title = None,
 		result = db["commits"][commit]['reports'][report][benchmark]
 		diff_target = "{0:.2f}".format(result.diff_target)
 	%>\\
-	, ${diff_target}, "${tooltip_commit_table(commit)}<h4>Perf</h4><table><tr><td><b>Benchmark</b></td><td>${benchmark}</td></tr><tr><td><b>Target</b></td><td>${db['targets'][benchmark]} ${output_unit} (${diff_target}%)</td></tr><tr><td><b>Raw value</b></td><td>${result.average_raw} ${result.unit_str} +/- ${result.margin_str}% (n=${len(result.data)})</td></tr><tr><td><b>Converted value</b></td><td>${result.average} ${output_unit} +/- ${result.margin_str}% (n=${len(result.data)})</td></tr></table><br/>"\\
+	, ${diff_target}, "${tooltip_commit_table(commit)}<h4>Perf</h4><table><tr><td><b>Benchmark</b></td><td>${benchmark}</td></tr><tr><td><b>Target</b></td><td>${db['targets'][benchmark]} ${output_unit} (${diff_target}%)</td></tr><tr><td><b>Raw value</b></td><td>${result.average_raw} ${result.unit_str} +/- ${result.margin_str}% (n=${len(result.data)})</td></tr><tr><td><b>Converted value</b></td><td>${result.average} ${output_unit} +/- ${result.margin_str}% (n=${len(result.data)})</td></tr>${result.dropped_str}</table><br/>"\\
 								% else:
 	, null, "${benchmark}"\\
 								% endif
@@ -55,11 +55,18 @@ parser = argparse.ArgumentParser()
 parser.add_argument("--fast", help="Fast mode, do not regenerate images if they exist",
                     action="store_true")
 parser.add_argument("--title", help="Set the title for the report")
+parser.add_argument("--outliers", help="Reject the outlier samples and runs",
+                    choices=('mad', 'iqr'))
+parser.add_argument("--warmup", help="Discard the first samples of every run",
+                    type=int, default=0)
 parser.add_argument("log_folder")
 args = parser.parse_args()
 
 # Parse the report
-report = genPerformanceReport(args.log_folder)
+result_filter = None
+if args.outliers is not None or args.warmup > 0:
+    result_filter = ResultFilter(args.warmup, args.outliers)
+report = genPerformanceReport(args.log_folder, result_filter = result_filter)
 
 # Generate the labels for the commits
 commitsLabels = []
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+
+"""
+Copyright (c) 2015, Intel Corporation
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice,
+      this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of Intel Corporation nor the names of its contributors
+      may be used to endorse or promote products derived from this software
+      without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import argparse
+import fcntl
+import json
+import math
+import sys
+import os
+
+class NoiseDB:
+    # Model of the noise of the benchmarks, per machine, profile and
+    # benchmark. The noise is the standard deviation of the runs of a commit
+    # relative to their mean, pooled over the last max_results results. Every
+    # result is identified by an id (report and commit) so as updating it
+    # replaces its previous contribution.
+    #
+    # The calibrations of the benchmarks (see calibrateBenchmark() in
+    # ezbench.py) are stored along with the models.
+    max_results = 50
+    min_results = 3
+
+    def __init__(self, base_folder):
+        self.db_file_name = base_folder + '/noise.json'
+        self.db = self.__load()
+
+    def __load(self, data_file = None):
+        try:
+            if data_file is None:
+                with open(self.db_file_name) as data_file:
+                    fcntl.flock(data_file, fcntl.LOCK_EX)
+                    db = json.load(data_file)
+                    fcntl.flock(data_file, fcntl.LOCK_UN)
+            else:
+                data_file.seek(0)
+                db = json.load(data_file)
+        except:
+            db = dict()
+        if db.get("version") != 1:
+            db = dict()
+            db["version"] = 1
+            db["models"] = dict()
+        if "calibrations" not in db:
+            db["calibrations"] = dict()
+        return db
+
+    def __write(self, data_file):
+        data_file.seek(0)
+        data_file.truncate()
+        json.dump(self.db, data_file, sort_keys=False, indent=4, separators=(',', ': '))
+
+    @classmethod
+    def key(cls, machine, profile, benchmark):
+        return "{}/{}/{}".format(machine, profile, benchmark)
+
+    # Add a list of (machine, profile, benchmark, result id, samples) at once
+    def update(self, results):
+        with open(self.db_file_name, mode='a+') as data_file:
+            fcntl.flock(data_file, fcntl.LOCK_EX)
+            self.db = self.__load(data_file)
+
+            # Only the last max_results results of every benchmark are kept,
+            # adding the older ones would evict results to be added again
+            entries = dict()
+            for machine, profile, benchmark, result_id, samples in results:
+                n = len(samples)
+                mean = sum(samples) / n if n > 0 else 0
+                if n < 2 or mean == 0:
+                    continue
+                var = sum([(s - mean)**2 for s in samples]) / (n - 1)
+                key = self.key(machine, profile, benchmark)
+                entries.setdefault(key, dict()).pop(result_id, None)
+                entries[key][result_id] = [n, var / mean**2]
+
+            changed = False
+            for key, new_results in entries.items():
+                model = self.db["models"].setdefault(key, {"results": dict()})
+                old_results = list(model["results"].items())
+                for result_id, entry in list(new_results.items())[-self.max_results:]:
+                    if model["results"].get(result_id) == entry:
+                        continue
+                    model["results"].pop(result_id, None)
+                    model["results"][result_id] = entry
+                    for old_id in list(model["results"].keys())[:-self.max_results]:
+                        del model["results"][old_id]
+                changed = changed or list(model["results"].items()) != old_results
+
+            # Rewriting the file is only needed when a model changed
+            if changed:
+                self.__write(data_file)
+            fcntl.flock(data_file, fcntl.LOCK_UN)
+
+    def set_calibration(self, machine, profile, benchmark, calibration):
+        with open(self.db_file_name, mode='a+') as data_file:
+            fcntl.flock(data_file, fcntl.LOCK_EX)
+            self.db = self.__load(data_file)
+            self.db["calibrations"][self.key(machine, profile, benchmark)] = calibration
+            self.__write(data_file)
+            fcntl.flock(data_file, fcntl.LOCK_UN)
+
+    def calibration(self, machine, profile, benchmark):
+        return self.db["calibrations"].get(self.key(machine, profile, benchmark))
+
+    def model(self, key):
+        if key not in self.db["models"]:
+            return None
+        results = self.db["models"][key]["results"].values()
+        dof = sum([n - 1 for n, rel_var in results])
+        if len(results) < self.min_results or dof == 0:
+            return None
+        pooled_var = sum([(n - 1) * rel_var for n, rel_var in results]) / dof
+        return {"sigma": math.sqrt(pooled_var), "results": len(results), "samples": dof + len(results)}
+
+    # Returns the standard deviation of the benchmark relative to its mean,
+    # or None if not enough results got added yet
+    def sigma(self, machine, profile, benchmark):
+        model = self.model(self.key(machine, profile, benchmark))
+        if model is None:
+            return None
+        return model["sigma"]
+
+    def dump(self, calibrations = False):
+        if calibrations:
+            return dict(self.db["calibrations"])
+
+        models = dict()
+        for key in self.db["models"]:
+            model = self.model(key)
+            if model is not None:
+                models[key] = model
+        return models
+
+
+if __name__ == "__main__":
+    # parse the options
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-m", dest='machine', help="Only dump the models of this machine",
+                        action="store")
+    parser.add_argument("-p", dest='profile', help="Only dump the models of this profile",
+                        action="store")
+    parser.add_argument("-b", dest='benchmark', help="Only dump the models of this benchmark",
+                        action="store")
+    parser.add_argument("-c", dest='calibrations', help="Dump the calibrations instead of the models",
+                        action="store_true")
+    args = parser.parse_args()
+
+    script_dir = os.path.abspath(sys.path[0])
+    noisedb = NoiseDB(script_dir)
+
+    models = dict()
+    for key, model in noisedb.dump(args.calibrations).items():
+        machine, profile, benchmark = key.split('/', 2)
+        if ((args.machine is None or args.machine == machine) and
+            (args.profile is None or args.profile == profile) and
+            (args.benchmark is None or args.benchmark == benchmark)):
+            models[key] = model
+    print(json.dumps(models, sort_keys=True, indent=4, separators=(',', ': ')))
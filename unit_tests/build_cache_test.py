@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+"""
+Copyright (c) 2015, Intel Corporation
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice,
+      this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of Intel Corporation nor the names of its contributors
+      may be used to endorse or promote products derived from this software
+      without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import fcntl
+import time
+import sys
+import os
+
+# Import the build cache from the utils/ folder
+ezbench_dir = os.path.abspath(sys.path[0] + "/../")
+sys.path.append(ezbench_dir + '/utils/')
+from build_cache import *
+from synthetic_report import temporary_folder, check, checks_done
+
+# Check that the build cache evicts the least recently used versions first,
+# the versions used by running reports last, and never the kept or locked
+# ones.
+with temporary_folder("ezbench_build_cache_") as builds:
+	def build(version, size):
+		os.makedirs(builds + "/" + version)
+		with open("{}/{}/lib.so".format(builds, version), 'w') as f:
+			f.write("x" * size)
+
+	cache = BuildCache(builds)
+	for version in ["v1", "v2", "v3", "v4", "v5"]:
+		build(version, 100)
+		cache.miss(version)
+		time.sleep(0.01)
+	cache.hit("v1")
+	check("stats", cache.stats(), {"hits": 1, "misses": 5, "prebuilds": 0, "evictions": 0,
+	                               "identical_builds": 0, "hit_rate": 1 / 6, "versions": 5,
+	                               "identical_versions": 0, "size": 500})
+
+	# The cache re-reads its database before modifying it
+	cache = BuildCache(builds)
+	check("evict nothing", cache.evict(500), [])
+	check("evict LRU", cache.evict(400), ["v2"])
+	check("evict kept", cache.evict(300, keep = ["v3xxx"]), ["v4"])
+	check("evict referenced last", cache.evict(100, keep = ["v3"], referenced = ["v5"]), ["v1", "v5"])
+	check("versions", cache.versions(), ["v3"])
+
+	with open(builds + "/.v3.lock", 'w') as lock:
+		fcntl.flock(lock, fcntl.LOCK_EX)
+		check("evict locked", cache.evict(0), [])
+	check("evict unlocked", cache.evict(0), ["v3"])
+	check("evictions", BuildCache(builds).stats()["evictions"], 5)
+
+	# The versions having the same build key as a built version re-use its build
+	# and get removed along with it
+	build("v6", 100)
+	cache.prebuilt("v6", key = "k6")
+	check("lookup", cache.lookup("k6"), "v6")
+	check("lookup unknown", cache.lookup("k7"), None)
+	check("alias", cache.alias("v7", "v6"), True)
+	check("alias twice", cache.alias("v7", "v6"), False)
+	check("alias unknown", cache.alias("v9", "v10"), False)
+	check("resolve", cache.resolve("v7"), "v6")
+	check("alias content", os.path.exists(builds + "/v7/lib.so"), True)
+	check("aliases", cache.aliases(), {"v7": "v6"})
+	check("versions with aliases", cache.versions(), ["v6"])
+	check("size with aliases", cache.stats()["size"], 100)
+
+	# Keeping, referencing or locking an alias protects the version it re-uses
+	check("evict kept alias", cache.evict(0, keep = ["v7"]), [])
+	build("v8", 100)
+	cache.miss("v8")
+	check("evict referenced alias", cache.evict(100, referenced = ["v7"]), ["v8"])
+	with open(builds + "/.v7.lock", 'w') as lock:
+		fcntl.flock(lock, fcntl.LOCK_EX)
+		check("evict locked alias", cache.evict(0), [])
+	check("alias kept", os.path.exists(builds + "/v7/lib.so"), True)
+	check("evict aliases", cache.evict(0), ["v6"])
+	check("aliases evicted", os.path.lexists(builds + "/v7"), False)
+	check("lookup evicted", cache.lookup("k6"), None)
+
+	check("size K", BuildCache.parse_size("2K"), 2048)
+	check("size G", BuildCache.parse_size("1.5G"), 3 << 29)
+	check("size bytes", BuildCache.parse_size("1000"), 1000)
+
+checks_done()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+"""
+Copyright (c) 2015, Intel Corporation
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice,
+      this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of Intel Corporation nor the names of its contributors
+      may be used to endorse or promote products derived from this software
+      without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from random import Random
+import sys
+import os
+
+# Import ezbench from the utils/ folder
+ezbench_dir = os.path.abspath(sys.path[0] + "/../")
+sys.path.append(ezbench_dir + '/utils/')
+from ezbench import *
+from synthetic_report import check, error, checks_done
+
+# Check that the calibration of a benchmark finds the warm-up runs and
+# samples, the noise and the rounds needed, on synthetic runs.
+rand = Random(42)
+
+def gen_runs(count, samples, sigma, warmup_runs = 0, warmup_samples = 0):
+	runs = []
+	for r in range(0, count):
+		mean = rand.gauss(100, 100 * sigma) * (0.7 if r < warmup_runs else 1)
+		runs.append([rand.gauss(mean, 0.1) * (0.5 if s < warmup_samples else 1)
+		             for s in range(0, samples)])
+	return runs
+
+c = calibrateBenchmark(gen_runs(100, 10, 0.02), wanted_margin = 0.01)
+check("steady warmup_runs", c["warmup_runs"], 0)
+check("steady warmup_samples", c["warmup_samples"], 0)
+check("steady sigma", c["sigma"], 0.02, 0.004)
+check("steady rounds", c["rounds"], 16, 4)
+
+c = calibrateBenchmark(gen_runs(100, 10, 0.02, warmup_runs = 2, warmup_samples = 3), wanted_margin = 0.01)
+check("warm-up warmup_runs", c["warmup_runs"], 2)
+check("warm-up warmup_samples", c["warmup_samples"], 3)
+check("warm-up warmup_change", c["warmup_change"], -0.3, 0.05)
+check("warm-up sigma", c["sigma"], 0.02, 0.004)
+check("warm-up rounds", c["rounds"], 18, 4)
+
+c = calibrateBenchmark(gen_runs(50, 1, 0), wanted_margin = 0.01)
+check("stable rounds", c["rounds"], 2)
+
+if calibrateBenchmark(gen_runs(3, 10, 0.02)) is not None:
+	error("Calibrated a benchmark with only 3 runs")
+
+checks_done()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+"""
+Copyright (c) 2015, Intel Corporation
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice,
+      this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of Intel Corporation nor the names of its contributors
+      may be used to endorse or promote products derived from this software
+      without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from random import Random
+import argparse
+import time
+import sys
+import os
+
+# Import ezbench from the utils/ folder
+ezbench_dir = os.path.abspath(sys.path[0] + "/../")
+sys.path.append(ezbench_dir + '/utils/')
+from ezbench import *
+
+# Compare the performance changes found by comparing every commit with the
+# previous one and by the change point detectors, on synthetic series with
+# known step changes, a slow drift and noise both on the runs and between
+# the commits. Changes found within --tolerance commits of a real one are
+# counted as true positives.
+parser = argparse.ArgumentParser()
+parser.add_argument("--commits", type=int, default=10000)
+parser.add_argument("--benchmarks", type=int, default=2)
+parser.add_argument("--runs", type=int, default=5)
+parser.add_argument("--changes", type=int, default=10)
+parser.add_argument("--tolerance", type=int, default=5)
+args = parser.parse_args()
+
+class SyntheticCommit:
+	def __init__(self, sha1, git_distance_head):
+		self.sha1 = sha1
+		self.git_distance_head = git_distance_head
+		self.results = []
+
+	def build_broken(self):
+		return False
+
+def gen_series(seed):
+	rnd = Random(seed)
+	commits = [SyntheticCommit("{:07x}".format(i), args.commits - i) for i in range(args.commits)]
+	truth = dict()
+	for b in range(args.benchmarks):
+		benchmark = Benchmark("synthetic:bench{}".format(b), "FPS")
+		changes = sorted(rnd.sample(range(100, args.commits - 2100), args.changes))
+		truth[benchmark.full_name] = changes
+		drift_start = args.commits - 2000
+		perf = 100.0
+		for i, commit in enumerate(commits):
+			if i in changes:
+				perf *= 1 + rnd.choice([-1, 1]) * rnd.uniform(0.02, 0.05)
+			if i >= drift_start:
+				perf *= 1 + 0.03 / 2000 # 3% over the last 2000 commits
+			commit_perf = perf * (1 + rnd.gauss(0, 0.003))
+			result = BenchResult(commit, benchmark, None)
+			result.test_type = "bench"
+			result.data = [commit_perf * (1 + rnd.gauss(0, 0.01)) for r in range(args.runs)]
+			commit.results.append(result)
+	return commits, truth
+
+def score(events, truth):
+	tp = fp = drift = 0
+	found = dict([(bench, set()) for bench in truth])
+	for event in events:
+		if not isinstance(event, EventPerfChange):
+			continue
+		bench = event.benchmark.full_name
+		pos = args.commits - event.commit_range.new.git_distance_head
+		near = [c for c in truth[bench] if abs(c - pos) <= args.tolerance]
+		if len(near) > 0:
+			found[bench].update(near)
+		elif pos >= args.commits - 2000:
+			drift += 1
+		else:
+			fp += 1
+	tp = sum([len(f) for f in found.values()])
+	return tp, fp, drift
+
+commits, truth = gen_series(42)
+total = sum([len(c) for c in truth.values()])
+print("{} commits, {} benchmarks, {} step changes and a 3% drift".format(args.commits, args.benchmarks, total))
+
+def neighbours(commits):
+	detector = EventDetector(True)
+	detector.prepare(commits)
+	events = []
+	for commit in commits:
+		events.extend(detector.add_commit(commit))
+	return events
+
+for name, func in [("previous commit", neighbours),
+                   ("binary segmentation", BinarySegmentationDetector().events),
+                   ("PELT", PeltDetector().events)]:
+	for commit in commits:
+		for result in commit.results:
+			result.invalidate_cache()
+	start = time.time()
+	events = func(commits)
+	elapsed = time.time() - start
+	tp, fp, drift = score(events, truth)
+	print("{:>20}: {:.2f}s, found {}/{} changes, {} false positives, {} changes in the drift".format(name, elapsed, tp, total, fp, drift))
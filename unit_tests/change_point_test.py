@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+"""
+Copyright (c) 2015, Intel Corporation
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice,
+      this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of Intel Corporation nor the names of its contributors
+      may be used to endorse or promote products derived from this software
+      without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import sys
+import os
+
+# Import ezbench from the utils/ folder
+ezbench_dir = os.path.abspath(sys.path[0] + "/../")
+sys.path.append(ezbench_dir + '/utils/')
+from ezbench import *
+from synthetic_report import check, checks_done
+
+# Check that the change points which are too small or not significant get
+# dropped, and only them, including when the performance drops to 0.
+class FixedDetector(ChangePointDetector):
+	def __init__(self, cps):
+		super().__init__()
+		self.cps = cps
+
+	def change_points(self, cumsums, beta):
+		return list(self.cps)
+
+bench = Benchmark("bench")
+class FakeCommit:
+	def __init__(self, sha1, data):
+		self.sha1 = sha1
+		result = BenchResult(self, bench, None)
+		result.test_type = "bench"
+		result.data = data
+		self.results = [result]
+
+def changes(series, cps):
+	commits = [FakeCommit("c{}".format(i), data) for i, data in enumerate(series)]
+	events = FixedDetector(cps).events(commits)
+	return [(e.commit_range.new.sha1, e.old_perf, e.new_perf) for e in events]
+
+check("real change", changes([[99, 101]] * 3 + [[149, 151]] * 3, [3]), [("c3", 100, 150)])
+check("no change", changes([[99, 101]] * 6, [3]), [])
+
+# The change after the drop to 0 is infinite but not significant
+check("drop to 0", changes([[99, 101]] * 3 + [[-1, 1]] * 6, [3, 6]), [("c3", 100, 0)])
+
+checks_done()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+"""
+Copyright (c) 2015, Intel Corporation
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice,
+      this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of Intel Corporation nor the names of its contributors
+      may be used to endorse or promote products derived from this software
+      without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from random import Random
+import argparse
+import sys
+import os
+
+# Import ezbench from the utils/ folder
+ezbench_dir = os.path.abspath(sys.path[0] + "/../")
+sys.path.append(ezbench_dir + '/utils/')
+from ezbench import *
+
+# Compare the number of rounds and the statistical power of running all the
+# rounds of every commit and of skipping the rounds added by the enhancements
+# once the result is conclusive using SequentialTest, on synthetic benchmarks
+# with various levels of noise. Every commit gets --requested rounds asked by
+# the user, then enhancements raise it to --rounds. Half of the commits get a
+# performance change of --change compared to their neighbour, which is
+# detected using the same t-test as EventDetector. Both methods get the same
+# samples, early stopping only sees the first ones. It must not use more
+# rounds or calls to core.sh, lose statistical power or report more false
+# changes.
+parser = argparse.ArgumentParser()
+parser.add_argument("--commits", type=int, default=200)
+parser.add_argument("--rounds", type=int, default=10)
+parser.add_argument("--requested", type=int, default=3)
+parser.add_argument("--change", type=float, default=0.02)
+parser.add_argument("--seed", type=int, default=42)
+args = parser.parse_args()
+
+rand = Random(args.seed)
+test = SequentialTest()
+
+def sample(mean, noise):
+	return rand.gauss(mean, mean * noise)
+
+# Returns the samples used and the number of calls to core.sh
+def run_fixed(samples, neighbour):
+	return samples, 1 if args.requested >= args.rounds else 2
+
+def run_sequential(samples, neighbour):
+	done = args.requested if args.requested > test.min_rounds else test.min_rounds
+	if done >= args.rounds:
+		return samples, 1
+	if test.is_conclusive(samples[:done], [neighbour]):
+		return samples[:done], 1
+	return samples, 2
+
+def detected(data, neighbour):
+	t, p = stats.ttest_ind(data, neighbour, equal_var=True)
+	return p < 0.05
+
+# The false positives are binomially distributed, allow for their noise
+false_pos_margin = 2 * math.sqrt(args.commits // 2 * 0.05 * 0.95)
+
+ret = 0
+total_rounds = dict()
+print("noise  method      rounds  batches  detected  false positives")
+for noise in [0.001, 0.01, 0.03]:
+	commits = []
+	for c in range(0, args.commits):
+		mean = 100 * (1 + args.change) if c % 2 == 0 else 100
+		commits.append(([sample(mean, noise) for i in range(0, args.rounds)],
+		                [sample(100, noise) for i in range(0, args.rounds)]))
+
+	for method in [run_fixed, run_sequential]:
+		rounds = 0
+		batches = 0
+		true_pos = 0
+		false_pos = 0
+		for c in range(0, args.commits):
+			samples, neighbour = commits[c]
+			change = c % 2 == 0
+			data, count = method(samples, neighbour)
+			rounds += len(data)
+			batches += count
+			if detected(data, neighbour):
+				if change:
+					true_pos += 1
+				else:
+					false_pos += 1
+		print("{:<6} {:<11} {:>6}  {:>7}  {:>4}/{:<4}  {:>4}/{:<4}".format(noise, method.__name__[4:],
+		      rounds, batches, true_pos, args.commits // 2, false_pos, args.commits // 2))
+		total_rounds[method] = total_rounds.get(method, 0) + rounds
+
+		if method == run_fixed:
+			fixed_rounds = rounds
+			fixed_batches = batches
+			fixed_true_pos = true_pos
+			fixed_false_pos = false_pos
+			continue
+
+		if rounds > fixed_rounds:
+			print("ERROR: early stopping used more rounds")
+			ret = 1
+		if batches > fixed_batches:
+			print("ERROR: early stopping called core.sh more often")
+			ret = 1
+		if true_pos < fixed_true_pos * 0.95:
+			print("ERROR: early stopping lost statistical power")
+			ret = 1
+		if false_pos > fixed_false_pos + false_pos_margin:
+			print("ERROR: early stopping reported more false changes")
+			ret = 1
+
+if total_rounds[run_sequential] >= total_rounds[run_fixed]:
+	print("ERROR: early stopping did not save any round")
+	ret = 1
+
+sys.exit(ret)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+"""
+Copyright (c) 2015, Intel Corporation
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice,
+      this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of Intel Corporation nor the names of its contributors
+      may be used to endorse or promote products derived from this software
+      without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import sys
+import os
+
+# Import ezbench from the utils/ folder
+ezbench_dir = os.path.abspath(sys.path[0] + "/../")
+sys.path.append(ezbench_dir + '/utils/')
+from ezbench import *
+from synthetic_report import check, checks_done
+
+# Check that early stopping only skips the rounds added by the enhancements,
+# and that it runs a commit in at most two calls to core.sh.
+class FakeEzbench:
+	def __init__(self, data, samples):
+		self.data = data
+		self.samples = samples
+		self.calls = []
+
+	def run_commits(self, commits, benchmarks, line_callback = None, rounds = None):
+		self.calls.append([(b[0][:-1], b[1]) for b in benchmarks])
+		for name, count in self.calls[-1]:
+			done = len(self.data.get(name, []))
+			self.data[name] = self.samples[name][:done + count]
+		return EzbenchRun(commits, benchmarks, [], 0, None, None, None, None, 0)
+
+def smart_ezbench(data):
+	sbench = SmartEzbench.__new__(SmartEzbench)
+	sbench.readonly = True
+	sbench.state = {'commits': dict()}
+	sbench._task_lock = threading.Lock()
+	sbench._task_current = None
+	sbench._task_list = []
+	sbench.running_mode = lambda: RunningMode.RUNNING
+	sbench._SmartEzbench__read_bench_data = lambda commit, benchmark: data.get(benchmark)
+	return sbench
+
+# Only the rounds added by the enhancements are recorded as skippable
+data = dict()
+sbench = smart_ezbench(data)
+sbench.__add_benchmark_unlocked__("c1", "bench", 3)
+sbench.__force_benchmark_rounds_unlocked__("c1", "bench", 10, enhancement = True)
+bench = sbench.state['commits']["c1"]['benchmarks']["bench"]
+check("enhancement rounds", bench.get('enhancement_rounds'), 7)
+check("skippable rounds", SmartEzbench._SmartEzbench__skippable_rounds(bench), 7)
+sbench.__force_benchmark_rounds_unlocked__("c1", "bench", 12)
+check("explicit rounds are not skippable", SmartEzbench._SmartEzbench__skippable_rounds(bench), 0)
+sbench.__force_benchmark_rounds_unlocked__("c1", "bench", 15, enhancement = True)
+sbench.__add_benchmark_unlocked__("c1", "bench", 2)
+check("added rounds are not skippable", SmartEzbench._SmartEzbench__skippable_rounds(bench), 0)
+
+# A stable benchmark stops after the requested rounds, a noisy one and the
+# one without requested rounds get all their rounds in a second call
+samples = {
+	"stable": [100.0, 100.01, 99.99, 100.0, 100.01, 99.99, 100.0, 100.01, 99.99, 100.0],
+	"noisy": [100.0, 80.0, 120.0, 90.0, 110.0, 100.0, 85.0, 115.0, 95.0, 105.0],
+	"enhanced": [100.0, 100.01, 99.99, 100.0, 100.01, 99.99, 100.0, 100.01, 99.99, 100.0],
+}
+neighbour = [100.0, 100.01, 99.99, 100.0, 100.01, 99.99]
+data = dict()
+sbench = smart_ezbench(data)
+ezbench = FakeEzbench(data, samples)
+tasks = [TaskEntry("c1", "stable", 10, 7), TaskEntry("c1", "noisy", 10, 7),
+         TaskEntry("c1", "enhanced", 10, 10)]
+sbench._task_current = tasks[0]
+run_info = sbench._SmartEzbench__run_tasks_sequentially(ezbench, tasks, SequentialTest(),
+                                                         [[neighbour]] * len(tasks))
+check("success", run_info.success(), True)
+check("calls", ezbench.calls, [[("stable", 3), ("noisy", 3), ("enhanced", 3)], [("noisy", 7)]])
+check("stable rounds", len(data["stable"]), 3)
+check("noisy rounds", len(data["noisy"]), 10)
+check("enhanced rounds", len(data["enhanced"]), 3)
+
+# The requested rounds are never skipped, even when conclusive
+data = {"stable": samples["stable"][:3]}
+sbench = smart_ezbench(data)
+ezbench = FakeEzbench(data, samples)
+tasks = [TaskEntry("c1", "stable", 5, 2)]
+sbench._SmartEzbench__run_tasks_sequentially(ezbench, tasks, SequentialTest(), [[neighbour]])
+check("requested calls", ezbench.calls, [[("stable", 3)]])
+
+checks_done()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+"""
+Copyright (c) 2015, Intel Corporation
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice,
+      this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of Intel Corporation nor the names of its contributors
+      may be used to endorse or promote products derived from this software
+      without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import threading
+import sqlite3
+import sys
+import os
+
+# Import ezbench from the utils/ folder
+ezbench_dir = os.path.abspath(sys.path[0] + "/../")
+sys.path.append(ezbench_dir + '/utils/')
+from ezbench import *
+from synthetic_report import temporary_report, check, checks_done
+
+# Check that the runs of the results are loaded on demand using the index of
+# the report, from any thread and without re-connecting to it, and that the
+# missing run files are skipped.
+
+# Count the connections to the index
+connections = 0
+sqlite3_connect = sqlite3.connect
+def counting_connect(*args, **kwargs):
+	global connections
+	connections += 1
+	return sqlite3_connect(*args, **kwargs)
+sqlite3.connect = counting_connect
+
+with temporary_report("ezbench_lazy_loading_", commits = 4, benchmarks = 3, runs = 3) as (log_folder, sha1s):
+	expected = dict()
+	for commit in genPerformanceReport(log_folder, True).commits:
+		for result in commit.results:
+			expected[(commit.sha1, result.benchmark.full_name)] = ([list(run) for run in result.runs],
+			                                                      result.env_files)
+
+	# Load the runs from other threads, using the same connection
+	connections = 0
+	report = genPerformanceReport(log_folder, True)
+	check("connections to the index", connections, 1)
+	loaded = dict()
+	def load_runs(commit):
+		for result in commit.results:
+			loaded[(commit.sha1, result.benchmark.full_name)] = ([list(run) for run in result.runs],
+			                                                    result.env_files)
+	threads = [threading.Thread(target=load_runs, args=(commit,)) for commit in report.commits]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+	check("runs loaded from other threads", loaded, expected)
+	check("re-connections to the index", connections, 1)
+	index = report.commits[0].results[0]._index
+	check("index still enabled", index.persistent and index.db is not None, True)
+	check("index hits", index.hits > 0, True)
+
+	# Re-opening a closed index keeps it open for the next accesses
+	index.close()
+	for result in report.commits[0].results:
+		result.invalidate_cache()
+		result.runs
+	check("re-opened index", connections, 2)
+
+	# Missing runs and env files are skipped
+	commit = report.commits[1]
+	result = commit.results[0]
+	run_file = "{}/{}/{}#1".format(log_folder, commit.sha1, os.path.basename(result.data_raw_file))
+	os.remove(run_file)
+	os.remove(run_file + ".env_dump")
+	result.invalidate_cache()
+	runs, env_files = expected[(commit.sha1, result.benchmark.full_name)]
+	check("runs without the missing file", [list(run) for run in result.runs], runs[:1] + runs[2:])
+	check("env files without the missing file", len(result.env_files), 2)
+
+	# The report does not know about the missing run anymore once re-loaded
+	report = genPerformanceReport(log_folder, True)
+	result = [r for r in report.commits[1].results if r.benchmark.full_name == result.benchmark.full_name][0]
+	check("runs of the re-loaded report", [list(run) for run in result.runs], runs[:1] + runs[2:])
+
+checks_done()
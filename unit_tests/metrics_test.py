@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+"""
+Copyright (c) 2015, Intel Corporation
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice,
+      this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of Intel Corporation nor the names of its contributors
+      may be used to endorse or promote products derived from this software
+      without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import time
+import sys
+import os
+
+# Import ezbench from the utils/ folder
+ezbench_dir = os.path.abspath(sys.path[0] + "/../")
+sys.path.append(ezbench_dir + '/utils/')
+from ezbench import *
+from synthetic_report import temporary_folder, check, checks_done
+
+# Check the loading of the metric files and the metrics derived from them:
+# truncated files, unevenly-spaced samples and big files.
+with temporary_folder("ezbench_metrics_") as folder:
+	# The power is 10W for 1s then 20W for 1s, sampled unevenly. The last
+	# line got truncated and should be ignored.
+	path = folder + "/bench#0.metrics_pwr"
+	with open(path, "w") as f:
+		f.write("time (ms),pkg (W)\n0,10\n100,10\n1000,10\n1000,20\n1500,20\n2000,20\n2500,")
+	values = readMetricsCsv(path)
+	check("samples", len(values["pkg (W)"]), 6)
+
+	result = BenchResult(None, Benchmark("bench"), None)
+	result.data = [60, 60]
+	result.unit_str = "FPS"
+	result.add_metrics(path, values)
+	check("exec time", result.metrics["pkg"][0].exec_time(), 2, 1e-9)
+	check("energy", result.metrics["pkg:energy"][0].average(), 30, 1e-9)
+	check("efficiency", result.metrics["pkg:efficiency"][0].average(), 60 / 15, 1e-9)
+
+	# Files bigger than 1MB used to be ignored
+	samples = 500000
+	path = folder + "/bench#1.metrics_pwr"
+	with open(path, "w") as f:
+		f.write("time (us),pkg (W),gpu (W)\n")
+		f.write("".join(["{},{},{}\n".format(i * 100, 10 + i % 2, 5) for i in range(samples)]))
+	start = time.time()
+	values = readMetricsCsv(path)
+	print("Loaded {:.1f} MB of metrics in {:.2f}s".format(os.path.getsize(path) / 1e6, time.time() - start))
+	check("big file samples", len(values["gpu (W)"]), samples)
+
+	result.add_metrics(path, values)
+	check("big file energy", result.metrics["gpu:energy"][0].average(), 5 * (samples - 1) * 1e-4, 1e-6)
+	check("big file average", result.metrics["pkg"][1].average(), 10.5, 1e-9)
+
+checks_done()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+"""
+Copyright (c) 2015, Intel Corporation
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice,
+      this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of Intel Corporation nor the names of its contributors
+      may be used to endorse or promote products derived from this software
+      without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from random import Random
+import sys
+import os
+
+# Import ezbench from the utils/ folder
+ezbench_dir = os.path.abspath(sys.path[0] + "/../")
+sys.path.append(ezbench_dir + '/utils/')
+from ezbench import *
+from synthetic_report import temporary_folder, check, error, checks_done
+
+# Check that the noise model learns the relative standard deviation of a
+# benchmark, only keeps the last contribution of every result and makes the
+# number of runs wanted for a result stable.
+rand = Random(42)
+sigma = 0.02
+
+def samples(n):
+	mean = rand.uniform(50, 150)
+	return [rand.gauss(mean, mean * sigma) for i in range(0, n)]
+
+def wanted_n(data, noise_sigma):
+	result = BenchResult(None, None, None)
+	result.data = data
+	result.noise_sigma = noise_sigma
+	return result.confidence_margin(0.01)[1]
+
+with temporary_folder("ezbench_noise_model_") as folder:
+	db = NoiseDB(folder)
+	if db.sigma("machine", "profile", "bench") is not None:
+		error("The empty model has a sigma")
+
+	# Update the same results many times, they should be counted only once
+	for i in range(0, 5):
+		db.update([("machine", "profile", "bench", "report/commit{}".format(c), samples(5))
+		           for c in range(0, 40)])
+	model = NoiseDB(folder).dump()["machine/profile/bench"]
+	if model["results"] != 40 or model["samples"] != 200:
+		error("Got the wrong count of results and samples: {}".format(model))
+	if abs(model["sigma"] - sigma) > sigma * 0.15:
+		error("Got sigma = {}, expected {}".format(model["sigma"], sigma))
+
+	# Only the last results are kept
+	db.update([("machine", "profile", "bench", "report2/commit{}".format(c), samples(3))
+	           for c in range(0, NoiseDB.max_results)])
+	model = NoiseDB(folder).dump()["machine/profile/bench"]
+	if model["results"] != NoiseDB.max_results or model["samples"] != NoiseDB.max_results * 3:
+		error("Older results did not get evicted: {}".format(model))
+
+	# Updating the model with the same results, even more than it keeps,
+	# does not rewrite it
+	report = [("machine", "profile", "bench", "report3/commit{}".format(c), samples(3))
+	          for c in range(0, NoiseDB.max_results + 10)]
+	db.update(report)
+	writes = []
+	write = NoiseDB._NoiseDB__write
+	NoiseDB._NoiseDB__write = lambda self, data_file: writes.append(data_file)
+	try:
+		db.update(report)
+	finally:
+		NoiseDB._NoiseDB__write = write
+	check("rewrites of an unchanged model", len(writes), 0)
+	check("results of the last report", sorted(NoiseDB(folder).db["models"]["machine/profile/bench"]["results"]),
+	      sorted([r[3] for r in report[10:]]))
+
+	# The model should make the wanted number of runs more stable than
+	# estimating sigma on 3 samples
+	noise_sigma = db.sigma("machine", "profile", "bench")
+	without = [wanted_n(samples(3), None) for i in range(0, 100)]
+	with_model = [wanted_n(samples(3), noise_sigma) for i in range(0, 100)]
+	print("Wanted runs without the model: {:.1f} ± {:.1f}".format(mean(without), std(without)))
+	print("Wanted runs with the model:    {:.1f} ± {:.1f}".format(mean(with_model), std(with_model)))
+	if std(with_model) >= std(without):
+		error("The noise model did not stabilise the wanted number of runs")
+
+checks_done()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+"""
+Copyright (c) 2015, Intel Corporation
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice,
+      this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of Intel Corporation nor the names of its contributors
+      may be used to endorse or promote products derived from this software
+      without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import glob
+import sys
+import os
+
+# Import ezbench from the utils/ folder
+ezbench_dir = os.path.abspath(sys.path[0] + "/../")
+sys.path.append(ezbench_dir + '/utils/')
+from ezbench import *
+from synthetic_report import temporary_report, error, checks_done
+
+# Check that compacting a report does not change its content and keeps its
+# index valid.
+def report_content(log_folder):
+	report = genPerformanceReport(log_folder, True)
+	content = []
+	for commit in report.commits:
+		content.append((commit.sha1, commit.title, commit.author, commit.compil_exit_code))
+		for result in commit.results:
+			content.append((result.benchmark.full_name, list(result.data), str(result.runs),
+			                sorted(result.metrics.keys()), result.env_files))
+			for env_file in [e for e in result.env_files if e is not None]:
+				env = EnvDumpReport(os.path.join(log_folder, env_file))
+				content.append(sorted(env.to_set()))
+	return content
+
+for per_commit_folder in [True, False]:
+	with temporary_report("ezbench_report_compaction_", commits = 6, benchmarks = 3, runs = 3,
+	                      per_commit_folder = per_commit_folder, unit_tests = 20,
+	                      metrics_samples = 5) as (log_folder, sha1s):
+		before = report_content(log_folder)
+
+		count = compactReport(log_folder, silentMode = True)
+		left = [f for f in glob.glob(log_folder + "/**/*#*", recursive=True)
+		        if uncompressedReportFileName(f) == f]
+		if count == 0 or len(left) > 0:
+			error("{} files compressed, {} left uncompressed".format(count, len(left)))
+
+		index = ReportIndex(log_folder)
+		for path, size, mtime in index.db.execute("SELECT path, size, mtime FROM files"):
+			st = statReportFile(os.path.join(log_folder, path))
+			if st.st_size != size or st.st_mtime_ns != mtime:
+				error("The index entry of '{}' got invalidated".format(path))
+		index.close()
+
+		if report_content(log_folder) != before:
+			error("The content of the report changed after compaction")
+
+checks_done()
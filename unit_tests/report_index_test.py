@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+"""
+Copyright (c) 2015, Intel Corporation
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice,
+      this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of Intel Corporation nor the names of its contributors
+      may be used to endorse or promote products derived from this software
+      without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import concurrent.futures
+import multiprocessing
+import sqlite3
+import sys
+import os
+
+# Import ezbench from the utils/ folder
+ezbench_dir = os.path.abspath(sys.path[0] + "/../")
+sys.path.append(ezbench_dir + '/utils/')
+from ezbench import *
+from synthetic_report import temporary_report, check, checks_done
+
+# Check that the index of a report survives corruption, files going missing
+# and multiple processes loading the report at the same time.
+def summarize(report):
+	summary = []
+	for commit in report.commits:
+		summary.append((commit.sha1, commit.title, str(commit.compil_exit_code)))
+		for result in sorted(commit.results, key=lambda r: r.benchmark.full_name):
+			summary.append((result.benchmark.full_name, list(result.data),
+			                [list(run) for run in result.runs]))
+	return summary
+
+def load(log_folder):
+	report = genPerformanceReport(log_folder, True, workers = 1)
+	index = report.commits[0].results[0]._index
+	return summarize(report), index.persistent, index.hits
+
+def indexed_files(log_folder):
+	db = sqlite3.connect(log_folder + "/" + ReportIndex.db_name)
+	try:
+		return set([r[0] for r in db.execute("SELECT path FROM files")])
+	finally:
+		db.close()
+
+# Write the new entries of the index often, to interleave the writers
+ReportIndex.flush_entries = 20
+
+with temporary_report("ezbench_report_index_", commits = 10, benchmarks = 5, runs = 3) as (log_folder, sha1s):
+	expected = summarize(genPerformanceReport(log_folder, True, use_index = False))
+	index_path = log_folder + "/" + ReportIndex.db_name
+
+	# Concurrent writers to a cold index
+	with concurrent.futures.ProcessPoolExecutor(max_workers = 4,
+	                                            mp_context = multiprocessing.get_context("fork")) as executor:
+		loads = list(executor.map(load, [log_folder] * 8))
+	check("reports loaded concurrently", [l[0] == expected for l in loads], [True] * 8)
+	check("index enabled in every process", [l[1] for l in loads], [True] * 8)
+	summary, persistent, hits = load(log_folder)
+	check("report loaded from the index", summary, expected)
+	check("index fully populated", hits, len(indexed_files(log_folder)) + len(sha1s))
+
+	# Corrupted index
+	with open(index_path, "wb") as f:
+		f.write(b"this is not a database" * 100)
+	summary, persistent, hits = load(log_folder)
+	check("report loaded with a corrupted index", summary, expected)
+	check("corrupted index re-created", persistent, True)
+	summary, persistent, hits = load(log_folder)
+	check("re-created index used", hits > 0, True)
+
+	# Missing files get dropped from the index
+	commit = genPerformanceReport(log_folder, True).commits[0]
+	result_file = os.path.basename(commit.results[0].data_raw_file)
+	for run in range(3):
+		os.remove("{}/{}/{}#{}".format(log_folder, commit.sha1, result_file, run))
+	os.remove("{}/{}/{}".format(log_folder, commit.sha1, result_file))
+	summary, persistent, hits = load(log_folder)
+	check("report loaded with missing files", summary,
+	      summarize(genPerformanceReport(log_folder, True, use_index = False)))
+	check("result of the missing files gone", len(summary), len(expected) - 1)
+	missing = [f for f in indexed_files(log_folder) if f.startswith("{}/{}".format(commit.sha1, result_file))]
+	check("missing files dropped from the index", missing, [])
+
+checks_done()
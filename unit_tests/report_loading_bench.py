@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+"""
+Copyright (c) 2015, Intel Corporation
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice,
+      this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of Intel Corporation nor the names of its contributors
+      may be used to endorse or promote products derived from this software
+      without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import argparse
+import time
+import sys
+import os
+
+# Import ezbench from the utils/ folder
+ezbench_dir = os.path.abspath(sys.path[0] + "/../")
+sys.path.append(ezbench_dir + '/utils/')
+from ezbench import *
+from synthetic_report import temporary_report
+
+# Measure how long it takes to load a synthetic report of about 10k files,
+# without the index, with a cold index, with a warm index and, optionally, from
+# the result store.
+parser = argparse.ArgumentParser()
+parser.add_argument("--commits", type=int, default=45)
+parser.add_argument("--benchmarks", type=int, default=20)
+parser.add_argument("--runs", type=int, default=5)
+parser.add_argument("--samples", type=int, default=10)
+parser.add_argument("--flat", action="store_true")
+parser.add_argument("--store", help="Also measure the loading from the result store",
+                    action="store_true")
+parser.add_argument("--repeat", type=int, default=3)
+args = parser.parse_args()
+
+with temporary_report("ezbench_report_loading_", args.commits, args.benchmarks, args.runs,
+                      samples = args.samples, per_commit_folder = not args.flat) as (log_folder, sha1s):
+	files = sum([len(f) for r, d, f in os.walk(log_folder)])
+	print("Synthetic report: {} commits, {} benchmarks, {} runs, {} files".format(args.commits,
+	      args.benchmarks, args.runs, files))
+
+	def measure(name, use_index, reset_index = False, use_store = False):
+		timings = []
+		for i in range(args.repeat):
+			if reset_index and os.path.exists(log_folder + "/report_index.sqlite"):
+				os.remove(log_folder + "/report_index.sqlite")
+			start = time.time()
+			report = genPerformanceReport(log_folder, True, use_index=use_index,
+			                              use_store=use_store)
+			timings.append(time.time() - start)
+		print("{:<12}: best {:.3f}s, worst {:.3f}s".format(name, min(timings), max(timings)))
+		return report
+
+	measure("no index", False)
+	measure("cold index", True, reset_index = True)
+	report = measure("warm index", True)
+
+	if args.store:
+		start = time.time()
+		ResultStore(log_folder).import_csv()
+		print("{:<12}: {:.3f}s".format("store import", time.time() - start))
+		report = measure("store", True, use_store = True)
+
+	results = sum([len(c.results) for c in report.commits])
+	print("Loaded {} commits, {} benchmarks, {} results".format(len(report.commits),
+	      len(report.benchmarks), results))
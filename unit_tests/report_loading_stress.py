@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+"""
+Copyright (c) 2015, Intel Corporation
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice,
+      this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of Intel Corporation nor the names of its contributors
+      may be used to endorse or promote products derived from this software
+      without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import concurrent.futures
+import argparse
+import sys
+import os
+
+# Import ezbench from the utils/ folder
+ezbench_dir = os.path.abspath(sys.path[0] + "/../")
+sys.path.append(ezbench_dir + '/utils/')
+from ezbench import *
+from synthetic_report import gen_synthetic_report, temporary_folder
+
+# Load multiple reports concurrently from a thread pool and check that every
+# thread gets the same content as when loading the reports one by one.
+parser = argparse.ArgumentParser()
+parser.add_argument("--reports", type=int, default=8)
+parser.add_argument("--threads", type=int, default=8)
+parser.add_argument("--rounds", type=int, default=4)
+args = parser.parse_args()
+
+def summarize(report):
+	summary = []
+	for commit in report.commits:
+		summary.append((commit.sha1, commit.title, commit.author, str(commit.compil_exit_code)))
+		for result in sorted(commit.results, key=lambda r: r.benchmark.full_name):
+			summary.append((result.benchmark.full_name, list(result.data),
+			                [list(run) for run in result.runs], result.env_files))
+	return summary
+
+def load(log_folder):
+	return summarize(genPerformanceReport(log_folder, True))
+
+with temporary_folder("ezbench_report_stress_") as tmp_dir:
+	log_folders = []
+	for r in range(args.reports):
+		log_folder = "{}/report{}".format(tmp_dir, r)
+		gen_synthetic_report(log_folder, commits = 5 + r, benchmarks = 4, runs = 3,
+		                     per_commit_folder = (r % 2 == 0), seed = r)
+		log_folders.append(log_folder)
+
+	cwd = os.getcwd()
+	expected = dict()
+	for log_folder in log_folders:
+		expected[log_folder] = load(log_folder)
+
+	errors = 0
+	with concurrent.futures.ThreadPoolExecutor(max_workers=args.threads) as executor:
+		for r in range(args.rounds):
+			futures = dict()
+			for log_folder in log_folders * 2:
+				futures[executor.submit(load, log_folder)] = log_folder
+			for future in concurrent.futures.as_completed(futures):
+				log_folder = futures[future]
+				try:
+					if future.result() != expected[log_folder]:
+						print("Round {}: the report '{}' got loaded incorrectly".format(r, log_folder))
+						errors += 1
+				except Exception as e:
+					print("Round {}: loading the report '{}' failed: {}".format(r, log_folder, e))
+					errors += 1
+
+	if os.getcwd() != cwd:
+		print("The current working directory changed to '{}'".format(os.getcwd()))
+		errors += 1
+
+	loads = args.rounds * len(log_folders) * 2
+	print("{} concurrent loads of {} reports, {} errors".format(loads, len(log_folders), errors))
+
+sys.exit(1 if errors > 0 else 0)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+"""
+Copyright (c) 2015, Intel Corporation
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice,
+      this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of Intel Corporation nor the names of its contributors
+      may be used to endorse or promote products derived from this software
+      without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import tracemalloc
+import argparse
+import time
+import sys
+import gc
+import os
+
+# Import ezbench from the utils/ folder
+ezbench_dir = os.path.abspath(sys.path[0] + "/../")
+sys.path.append(ezbench_dir + '/utils/')
+from ezbench import *
+from synthetic_report import temporary_report
+
+# Measure the memory used by a fully-loaded report containing unit test
+# results and metrics, after its runs and metrics got read and its events got
+# generated.
+parser = argparse.ArgumentParser()
+parser.add_argument("--commits", type=int, default=20)
+parser.add_argument("--benchmarks", type=int, default=2)
+parser.add_argument("--unit-tests", type=int, default=5000)
+parser.add_argument("--metrics-samples", type=int, default=2000)
+args = parser.parse_args()
+
+with temporary_report("ezbench_report_memory_", args.commits, args.benchmarks, runs = 3,
+                      unit_tests = args.unit_tests,
+                      metrics_samples = args.metrics_samples) as (log_folder, sha1s):
+
+	# Warm the index up
+	genPerformanceReport(log_folder, True)
+
+	gc.collect()
+	tracemalloc.start()
+	start = time.time()
+	report = genPerformanceReport(log_folder, True)
+	for commit in report.commits:
+		for result in commit.results:
+			result.runs
+			result.metrics
+	report.enhance_report(list(reversed(sha1s)))
+	duration = time.time() - start
+	gc.collect()
+	current, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+
+	print("Synthetic report: {} commits, {} benchmarks, {} unit tests, {} metric samples".format(args.commits,
+	      args.benchmarks, args.unit_tests, args.metrics_samples))
+	print("Loaded in {:.2f}s, {} events".format(duration, len(report.events)))
+	print("Memory used by the report: {:.1f} MB (peak {:.1f} MB)".format(current / 1e6, peak / 1e6))
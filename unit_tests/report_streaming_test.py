@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+"""
+Copyright (c) 2015, Intel Corporation
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice,
+      this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of Intel Corporation nor the names of its contributors
+      may be used to endorse or promote products derived from this software
+      without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import tracemalloc
+import argparse
+import sys
+import os
+
+# Import ezbench from the utils/ folder
+ezbench_dir = os.path.abspath(sys.path[0] + "/../")
+sys.path.append(ezbench_dir + '/utils/')
+from ezbench import *
+from synthetic_report import temporary_report, error, checks_done
+
+# Check that streaming a report through iter_report() and EventDetector
+# generates the same events as genPerformanceReport() and enhance_report(),
+# with a peak memory usage bounded by the size of the batches of files rather
+# than by the size of the report.
+parser = argparse.ArgumentParser()
+parser.add_argument("--commits", type=int, default=60)
+parser.add_argument("--benchmarks", type=int, default=10)
+parser.add_argument("--runs", type=int, default=3)
+parser.add_argument("--batch-files", type=int, default=1000)
+args = parser.parse_args()
+
+def full_report_events(log_folder, commits_rev_order):
+	report = genPerformanceReport(log_folder, True)
+	report.enhance_report(commits_rev_order)
+	return [str(e) for e in report.events]
+
+def streamed_events(log_folder, commits_rev_order):
+	detector = EventDetector(True)
+	events = []
+	for commit in iter_report(log_folder, commits_rev_order, batch_files = args.batch_files):
+		detector.prepare([commit])
+		events.extend([str(e) for e in detector.add_commit(commit)])
+	return events
+
+def measure(func, log_folder, commits_rev_order):
+	tracemalloc.start()
+	events = func(log_folder, commits_rev_order)
+	current, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	return events, peak
+
+with temporary_report("ezbench_report_streaming_", args.commits, args.benchmarks,
+                      args.runs) as (log_folder, sha1s):
+	commits_rev_order = list(reversed(sha1s))
+
+	# Warm the index up
+	genPerformanceReport(log_folder, True)
+
+	full_events, full_peak = measure(full_report_events, log_folder, commits_rev_order)
+	stream_events, stream_peak = measure(streamed_events, log_folder, commits_rev_order)
+
+	print("Full report: {} events, peak memory {:.1f} MB".format(len(full_events), full_peak / 1e6))
+	print("Streaming:   {} events, peak memory {:.1f} MB".format(len(stream_events), stream_peak / 1e6))
+	if full_events != stream_events:
+		error("The events generated differ")
+	if stream_peak > 0.75 * full_peak:
+		error("Streaming the report does not use clearly less memory than loading it")
+
+checks_done()
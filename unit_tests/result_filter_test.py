@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+"""
+Copyright (c) 2015, Intel Corporation
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice,
+      this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of Intel Corporation nor the names of its contributors
+      may be used to endorse or promote products derived from this software
+      without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from random import Random
+import sys
+import os
+
+# Import ezbench from the utils/ folder
+ezbench_dir = os.path.abspath(sys.path[0] + "/../")
+sys.path.append(ezbench_dir + '/utils/')
+from ezbench import *
+from synthetic_report import check, checks_done
+
+# Check that ResultFilter drops the warm-up samples, the outlier samples and
+# the outlier runs, and leaves the results without any mostly untouched.
+rand = Random(42)
+
+def gen_result(name, runs):
+	result = BenchResult(None, Benchmark(name), None)
+	result.test_type = "bench"
+	result.runs = runs
+	result.data = [sum(r) / len(r) for r in runs]
+	return result
+
+def gen_runs(count, samples, warmup = 0, stutters = [], slow_runs = []):
+	runs = []
+	for r in range(0, count):
+		run = [rand.gauss(100, 1) for s in range(0, samples)]
+		for s in range(0, warmup):
+			run[s] = 20
+		if r in slow_runs:
+			run = [v / 2 for v in run]
+		for run_id, s in stutters:
+			if run_id == r:
+				run[s] = 5
+		runs.append(run)
+	return runs
+
+for method in ResultFilter.methods:
+	clean = gen_result("clean", gen_runs(5, 30))
+	warmup = gen_result("warmup", gen_runs(5, 30, warmup = 3))
+	stutter = gen_result("stutter", gen_runs(5, 30, stutters = [(1, 10), (3, 20)]))
+	slow = gen_result("slow", gen_runs(8, 30, slow_runs = [6]))
+	clean_data = list(clean.data)
+
+	ResultFilter({"warmup": 3}, method).apply([clean, warmup, stutter, slow])
+
+	# Gaussian samples may rarely be found to be outliers, but not the runs
+	check(method + " clean", [abs(a - b) < 0.5 for a, b in zip(clean.data, clean_data)], [True] * 5)
+	check(method + " clean runs", clean.dropped["outlier_runs"], [])
+	check(method + " clean samples", clean.dropped["outlier_samples"] <= 1, True)
+	check(method + " warmup samples", warmup.dropped["warmup_samples"], 15)
+	check(method + " warmup", [abs(v - 100) < 1 for v in warmup.data], [True] * 5)
+	check(method + " stutter samples", stutter.dropped["outlier_samples"], 2)
+	check(method + " stutter", [abs(v - 100) < 1 for v in stutter.data], [True] * 5)
+	check(method + " slow runs", slow.dropped["outlier_runs"], [6])
+	check(method + " slow", len(slow.data), 7)
+
+# Without outlier rejection, only the warm-up samples get dropped
+result = gen_result("bench", gen_runs(5, 30, warmup = 2, slow_runs = [1]))
+ResultFilter(2).apply([result])
+check("warmup only", result.dropped, {"warmup_samples": 10, "outlier_samples": 0, "outlier_runs": []})
+check("warmup only runs", len(result.data), 5)
+
+# The runs are not loaded when there are no samples to trim from them
+class UnreadableIndex:
+	def load_files(self, files):
+		raise IOError("The runs should not have been loaded")
+result = BenchResult(None, Benchmark("lazy"), None)
+result.test_type = "bench"
+result.data = [100, 101, 99, 100, 50]
+result.set_run_files([("run#{}".format(r), [], None) for r in range(0, 5)], UnreadableIndex())
+ResultFilter(0, "mad", frames = False).apply([result])
+check("lazy runs", result.dropped["outlier_runs"], [4])
+
+checks_done()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+"""
+Copyright (c) 2015, Intel Corporation
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice,
+      this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of Intel Corporation nor the names of its contributors
+      may be used to endorse or promote products derived from this software
+      without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import concurrent.futures
+import multiprocessing
+import glob
+import sys
+import os
+
+# Import ezbench from the utils/ folder
+ezbench_dir = os.path.abspath(sys.path[0] + "/../")
+sys.path.append(ezbench_dir + '/utils/')
+from ezbench import *
+from synthetic_report import temporary_report, check, checks_done
+
+# Check that the result store of a report falls back to the CSV files when
+# its files are corrupted or missing, and that readers never get the samples
+# of another file while the store gets rewritten.
+def summarize(report):
+	summary = []
+	for commit in report.commits:
+		for result in sorted(commit.results, key=lambda r: r.benchmark.full_name):
+			summary.append((commit.sha1, result.benchmark.full_name, list(result.data),
+			                [list(run) for run in result.runs]))
+	return summary
+
+def load(log_folder):
+	return summarize(genPerformanceReport(log_folder, True, use_index = False))
+
+def import_csv(log_folder):
+	return ResultStore(log_folder).import_csv()
+
+with temporary_report("ezbench_result_store_", commits = 5, benchmarks = 3, runs = 3) as (log_folder, sha1s):
+	expected = load(log_folder)
+	store_path = log_folder + "/" + ResultStore.folder_name
+	check("imported files", ResultStore(log_folder).import_csv(), 5 * 3 * 4)
+	check("report loaded from the store", load(log_folder), expected)
+
+	# Corrupted index and missing samples
+	index_file = glob.glob(store_path + "/*.index.npy")[0]
+	with open(index_file, "wb") as f:
+		f.write(b"not an index")
+	samples_file = glob.glob(store_path + "/*.samples.npy")[1]
+	os.remove(samples_file)
+	check("report loaded from a broken store", load(log_folder), expected)
+	check("broken store repaired", ResultStore(log_folder).import_csv() > 0, True)
+	check("samples files", len(glob.glob(store_path + "/*.samples.npy")), 3)
+	check("report loaded from the repaired store", load(log_folder), expected)
+
+	# A reader of the previous generation of the store does not get the
+	# samples of the other files once the samples got shifted
+	old_store = ResultStore(log_folder)
+	sha1 = sha1s[0]
+	test_file = "{0}/{1}/{1}_bench_synthetic:bench0".format(log_folder, sha1)
+	with open(test_file + "#0", "a") as f:
+		f.write("1000.0\n")
+	ResultStore(log_folder).import_csv()
+	for c in sha1s:
+		name = "{0}_bench_synthetic:bench0#2".format(c)
+		content = old_store.load("{}/{}".format(c, name))
+		if content is not None:
+			check("samples of {} from the old store".format(name), list(content[0]),
+			      readCsv("{}/{}/{}".format(log_folder, c, name))[0])
+	expected = load(log_folder)
+
+	# Concurrent writers and readers
+	with open(test_file + "#1", "a") as f:
+		f.write("1000.0\n")
+	with concurrent.futures.ProcessPoolExecutor(max_workers = 4,
+	                                            mp_context = multiprocessing.get_context("fork")) as executor:
+		futures = [executor.submit(import_csv, log_folder) for i in range(4)]
+		futures += [executor.submit(load, log_folder) for i in range(8)]
+		results = [f.result() for f in futures]
+	check("imported once", sorted(results[:4]), [0, 0, 0, 1])
+	expected = load(log_folder)
+	check("reports loaded during the import", [r == expected for r in results[4:]], [True] * 8)
+	check("samples files after the import", len(glob.glob(store_path + "/*.samples.npy")), 3)
+
+checks_done()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+
+"""
+Copyright (c) 2015, Intel Corporation
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice,
+      this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of Intel Corporation nor the names of its contributors
+      may be used to endorse or promote products derived from this software
+      without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import concurrent.futures
+import multiprocessing
+import hashlib
+import sqlite3
+import shutil
+import glob
+import sys
+import os
+
+# Import ezbench from the utils/ folder
+ezbench_dir = os.path.abspath(sys.path[0] + "/../")
+sys.path.append(ezbench_dir + '/utils/')
+from ezbench import *
+from synthetic_report import gen_synthetic_report, temporary_folder, check, checks_done
+
+# Check that the runs of a report get re-used by the other reports, according
+# to the policy set for the environment.
+def set_env(log_folder, nodename):
+	for env_file in glob.glob(log_folder + "/*/*.env_dump"):
+		with open(env_file, "w") as f:
+			f.write("KERNEL,Linux,{},4.4.0,#1,x86_64,(none)\n".format(nodename))
+
+def wanted(sha1s, benchmarks, rounds):
+	commits = dict()
+	for sha1 in sha1s:
+		commits[sha1] = { "benchmarks": dict() }
+		for bench in benchmarks:
+			commits[sha1]["benchmarks"][bench] = { "rounds": rounds }
+	return commits
+
+def bench_runs(log_folder, sha1, bench):
+	report = genPerformanceReport(log_folder, True, use_index = False)
+	for commit in report.commits:
+		if commit.sha1 == sha1:
+			for result in commit.results:
+				if result.benchmark.full_name == bench:
+					return len(result.data), len(result.runs)
+	return None
+
+def publish(args):
+	ezbench_dir, log_folder = args
+	shared = SharedResults(ezbench_dir)
+	try:
+		return shared.publish(log_folder, "profile")
+	finally:
+		shared.close()
+
+with temporary_folder("ezbench_shared_results_") as tmp_dir:
+	benchs = ["synthetic:bench0", "synthetic:bench1"]
+
+	# The reference report, with 3 runs of every benchmark on 3 commits
+	report_a = tmp_dir + "/logs/a"
+	sha1s = gen_synthetic_report(report_a, commits = 3, benchmarks = 2, runs = 3)
+
+	shared = SharedResults(tmp_dir)
+	check("published runs", shared.publish(report_a, "profile"), 18)
+	check("re-published runs", shared.publish(report_a, "profile"), 0)
+
+	# Only the new runs get hashed, even after compressing the report
+	compactReport(report_a, "gz", True)
+	test_file = "{0}/{1}/{1}_bench_{2}".format(report_a, sha1s[0], benchs[0])
+	for path in glob.glob(test_file + "#2*"):
+		with openReportFile(path, 'rb') as f_src:
+			with open(path.replace("#2", "#3").replace(".gz", ""), 'wb') as f_dst:
+				shutil.copyfileobj(f_src, f_dst)
+	with openReportFile(test_file, 'a') as f:
+		f.write("123.4\n")
+	hashed = []
+	real_sha1 = hashlib.sha1
+	def counting_sha1(data = b""):
+		hashed.append(data)
+		return real_sha1(data)
+	hashlib.sha1 = counting_sha1
+	try:
+		check("published new run", shared.publish(report_a, "profile"), 1)
+	finally:
+		hashlib.sha1 = real_sha1
+	check("hashed runs", len([h for h in hashed if h.startswith(sha1s[0].encode())]), 1)
+
+	# A report on the same machine with 1 run on the first 2 commits
+	report_b = tmp_dir + "/logs/b"
+	gen_synthetic_report(report_b, commits = 2, benchmarks = 2, runs = 1)
+	shared.publish(report_b, "profile")
+	check("imported runs", shared.import_runs(report_b, "profile", wanted(sha1s[:2], benchs, 3),
+	                                          SharedResultsPolicy.STRICT), 8)
+	check("runs of b", bench_runs(report_b, sha1s[1], benchs[1]), (3, 3))
+	check("re-imported runs", shared.import_runs(report_b, "profile", wanted(sha1s[:2], benchs, 3),
+	                                             SharedResultsPolicy.STRICT), 0)
+
+	# The third commit is not part of the report yet
+	check("imported new commit", shared.import_runs(report_b, "profile", wanted(sha1s, benchs[:1], 2),
+	                                                SharedResultsPolicy.STRICT), 2)
+	check("runs of the new commit", bench_runs(report_b, sha1s[2], benchs[0]), (2, 2))
+
+	# A report from a different machine
+	report_c = tmp_dir + "/logs/c"
+	gen_synthetic_report(report_c, commits = 1, benchmarks = 2, runs = 1)
+	set_env(report_c, "other")
+	shared.publish(report_c, "profile")
+	for policy in [SharedResultsPolicy.OFF, SharedResultsPolicy.STRICT, SharedResultsPolicy.MACHINE]:
+		check("imported runs ({})".format(policy.name),
+		      shared.import_runs(report_c, "profile", wanted(sha1s[:1], benchs, 2), policy), 0)
+	check("imported runs (other profile)",
+	      shared.import_runs(report_c, "other", wanted(sha1s[:1], benchs, 2), SharedResultsPolicy.ANY), 0)
+	check("imported runs (ANY)",
+	      shared.import_runs(report_c, "profile", wanted(sha1s[:1], benchs, 2), SharedResultsPolicy.ANY), 2)
+	shared.close()
+
+	# Shared runs missing some of their files do not get imported
+	report_d = tmp_dir + "/logs/d"
+	gen_synthetic_report(report_d, commits = 1, benchmarks = 1, runs = 1)
+	for env_file in glob.glob(tmp_dir + "/shared_results/profile/{}/*/run.env_dump".format(sha1s[0])):
+		os.remove(env_file)
+	check("imported incomplete runs",
+	      shared.import_runs(report_d, "profile", wanted(sha1s[:1], benchs[:1], 3), SharedResultsPolicy.ANY), 0)
+	check("runs of d", bench_runs(report_d, sha1s[0], benchs[0]), (1, 1))
+	shared.close()
+
+	# Concurrent writers publishing the same runs
+	with concurrent.futures.ProcessPoolExecutor(max_workers = 4,
+	                                            mp_context = multiprocessing.get_context("fork")) as executor:
+		reports = []
+		for r in range(4):
+			report = "{}/logs/e{}".format(tmp_dir, r)
+			gen_synthetic_report(report, commits = 4, benchmarks = 3, runs = 2, seed = 1)
+			reports.extend([("{}/concurrent".format(tmp_dir), report)] * 2)
+		published = list(executor.map(publish, reports))
+	check("runs published concurrently", sum(published), 24)
+	shared = SharedResults(tmp_dir + "/concurrent")
+	check("re-published runs", shared.publish(reports[0][1], "profile"), 0)
+	shared.close()
+
+	# A corrupted index gets reported
+	with open(tmp_dir + "/concurrent/shared_results/index.sqlite", "wb") as f:
+		f.write(b"this is not a database" * 100)
+	try:
+		SharedResults(tmp_dir + "/concurrent").publish(reports[0][1], "profile")
+		check("corrupted index reported", False, True)
+	except sqlite3.DatabaseError:
+		pass
+
+checks_done()
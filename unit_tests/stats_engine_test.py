@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+"""
+Copyright (c) 2015, Intel Corporation
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice,
+      this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of Intel Corporation nor the names of its contributors
+      may be used to endorse or promote products derived from this software
+      without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import argparse
+from random import Random
+import time
+import glob
+import sys
+import os
+
+# Import ezbench from the utils/ folder
+ezbench_dir = os.path.abspath(sys.path[0] + "/../")
+sys.path.append(ezbench_dir + '/utils/')
+from ezbench import *
+from synthetic_report import temporary_report, error, checks_done
+
+# Check that the batch statistics (BenchResult.compute_stats() and
+# EventDetector.prepare()) give exactly the same margins and events as the
+# statistics computed one result at a time, and compare their speed.
+parser = argparse.ArgumentParser()
+parser.add_argument("--commits", type=int, default=100)
+parser.add_argument("--benchmarks", type=int, default=20)
+args = parser.parse_args()
+
+def same(a, b):
+	return a == b or (a != a and b != b) # NaN != NaN
+
+def result_stats(report):
+	values = []
+	for commit in report.commits:
+		for result in commit.results:
+			values.append((result.margin(), result.confidence_margin(0.01)))
+	return values
+
+def events(report, prepare):
+	detector = EventDetector(True)
+	if prepare:
+		detector.prepare(report.commits)
+	events = []
+	for commit in report.commits:
+		events.extend([str(e) for e in detector.add_commit(commit)])
+	return events, result_stats(report)
+
+with temporary_report("ezbench_stats_engine_", args.commits, args.benchmarks,
+                      runs = 5) as (log_folder, sha1s):
+
+	# Vary the number of samples of the results, and make some of them constant
+	rnd = Random(42)
+	for result_file in glob.glob(log_folder + "/*/*_bench_*[0-9]"):
+		with open(result_file) as f:
+			lines = f.readlines()
+		count = rnd.choice([1, 2, 3, 5, 5, 5])
+		lines = lines[:count + 1]
+		if rnd.random() < 0.05:
+			lines = lines[:1] + [lines[1]] * count
+		with open(result_file, "w") as f:
+			f.write("".join(lines))
+
+	timings = []
+	results = []
+	for prepare in [False, True]:
+		report = genPerformanceReport(log_folder, True)
+		start = time.time()
+		results.append(events(report, prepare))
+		timings.append(time.time() - start)
+
+	(events_serial, stats_serial), (events_batch, stats_batch) = results
+	print("One result at a time: {} events in {:.2f}s".format(len(events_serial), timings[0]))
+	print("Batch:                {} events in {:.2f}s".format(len(events_batch), timings[1]))
+
+	if events_serial != events_batch:
+		error("The events generated differ")
+	for a, b in zip(stats_serial, stats_batch):
+		if not same(a[0], b[0]) or a[1] != b[1]:
+			error("The statistics differ: {} vs {}".format(a, b))
+			break
+
+checks_done()
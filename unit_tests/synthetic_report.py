@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+
+"""
+Copyright (c) 2015, Intel Corporation
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice,
+      this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of Intel Corporation nor the names of its contributors
+      may be used to endorse or promote products derived from this software
+      without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import contextlib
+import tempfile
+import random
+import shutil
+import sys
+import os
+
+# Generate a fake report, as written by core.sh, in the folder log_folder.
+# Every commit gets a patch, a compilation log and, for every benchmark, a
+# result file along with its runs and their environment dumps. The performance
+# of every benchmark improves by 5% every change_every commits.
+#
+# If unit_tests is set, every commit also gets the results of a unit test
+# suite made of that many tests. If metrics_samples is set, the runs of the
+# first benchmark get a power metric file with that many samples.
+def gen_synthetic_report(log_folder, commits = 45, benchmarks = 20, runs = 5,
+                         samples = 10, per_commit_folder = True, seed = 42,
+                         change_every = 25, unit_tests = 0, metrics_samples = 0):
+	rnd = random.Random(seed)
+	sha1s = ["{:07x}".format(rnd.getrandbits(28)) for i in range(commits)]
+
+	os.makedirs(log_folder, exist_ok=True)
+	with open(log_folder + "/commit_list", "w") as f:
+		for sha1 in sha1s:
+			f.write("{} synthetic commit {}\n".format(sha1, sha1))
+
+	for c, sha1 in enumerate(sha1s):
+		if per_commit_folder:
+			folder = "{}/{}".format(log_folder, sha1)
+			os.makedirs(folder, exist_ok=True)
+		else:
+			folder = log_folder
+
+		with open("{}/{}.patch".format(folder, sha1), "w") as f:
+			f.write("commit {}{}\n".format(sha1, "0" * 33))
+			f.write("Author:     Synthetic Author <author@example.com>\n")
+			f.write("AuthorDate: Mon, 1 Feb 2016 10:{:02d}:00 +0200\n".format(c % 60))
+			f.write("Commit:     Synthetic Committer <committer@example.com>\n")
+			f.write("CommitDate: Mon, 1 Feb 2016 11:{:02d}:00 +0200\n\n".format(c % 60))
+			f.write("    synthetic commit {}\n\n".format(sha1))
+			f.write("    Reviewed-by: Synthetic Reviewer <reviewer@example.com>\n\n")
+		with open("{}/{}_compile_log".format(folder, sha1), "w") as f:
+			f.write("Exiting with error code 0\n")
+
+		for b in range(benchmarks):
+			bench = "synthetic:bench{}".format(b)
+			bench_file = "{}/{}_bench_{}".format(folder, sha1, bench)
+			averages = []
+			for r in range(runs):
+				perf = (100 + b) * 1.05 ** (c // change_every)
+				values = [perf + rnd.random() for i in range(samples)]
+				averages.append(sum(values) / len(values))
+				with open("{}#{}".format(bench_file, r), "w") as f:
+					f.write("".join(["{:.3f}\n".format(v) for v in values]))
+				with open("{}#{}.env_dump".format(bench_file, r), "w") as f:
+					f.write("KERNEL,Linux,synthetic,4.4.0,#1,x86_64,(none)\n")
+				if b == 0 and metrics_samples > 0:
+					with open("{}#{}.metrics_pwr".format(bench_file, r), "w") as f:
+						f.write("time (ms),pkg (W),gpu (W)\n")
+						for i in range(metrics_samples):
+							f.write("{},{:.3f},{:.3f}\n".format(i * 100, 10 + rnd.random(),
+							                                     3 + rnd.random()))
+			with open(bench_file, "w") as f:
+				f.write("# FPS (more is better) of '{}' using version {}\n".format(bench, sha1))
+				f.write("".join(["{:.3f}\n".format(v) for v in averages]))
+
+		if unit_tests > 0:
+			unit_file = "{}/{}_unit_synthetic:piglit".format(folder, sha1)
+			passed = []
+			for r in range(2):
+				statuses = []
+				for t in range(unit_tests):
+					# A test out of 50 flips with the commits and 1 out of 500 is flaky
+					if (t % 50 == 0 and (c // change_every) % 2 == 1) or (t % 500 == 1 and r == 1):
+						statuses.append("fail")
+					else:
+						statuses.append("pass")
+				passed.append(statuses.count("pass"))
+				with open("{}#{}".format(unit_file, r), "w") as f:
+					f.write("".join(["synthetic.test{}: {}\n".format(t, statuses[t])
+					                 for t in range(unit_tests)]))
+			with open(unit_file, "w") as f:
+				f.write("# pass/total (more is better) of 'synthetic:piglit' using version {}\n".format(sha1))
+				f.write("".join(["{}\n".format(p) for p in passed]))
+
+	return sha1s
+
+# Generate a synthetic report in a temporary folder, removed on exit. Yields
+# the folder and the SHA1s of the commits of the report.
+@contextlib.contextmanager
+def temporary_report(prefix, *args, **kwargs):
+	with temporary_folder(prefix) as log_folder:
+		yield log_folder, gen_synthetic_report(log_folder, *args, **kwargs)
+
+@contextlib.contextmanager
+def temporary_folder(prefix):
+	folder = tempfile.mkdtemp(prefix=prefix)
+	try:
+		yield folder
+	finally:
+		shutil.rmtree(folder)
+
+# Checks shared by the tests: every failed check prints an error and
+# checks_done() exits with an error if any check failed
+errors = 0
+def error(message):
+	global errors
+	print("ERROR: {}".format(message))
+	errors += 1
+
+def check(name, got, expected, tolerance = None):
+	# Numbers are compared with an absolute tolerance, when set
+	if tolerance is None:
+		failed = got != expected
+	else:
+		failed = abs(got - expected) > tolerance
+	if failed:
+		error("{}: got {}, expected {}".format(name, got, expected))
+
+def checks_done():
+	if errors > 0:
+		sys.exit(1)
+	print("All the checks passed")
+
+if __name__ == "__main__":
+	import argparse
+
+	parser = argparse.ArgumentParser()
+	parser.add_argument("log_folder")
+	parser.add_argument("--commits", type=int, default=45)
+	parser.add_argument("--benchmarks", type=int, default=20)
+	parser.add_argument("--runs", type=int, default=5)
+	parser.add_argument("--unit-tests", type=int, default=0)
+	parser.add_argument("--metrics-samples", type=int, default=0)
+	parser.add_argument("--flat", action="store_true")
+	args = parser.parse_args()
+
+	gen_synthetic_report(args.log_folder, args.commits, args.benchmarks, args.runs,
+	                     per_commit_folder = not args.flat, unit_tests = args.unit_tests,
+	                     metrics_samples = args.metrics_samples)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+"""
+Copyright (c) 2015, Intel Corporation
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice,
+      this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of Intel Corporation nor the names of its contributors
+      may be used to endorse or promote products derived from this software
+      without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from random import Random
+import sys
+import os
+
+# Import ezbench from the utils/ folder
+ezbench_dir = os.path.abspath(sys.path[0] + "/../")
+sys.path.append(ezbench_dir + '/utils/')
+from ezbench import *
+from synthetic_report import check, error, checks_done
+
+# Simulate a machine running task lists and check that the planner builds
+# and deploys every version at most once and gets the results earlier than
+# the naive orderings.
+rand = Random(42)
+build_time = 300
+deploy_time = 60
+bench_times = {"bench_{}".format(b): rand.uniform(5, 60) for b in range(0, 8)}
+
+def simulate(tasks, deployed, built):
+	built = list(built)
+	now = 0
+	completions = []
+	for task in tasks:
+		if task.commit != deployed:
+			if task.commit not in built:
+				now += build_time
+				built.append(task.commit)
+			now += deploy_time
+			deployed = task.commit
+		now += bench_times[task.benchmark] * task.rounds
+		completions.append(now)
+	return now, sum(completions) / len(completions)
+
+def interleaved(tasks):
+	per_benchmark = dict()
+	for task in tasks:
+		per_benchmark.setdefault(task.benchmark, []).append(task)
+	return [t for b in sorted(per_benchmark) for t in per_benchmark[b]]
+
+planner = TaskPlanner(build_time, deploy_time, lambda b: bench_times.get(b))
+for i in range(0, 20):
+	commits = ["{:040x}".format(rand.getrandbits(160)) for c in range(0, 10)]
+	tasks = [TaskEntry(c, b, rand.randint(1, 5)) for c in commits for b in bench_times if rand.random() < 0.5]
+	rand.shuffle(tasks)
+	deployed = rand.choice(commits)
+	built = [c[0:7] for c in rand.sample(commits, 4)]
+
+	plan = planner.plan(tasks, deployed, built)
+	if sorted(map(id, plan)) != sorted(map(id, tasks)):
+		error("The planner lost or duplicated tasks")
+
+	# Every task commit different from the deployed one needs one deployment
+	# and unbuilt ones a build, and nothing more
+	used = set([t.commit for t in tasks])
+	minimal = sum([planner.switch_cost(c, deployed, built) for c in used])
+	cost = planner.switches_cost(plan, deployed, built)
+	if cost != minimal:
+		error("Plan #{}: the planner spent {}s building and deploying, the minimum is {}s".format(i, cost, minimal))
+
+	full_built = [c for c in commits if planner.is_built(c, built)]
+	total, mean = simulate(plan, deployed, full_built)
+	for name, order in [("naive", tasks), ("interleaved", interleaved(tasks))]:
+		o_total, o_mean = simulate(order, deployed, full_built)
+		if total > o_total or mean > o_mean:
+			error("Plan #{}: the planner takes {:.0f}s (mean completion {:.0f}s), the {} order {:.0f}s ({:.0f}s)".format(i, total, mean, name, o_total, o_mean))
+
+# An unknown deployed version or an empty built version matches no commit
+check("unknown deployed version", planner.switch_cost("abc", "", []), build_time + deploy_time)
+check("empty built version", planner.is_built("abc", ["", "def"]), False)
+check("empty versions", TaskPlanner.same_version("", ""), False)
+tasks = [TaskEntry(c, "bench", 1) for c in ["abc", "def"]]
+check("empty versions cost", planner.switches_cost(planner.plan(tasks, "", ["", "def"]), "", ["", "def"]),
+      build_time + 2 * deploy_time)
+check("empty versions plan", [t.commit for t in planner.plan(tasks, "", ["", "def"])], ["def", "abc"])
+
+if len(planner.plan([], None)) != 0:
+	error("Planning an empty task list did not return an empty list")
+
+checks_done()
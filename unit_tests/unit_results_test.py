@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+"""
+Copyright (c) 2015, Intel Corporation
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice,
+      this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of Intel Corporation nor the names of its contributors
+      may be used to endorse or promote products derived from this software
+      without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import sys
+import os
+
+# Import ezbench from the utils/ folder
+ezbench_dir = os.path.abspath(sys.path[0] + "/../")
+sys.path.append(ezbench_dir + '/utils/')
+from ezbench import *
+from synthetic_report import error, checks_done
+
+# Check the unstable unit tests and the status changes found by the
+# EventDetector, including subtests missing from some runs or commits.
+class FakeCommit:
+	def __init__(self, sha1, runs):
+		self.sha1 = sha1
+		self.results = []
+		self.compil_exit_code = EzbenchExitCode.NO_ERROR
+		if runs is not None:
+			result = BenchResult(self, piglit, None)
+			result.test_type = "unit"
+			result.runs = runs
+			self.results.append(result)
+
+	def build_broken(self):
+		return False
+
+piglit = Benchmark("piglit")
+commits = [
+	FakeCommit("c0", [{"a": "pass", "b": "pass", "c": "fail"}]),
+	FakeCommit("c1", [{"a": "pass", "b": "fail"}, {"b": "pass", "a": "pass", "d": "skip"}]),
+	FakeCommit("c2", None),
+	FakeCommit("c3", [{"a": "fail", "b": "pass", "c": "pass", "d": "skip"}]),
+	FakeCommit("c4", [{"d": "pass", "a": "fail"}, {"a": "fail"}, {"a": "pass", "d": "pass"}]),
+]
+
+expected = [
+	"Unstable result on commit c1 for piglit[b] (from fail to pass)",
+	"commit c3 changed the status of piglit[a] from pass to fail",
+	"commit c3 changed the status of piglit[c] from fail to pass",
+	"Unstable result on commit c4 for piglit[a] (from fail to pass)",
+	"commit c4 changed the status of piglit[d] from skip to pass",
+	"commit c4 changed the status of piglit[a] from fail to pass",
+]
+
+detector = EventDetector(True)
+events = []
+for commit in commits:
+	events.extend([str(e) for e in detector.add_commit(commit)])
+
+if events != expected:
+	error("Got the events:\n\t{}\nexpected:\n\t{}".format("\n\t".join(events), "\n\t".join(expected)))
+
+unit_results = commits[4].results[0].unit_results
+if unit_results != {"d": "pass", "a": "pass"} or list(unit_results) != ["d", "a"]:
+	error("Got the wrong unit results {}".format(unit_results))
+
+# The statuses are interned per table, many reports with their own statuses
+# can be loaded by the same process
+try:
+	for i in range(0, 300):
+		EventDetector(True).add_commit(FakeCommit("c{}".format(i), [{"a": "status{}".format(i)}]))
+except ValueError as e:
+	error("Loading many reports failed: {}".format(e))
+
+checks_done()
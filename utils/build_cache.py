@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+
+"""
+Copyright (c) 2015, Intel Corporation
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice,
+      this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of Intel Corporation nor the names of its contributors
+      may be used to endorse or promote products derived from this software
+      without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import argparse
+import fcntl
+import json
+import shutil
+import glob
+import time
+import sys
+import os
+
+class BuildCache:
+    # Bookkeeping of the versions built by a profile, stored in its builds
+    # folder ($PROFILE_DEPLOY_BASE_DIR). The folder of every version is kept
+    # along with its size and last use, to evict the least recently used
+    # versions when the total size goes over a quota. The number of times a
+    # version had to be built (miss) or was already available (hit) is also
+    # tracked.
+    #
+    # Versions producing the same build as another one, according to the key
+    # of their build (see auto_deploy_build_key in auto-deploy.sh), are only
+    # a symbolic link to the folder of the other version. They are removed
+    # along with it.
+    #
+    # The versions being deployed or built hold the lock file .<version>.lock
+    # (see auto-deploy.sh) and are never evicted.
+    stats_names = ["hits", "misses", "prebuilds", "evictions", "identical_builds"]
+
+    def __init__(self, builds_folder):
+        self.builds_folder = builds_folder
+        self.db_file_name = builds_folder + '/.build_cache.json'
+        self.db = self.__load()
+
+    def __load(self, data_file = None):
+        try:
+            if data_file is None:
+                with open(self.db_file_name) as data_file:
+                    fcntl.flock(data_file, fcntl.LOCK_EX)
+                    db = json.load(data_file)
+                    fcntl.flock(data_file, fcntl.LOCK_UN)
+            else:
+                data_file.seek(0)
+                db = json.load(data_file)
+        except:
+            db = dict()
+        if db.get("version") != 1:
+            db = dict()
+            db["version"] = 1
+            db["stats"] = dict()
+            db["entries"] = dict()
+        for stat in self.stats_names:
+            db["stats"].setdefault(stat, 0)
+        if "keys" not in db:
+            db["keys"] = dict()
+        return db
+
+    def __write(self, data_file):
+        data_file.seek(0)
+        data_file.truncate()
+        json.dump(self.db, data_file, sort_keys=True, indent=4, separators=(',', ': '))
+
+    def __update(self, callback):
+        with open(self.db_file_name, mode='a+') as data_file:
+            fcntl.flock(data_file, fcntl.LOCK_EX)
+            self.db = self.__load(data_file)
+            ret = callback()
+            self.__write(data_file)
+            fcntl.flock(data_file, fcntl.LOCK_UN)
+        return ret
+
+    @classmethod
+    def parse_size(cls, size):
+        # Sizes are in bytes, or use the suffixes K, M, G or T
+        units = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30, 'T': 1 << 40}
+        size = str(size).strip().upper().rstrip('B')
+        if len(size) > 0 and size[-1] in units:
+            return int(float(size[:-1]) * units[size[-1]])
+        return int(float(size))
+
+    @classmethod
+    def folder_size(cls, path):
+        size = 0
+        for root, dirs, files in os.walk(path):
+            for name in files:
+                try:
+                    size += os.lstat(os.path.join(root, name)).st_size
+                except OSError:
+                    pass
+        return size
+
+    def __folders(self):
+        def is_folder(path):
+            return os.path.isdir(path) or os.path.islink(path)
+        try:
+            return sorted([v for v in os.listdir(self.builds_folder)
+                           if not v.startswith('.') and is_folder(os.path.join(self.builds_folder, v))])
+        except FileNotFoundError:
+            return []
+
+    def versions(self):
+        return [v for v in self.__folders() if not os.path.islink(os.path.join(self.builds_folder, v))]
+
+    # Returns a dictionary of the versions re-using the build of another one,
+    # giving the version they re-use
+    def aliases(self):
+        aliases = dict()
+        for version in self.__folders():
+            path = os.path.join(self.builds_folder, version)
+            if os.path.islink(path):
+                aliases[version] = os.path.basename(os.readlink(path))
+        return aliases
+
+    def resolve(self, version):
+        path = os.path.join(self.builds_folder, version)
+        if os.path.islink(path):
+            return os.path.basename(os.readlink(path))
+        return version
+
+    def __entry(self, version):
+        # Versions built before the cache existed get their size and last use
+        # from their folder
+        entry = self.db["entries"].get(version)
+        if entry is None:
+            path = os.path.join(self.builds_folder, version)
+            entry = {"size": self.folder_size(path), "last_used": os.path.getmtime(path)}
+            self.db["entries"][version] = entry
+        return entry
+
+    def __record(self, version, stat, compute_size, key = None):
+        def update():
+            self.db["stats"][stat] += 1
+            built = self.resolve(version)
+            if not os.path.isdir(os.path.join(self.builds_folder, built)):
+                return
+            entry = self.__entry(built)
+            if compute_size:
+                entry["size"] = self.folder_size(os.path.join(self.builds_folder, built))
+            entry["last_used"] = time.time()
+            if key is not None:
+                self.db["keys"][key] = built
+        self.__update(update)
+
+    def hit(self, version):
+        self.__record(version, "hits", False)
+
+    def miss(self, version, key = None):
+        self.__record(version, "misses", True, key)
+
+    def prebuilt(self, version, key = None):
+        self.__record(version, "prebuilds", True, key)
+
+    # Returns the version built with this key, if it is still available
+    def lookup(self, key):
+        version = self.db["keys"].get(key)
+        if version is None or version not in self.versions():
+            return None
+        return version
+
+    # Make version use the build of the version target
+    def alias(self, version, target):
+        def update():
+            path = os.path.join(self.builds_folder, version)
+            if os.path.lexists(path) or target not in self.versions():
+                return False
+            os.symlink(target, path)
+            self.db["stats"]["identical_builds"] += 1
+            self.__entry(target)["last_used"] = time.time()
+            return True
+        return self.__update(update)
+
+    def is_locked(self, version):
+        try:
+            with open("{}/.{}.lock".format(self.builds_folder, version), 'a') as lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except IOError:
+                    return True
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        except OSError:
+            pass
+        return False
+
+    # Remove the least recently used versions until the builds take at most
+    # quota bytes. The versions matching one of the versions in keep (which
+    # may be abbreviated differently) are never removed, the ones matching a
+    # version in referenced only when removing the other ones is not enough.
+    # Kept and referenced aliases protect the version whose build they re-use,
+    # and so does the lock of an alias. Returns the list of evicted versions.
+    def evict(self, quota, keep = [], referenced = []):
+        def matches(version, versions):
+            return any([v.startswith(version) or version.startswith(v) for v in versions if len(v) > 0])
+
+        def resolved(versions, folders):
+            # The versions along with the versions built for them
+            built = set(versions)
+            for folder in folders:
+                if matches(folder, versions):
+                    built.add(self.resolve(folder))
+            return built
+
+        def update():
+            versions = self.versions()
+            for version in list(self.db["entries"].keys()):
+                if version not in versions:
+                    del self.db["entries"][version]
+            for key, version in list(self.db["keys"].items()):
+                if version not in versions:
+                    del self.db["keys"][key]
+
+            folders = self.__folders()
+            aliases = self.aliases()
+            kept = resolved(keep, folders)
+            refs = resolved(referenced, folders)
+            def locked(version):
+                return self.is_locked(version) or any([self.is_locked(alias) for alias, target
+                                                       in aliases.items() if target == version])
+
+            total = sum([self.__entry(v)["size"] for v in versions])
+            evicted = []
+            order = sorted(versions, key=lambda v: (matches(v, refs), self.__entry(v)["last_used"]))
+            for version in order:
+                if total <= quota:
+                    break
+                if matches(version, kept) or locked(version):
+                    continue
+                shutil.rmtree(os.path.join(self.builds_folder, version), ignore_errors=True)
+                total -= self.db["entries"].pop(version)["size"]
+                self.db["stats"]["evictions"] += 1
+                evicted.append(version)
+
+            # Remove the aliases of the versions which got removed
+            versions = self.versions()
+            for alias, target in aliases.items():
+                if target not in versions:
+                    os.remove(os.path.join(self.builds_folder, alias))
+            return evicted
+        return self.__update(update)
+
+    def stats(self):
+        stats = dict(self.db["stats"])
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups > 0 else None
+        versions = self.versions()
+        stats["versions"] = len(versions)
+        stats["identical_versions"] = len(self.aliases())
+        stats["size"] = sum([self.db["entries"][v]["size"] for v in versions if v in self.db["entries"]])
+        return stats
+
+def active_reports_versions(logs_folder, profile):
+    # Versions still having runs to be made by the running reports of the
+    # profile, read from the state of the reports of SmartEzbench
+    versions = set()
+    for state_file in glob.glob(logs_folder + "/*/smartezbench.state"):
+        try:
+            with open(state_file) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            continue
+        # RunningMode.RUN and RunningMode.RUNNING
+        if state.get("profile") == profile and state.get("mode") in [1, 5]:
+            versions |= set(state.get("commits", dict()).keys())
+    return versions
+
+
+if __name__ == "__main__":
+    # parse the options
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-d", dest='builds_folder', help="Folder containing the builds of the profile",
+                        action="store", required=True)
+    parser.add_argument("-q", dest='quota', help="Maximum size of the builds (bytes, or with the suffixes K, M, G, T)",
+                        action="store")
+    parser.add_argument("-k", dest='keep', help="Versions that should not be evicted",
+                        action="append", default=[])
+    parser.add_argument("-P", dest='profile', help="Evict the versions used by the running reports of this profile last",
+                        action="store")
+    parser.add_argument("-K", dest='key', help="Key of the build of the version",
+                        action="store")
+    parser.add_argument("-t", dest='target', help="Version whose build should be re-used by the alias action",
+                        action="store")
+    parser.add_argument("action", choices=('hit', 'miss', 'prebuilt', 'lookup', 'alias', 'evict', 'stats'))
+    parser.add_argument("version", nargs='?')
+    args = parser.parse_args()
+
+    cache = BuildCache(args.builds_folder)
+    if args.action in ['hit', 'miss', 'prebuilt', 'alias']:
+        if args.version is None:
+            print("ERROR: The action '{}' requires a version".format(args.action))
+            sys.exit(1)
+        if args.action == 'hit':
+            cache.hit(args.version)
+        elif args.action == 'alias':
+            if args.target is None or not cache.alias(args.version, args.target):
+                sys.exit(1)
+        else:
+            getattr(cache, args.action)(args.version, args.key)
+    elif args.action == 'lookup':
+        version = cache.lookup(args.key) if args.key is not None else None
+        if version is None:
+            sys.exit(1)
+        print(version)
+    elif args.action == 'evict':
+        if args.quota is None:
+            sys.exit(0)
+        referenced = []
+        if args.profile is not None:
+            ezbench_dir = os.path.abspath(sys.path[0] + "/../")
+            referenced = active_reports_versions(ezbench_dir + "/logs", args.profile)
+        for version in cache.evict(BuildCache.parse_size(args.quota), args.keep, referenced):
+            print("Evicted the version {} from the build cache".format(version))
+    else:
+        print(json.dumps(cache.stats(), sort_keys=True, indent=4, separators=(',', ': ')))
@@ -28,8 +28,15 @@ OF THIS
 """
 
 import collections
+import gzip
+import os
 import re
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 class EnvDumpReport:
     csv_layout_v1 = [
         ['BIOS', 'vendor', 'version', 'date'],
@@ -159,9 +166,19 @@ class EnvDumpReport:
                 return True
         return False
 
+    def __open__(self, report_path):
+        # Reports may have been compressed by ezbench
+        if os.path.exists(report_path):
+            return open(report_path)
+        elif os.path.exists(report_path + ".gz"):
+            return gzip.open(report_path + ".gz", 'rt')
+        elif os.path.exists(report_path + ".zst") and zstandard is not None:
+            return zstandard.open(report_path + ".zst", 'rt')
+        return open(report_path)
+
     def __init__(self, report_path, human=False):
         try:
-            f = open(report_path)
+            f = self.__open__(report_path)
         except Exception as e:
             print("Cannot open the file {0}: {1}".format(report_path, str(e)))
             return
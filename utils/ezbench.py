@@ -33,13 +33,26 @@ from array import array
 from scipy import stats
 from enum import Enum
 from numpy import *
+import numpy
+import concurrent.futures
+import abc
+import bisect
+import multiprocessing
 import statistics
+import math
 import subprocess
 import threading
+import urllib.parse
+import socket
+import sqlite3
 import atexit
+import shutil
+import signal
 import pprint
 import fcntl
 import time
+import hashlib
+import gzip
 import json
 import glob
 import copy
@@ -54,6 +67,19 @@ if not os.path.isdir(timing_dir):
     timing_dir = os.path.abspath(sys.path[0]+"/timing_DB/")
 sys.path.append(timing_dir)
 from timing import *
+from noise import *
+
+from build_cache import *
+
+# zstd compression of the report files is optional
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Import the environment dump parser from the utils/env_dump/ folder
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + "/env_dump/")
+from env_dump_parser import EnvDumpReport
 
 # Ezbench runs
 class EzbenchExitCode(Enum):
@@ -80,7 +106,7 @@ class EzbenchExitCode(Enum):
     UNK_ERROR = 255
 
 class EzbenchRun:
-    def __init__(self, commits, benchmarks, versions, predicted_execution_time, repo_type, repo_dir, repo_head, deployed_commit, exit_code):
+    def __init__(self, commits, benchmarks, versions, predicted_execution_time, repo_type, repo_dir, repo_head, deployed_commit, exit_code, builds_folder = None):
         self.commits = commits
         self.benchmarks = benchmarks
         self.versions = versions
@@ -90,6 +116,7 @@ class EzbenchRun:
         self.repo_head = repo_head
         self.deployed_commit = deployed_commit
         self.exit_code = EzbenchExitCode(exit_code)
+        self.builds_folder = builds_folder
 
     def success(self):
         return self.exit_code == EzbenchExitCode.NO_ERROR
@@ -129,13 +156,13 @@ class Ezbench:
             ezbench_cmd.append("-l")
             return ezbench_cmd, ""
 
+        if self.profile is not None:
+            ezbench_cmd.append("-P"); ezbench_cmd.append(self.profile)
+
         if list_built_versions:
             ezbench_cmd.append("-L")
             return ezbench_cmd, ""
 
-        if self.profile is not None:
-            ezbench_cmd.append("-P"); ezbench_cmd.append(self.profile)
-
         if self.repo_path is not None:
             ezbench_cmd.append("-p"); ezbench_cmd.append(self.repo_path)
 
@@ -160,13 +187,18 @@ class Ezbench:
         if dry_run:
             ezbench_cmd.append("-k")
 
+        # The benchmarks can also be (benchmark, rounds) tuples, to run them
+        # a different amount of rounds
         stdin = ""
         for benchmark in benchmarks:
-            stdin += benchmark + "\n"
+            if isinstance(benchmark, tuple):
+                stdin += "{}\t{}\n".format(benchmark[0], int(benchmark[1]))
+            else:
+                stdin += benchmark + "\n"
 
         return ezbench_cmd, stdin
 
-    def __run_ezbench(self, cmd, stdin, dry_run = False, verbose = False):
+    def __run_ezbench(self, cmd, stdin, dry_run = False, verbose = False, line_callback = None):
         exit_code = None
 
         if verbose:
@@ -180,15 +212,30 @@ class Ezbench:
             except FileNotFoundError:
                 pass
 
-        try:
-            output = subprocess.check_output(cmd, stderr=subprocess.STDOUT,
-                                             universal_newlines=True,
-                                             input=stdin)
-            exit_code = EzbenchExitCode.NO_ERROR
-        except subprocess.CalledProcessError as e:
-            exit_code = EzbenchExitCode(e.returncode)
-            output = e.output
-            pass
+        if line_callback is None:
+            try:
+                output = subprocess.check_output(cmd, stderr=subprocess.STDOUT,
+                                                 universal_newlines=True,
+                                                 input=stdin)
+                exit_code = EzbenchExitCode.NO_ERROR
+            except subprocess.CalledProcessError as e:
+                exit_code = EzbenchExitCode(e.returncode)
+                output = e.output
+                pass
+        else:
+            # Follow the progress of core.sh by giving every line of its
+            # output to the callback as soon as it is printed
+            lines = []
+            with subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                  stderr=subprocess.STDOUT,
+                                  universal_newlines=True) as proc:
+                proc.stdin.write(stdin)
+                proc.stdin.close()
+                for line in proc.stdout:
+                    lines.append(line)
+                    line_callback(line)
+                exit_code = EzbenchExitCode(proc.wait())
+            output = "".join(lines)
 
         # we need to parse the output
         commits= []
@@ -199,6 +246,7 @@ class Ezbench:
         repo_type = ""
         repo_dir = ""
         head_commit = ""
+        builds_folder = None
         re_commit_list = re.compile('^Testing \d+ versions: ')
         re_repo = re.compile('^Repo type = (.*), directory = (.*), version = (.*), deployed version = (.*)$')
         for line in output.split("\n"):
@@ -210,6 +258,8 @@ class Ezbench:
                 benchmarks = line[17:].split(" ")
             elif line.startswith("Available versions:"):
                 versions = line[19:].strip().split(" ")
+            elif line.startswith("Builds folder:"):
+                builds_folder = line[14:].strip()
             elif line.find("estimated finish date:") >= 0:
                 pred_exec_time = ""
             elif m_repo is not None:
@@ -227,16 +277,36 @@ class Ezbench:
         if exit_code != EzbenchExitCode.NO_ERROR:
             print("\n\nERROR: The following command '{}' failed with the error code {}. Here is its output:\n\n'{}'".format(" ".join(cmd), exit_code, output))
 
-        return EzbenchRun(commits, benchmarks, versions, pred_exec_time, repo_type, repo_dir, head_commit, deployed_commit, exit_code)
+        return EzbenchRun(commits, benchmarks, versions, pred_exec_time, repo_type, repo_dir, head_commit, deployed_commit, exit_code, builds_folder)
 
     def run_commits(self, commits, benchmarks, benchmark_excludes = [],
-                    rounds = None, dry_run = False, verbose = False):
+                    rounds = None, dry_run = False, verbose = False,
+                    line_callback = None):
         ezbench_cmd, ezbench_stdin = self.__ezbench_cmd_base(benchmarks, benchmark_excludes, rounds, dry_run)
 
         for commit in commits:
             ezbench_cmd.append(commit)
 
-        return self.__run_ezbench(ezbench_cmd, ezbench_stdin, dry_run, verbose)
+        return self.__run_ezbench(ezbench_cmd, ezbench_stdin, dry_run, verbose,
+                                  line_callback)
+
+    # Build the commits in the background, at the lowest CPU and IO priority,
+    # without deploying them. Returns the Popen object of the build, which
+    # runs in its own process group.
+    def prebuild(self, commits, log_file):
+        ezbench_cmd, ezbench_stdin = self.__ezbench_cmd_base()
+        ezbench_cmd.append("-D")
+        for commit in commits:
+            ezbench_cmd.append(commit)
+
+        prefix = ["nice", "-n", "19"]
+        if shutil.which("ionice") is not None:
+            prefix.extend(["ionice", "-c", "3"])
+
+        with open(log_file, 'a') as log:
+            return subprocess.Popen(prefix + ezbench_cmd, stdin=subprocess.DEVNULL,
+                                    stdout=log, stderr=subprocess.STDOUT,
+                                    start_new_session=True)
 
     def available_benchmarks(self):
         ezbench_cmd, ezbench_stdin = self.__ezbench_cmd_base(list_benchmarks = True)
@@ -246,6 +316,13 @@ class Ezbench:
         ezbench_cmd, ezbench_stdin = self.__ezbench_cmd_base(list_built_versions = True)
         return self.__run_ezbench(ezbench_cmd, ezbench_stdin).versions
 
+    def build_cache(self):
+        ezbench_cmd, ezbench_stdin = self.__ezbench_cmd_base(list_built_versions = True)
+        builds_folder = self.__run_ezbench(ezbench_cmd, ezbench_stdin).builds_folder
+        if builds_folder is None or not os.path.isdir(builds_folder):
+            return None
+        return BuildCache(builds_folder)
+
     def reportIsLocked(self):
         if self.report_name is None:
             return False
@@ -270,6 +347,76 @@ class Ezbench:
             pass
 
 
+class TaskPlanner:
+    # Order the tasks of SmartEzbench to minimize the time spent building and
+    # deploying versions. All the tasks of a commit are run together, so as
+    # every commit gets built and deployed at most once, the deployed commit
+    # going first. The other commits are sorted by increasing cost (building
+    # if not already built, deploying, running the benchmarks) to get as
+    # many results as early as possible.
+    #
+    # build_time and deploy_time are the estimated times to build and deploy a
+    # version, bench_time returns the estimated time of one run of a
+    # benchmark, or None if unknown.
+    def __init__(self, build_time = 30, deploy_time = 0, bench_time = None):
+        self.build_time = build_time
+        self.deploy_time = deploy_time
+        self.bench_time = bench_time
+
+    @staticmethod
+    def same_version(a, b):
+        # Versions may be abbreviated differently. An empty version, like the
+        # deployed one when it is unknown, is not the same as any version
+        if not a or not b:
+            return False
+        return a.startswith(b) or b.startswith(a)
+
+    def is_built(self, commit, built_versions):
+        return any([self.same_version(commit, v) for v in built_versions])
+
+    def switch_cost(self, commit, deployed_version, built_versions):
+        if self.same_version(commit, deployed_version):
+            return 0
+        cost = self.deploy_time
+        if not self.is_built(commit, built_versions):
+            cost += self.build_time
+        return cost
+
+    def run_cost(self, tasks):
+        cost = 0
+        for task in tasks:
+            exec_time = self.bench_time(task.benchmark) if self.bench_time is not None else None
+            if exec_time is not None:
+                cost += exec_time * task.rounds
+        return cost
+
+    # tasks is a list of TaskEntry, returns them in the order they should be run
+    def plan(self, tasks, deployed_version, built_versions = []):
+        built_versions = [v for v in built_versions if v]
+        commits = dict()
+        for task in tasks:
+            commits.setdefault(task.commit, []).append(task)
+
+        costs = dict()
+        for commit, commit_tasks in commits.items():
+            costs[commit] = (self.switch_cost(commit, deployed_version, built_versions),
+                             self.run_cost(commit_tasks))
+        order = sorted(commits.keys(), key=lambda c: (costs[c][0] > 0, sum(costs[c])))
+
+        return [task for commit in order for task in commits[commit]]
+
+    # Returns the time spent building and deploying versions to run tasks in
+    # this order
+    def switches_cost(self, tasks, deployed_version, built_versions = []):
+        built = [v for v in built_versions if v]
+        cost = 0
+        for task in tasks:
+            if not self.same_version(task.commit, deployed_version):
+                cost += self.switch_cost(task.commit, deployed_version, built)
+                deployed_version = task.commit
+                built.append(task.commit)
+        return cost
+
 # Test sets, needed by SmartEzbench
 class Testset:
     def __init__(self, filepath, name):
@@ -285,10 +432,15 @@ class Testset:
             print("At {}:{}, {}".format(self.filepath, self._ln, msg))
 
     def __include_set__(self, availableTestSet, reg_exp, rounds, silent = False):
-        # Convert the rounds number to integer and validate it
+        # Convert the rounds number to integer and validate it. The default
+        # rounds of the benchmarks, found by their calibration, are used when
+        # the rounds are 'default'.
         try:
-            rounds = int(rounds)
-            if rounds < 0:
+            if rounds.strip() == "default":
+                rounds = None
+            else:
+                rounds = int(rounds)
+            if rounds is not None and rounds < 0:
                 self.__print__("the number of rounds cannot be negative ({})".format(rounds), silent)
                 return False
         except ValueError:
@@ -400,6 +552,17 @@ class RunningMode(Enum):
     ABORT = 4
     RUNNING = 5
 
+class PrebuildPolicy(Enum):
+    OFF = 0     # Build the versions when they get deployed
+    NICE = 1    # Build the next versions during the runs, at a low priority
+    PAUSE = 2   # Same as NICE, but pause the build during the benchmark runs
+
+class SharedResultsPolicy(Enum):
+    OFF = 0     # Never re-use the results of other reports
+    STRICT = 1  # Only the volatile parts of the environment may differ
+    MACHINE = 2 # The hardware, firmware and kernel must be the same
+    ANY = 3     # Re-use any result of the same commit and benchmark
+
 def list_smart_ezbench_report_names(ezbench_dir, updatedSince = 0):
     log_dir = ezbench_dir + '/logs'
     state_files = glob.glob("{log_dir}/*/smartezbench.state".format(log_dir=log_dir));
@@ -416,10 +579,13 @@ def list_smart_ezbench_report_names(ezbench_dir, updatedSince = 0):
     return reports
 
 class TaskEntry:
-    def __init__(self, commit, benchmark, rounds):
+    # skippable_rounds are the rounds added by schedule_enhancements(), which
+    # may be skipped when the result is already conclusive (early stopping)
+    def __init__(self, commit, benchmark, rounds, skippable_rounds = 0):
         self.commit = commit
         self.benchmark = benchmark
         self.rounds = rounds
+        self.skippable_rounds = skippable_rounds
         self.start_date = None
         self.exec_time = None
 
@@ -485,6 +651,10 @@ class SmartEzbench:
         self._task_current = None
         self._task_list = None
 
+        # Background build of the next commits to be run
+        self._prebuild = None
+        self.prebuild_depth = 2
+
         # Create the log directory
         first_run = False
         if not readonly and not os.path.exists(self.log_folder):
@@ -673,17 +843,383 @@ class SmartEzbench:
     def commit_url(self):
         return self.__read_attribute__('commit_url')
 
+    def shared_results_policy(self):
+        return SharedResultsPolicy(self.__read_attribute__('shared_results_policy',
+                                                           SharedResultsPolicy.STRICT.value))
+
+    def set_shared_results_policy(self, policy):
+        self.__write_attribute__('shared_results_policy', policy.value, allow_updates = True)
+        self.__log(Criticality.II, "Shared results policy set to '{}'".format(policy.name))
+
+    def result_filter(self):
+        config = self.__read_attribute__('result_filter')
+        if config is None:
+            return None
+        return ResultFilter.from_dict(config)
+
+    def set_result_filter(self, result_filter):
+        config = result_filter.to_dict() if result_filter is not None else None
+        self.__write_attribute__('result_filter', config, allow_updates = True)
+        self.__log(Criticality.II, "Result filter set to {}".format(config))
+
+    def prebuild_policy(self):
+        return PrebuildPolicy(self.__read_attribute__('prebuild_policy',
+                                                      PrebuildPolicy.OFF.value))
+
+    def set_prebuild_policy(self, policy):
+        self.__write_attribute__('prebuild_policy', policy.value, allow_updates = True)
+        self.__log(Criticality.II, "Prebuild policy set to '{}'".format(policy.name))
+
+    def __prebuild_next(self, ezbench, commit, policy):
+        # Build the commits following the one about to be run, unless the
+        # previous background build is still going on. The caller needs to
+        # hold _task_lock.
+        pgid_file = self.log_folder + "/prebuild.pgid"
+        if self._prebuild is not None and self._prebuild.poll() is None:
+            return
+        self.__prebuild_stop()
+
+        commits = []
+        for task in self._task_list:
+            if task.commit != commit and task.commit not in commits:
+                commits.append(task.commit)
+        commits = commits[:self.prebuild_depth]
+        if len(commits) == 0:
+            return
+
+        self.__log(Criticality.DD, "Prebuilding commits {}".format(", ".join(commits)))
+        self._prebuild = ezbench.prebuild(commits, self.log_folder + "/prebuild.log")
+
+        # core.sh pauses the processes of this group during the runs
+        if policy == PrebuildPolicy.PAUSE:
+            with open(pgid_file, 'w') as f:
+                f.write(str(self._prebuild.pid))
+
+    def __prebuild_stop(self):
+        # Stop the background build, if still running, which releases the
+        # locks of the versions it builds, and let core.sh know it is gone
+        if self._prebuild is not None and self._prebuild.poll() is None:
+            try:
+                os.killpg(self._prebuild.pid, signal.SIGTERM)
+                os.killpg(self._prebuild.pid, signal.SIGCONT)
+                self._prebuild.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                os.killpg(self._prebuild.pid, signal.SIGKILL)
+                self._prebuild.wait()
+            except ProcessLookupError:
+                pass
+        self._prebuild = None
+        try:
+            os.remove(self.log_folder + "/prebuild.pgid")
+        except FileNotFoundError:
+            pass
+
+    def build_cache_stats(self):
+        cache = self.__create_ezbench().build_cache()
+        if cache is None:
+            return None
+        return cache.stats()
+
+    def early_stopping(self):
+        return self.__read_attribute__('early_stopping', False)
+
+    def set_early_stopping(self, enabled):
+        self.__write_attribute__('early_stopping', enabled, allow_updates = True)
+        self.__log(Criticality.II, "Early stopping of the benchmark rounds {}".format("enabled" if enabled else "disabled"))
+
+    def __read_bench_data(self, commit, benchmark):
+        # Returns the samples of a 'bench' result of the report, or None
+        name = "{}_bench_{}".format(commit, benchmark)
+        for path in ["{}/{}/{}".format(self.log_folder, commit, name),
+                     "{}/{}".format(self.log_folder, name)]:
+            if os.path.exists(path):
+                return readCsv(path)[0]
+        return None
+
+    def __run_tasks_sequentially(self, ezbench, tasks, test, neighbours):
+        # Run the tasks of a commit in at most two calls to core.sh: first the
+        # rounds requested by the user (at least test.min_rounds), then the
+        # rounds added by schedule_enhancements() to the tasks whose results
+        # are still not conclusive. neighbours[i] is the list of samples of the
+        # neighbours of tasks[i].
+        first = []
+        for task in tasks:
+            data = self.__read_bench_data(task.commit, task.benchmark)
+            rounds = task.rounds - task.skippable_rounds
+            wanted = test.min_rounds - (len(data) if data is not None else 0)
+            if rounds < wanted:
+                rounds = wanted if wanted < task.rounds else task.rounds
+            first.append(rounds)
+
+        run_info = None
+        batch = [(t, r) for t, r in zip(tasks, first) if r > 0]
+        if len(batch) > 0:
+            self.__make_task_current(batch[0][0])
+            run_info = self.__run_tasks_batched(ezbench, [t for t, r in batch],
+                                                [r for t, r in batch])
+            if not run_info.success():
+                return run_info
+
+        # Only the 'bench' results can be tested, run the other ones normally
+        batch = []
+        for i, task in enumerate(tasks):
+            left = task.rounds - first[i]
+            if left <= 0:
+                continue
+            data = self.__read_bench_data(task.commit, task.benchmark)
+            if data is not None and test.is_conclusive(data, neighbours[i]):
+                self.__log(Criticality.DD,
+                           "Stopping {benchmark} on commit {commit} after {done} of {count} runs".format(benchmark=task.benchmark,
+                                                                                                   commit=task.commit,
+                                                                                                   done=first[i],
+                                                                                                   count=task.rounds))
+                continue
+            batch.append((task, left))
+        if len(batch) == 0:
+            return run_info
+
+        if run_info is not None and self.running_mode() != RunningMode.RUNNING:
+            return run_info
+        self.__make_task_current(batch[0][0])
+        return self.__run_tasks_batched(ezbench, [t for t, r in batch], [r for t, r in batch])
+
+    def __log_task_start(self, task):
+        short_name=task.benchmark[:80].rsplit('|', 1)[0]+'...'
+        self.__log(Criticality.DD,
+                   "make {count} runs for benchmark {benchmark} using commit {commit}".format(count=task.rounds,
+                                                                                              commit=task.commit,
+                                                                                              benchmark=short_name))
+
+    def __start_task(self, task):
+        # Make the task the current one, the caller needs to hold _task_lock
+        if task in self._task_list:
+            self._task_list.remove(task)
+        self._task_current = task
+        self._task_current.started()
+
+    def __make_task_current(self, task):
+        if task is self._task_current:
+            return
+        self._task_lock.acquire()
+        self.__start_task(task)
+        self._task_lock.release()
+        self.__log_task_start(task)
+
+    def __run_tasks_batched(self, ezbench, tasks, rounds = None):
+        # Run all the tasks of a commit in one call to core.sh, to avoid
+        # paying its startup time for every benchmark. core.sh runs the
+        # benchmarks in order and prints a line when one is done, which makes
+        # the next task the current one. rounds[i] overrides the rounds of
+        # tasks[i].
+        if rounds is None:
+            rounds = [t.rounds for t in tasks]
+
+        current = 0
+        def follow_progress(line):
+            nonlocal current
+            name = Benchmark.parse_name(tasks[current].benchmark)[0]
+            if current + 1 < len(tasks) and line.strip().startswith(name + ": "):
+                current += 1
+                self.__make_task_current(tasks[current])
+
+        benchmarks = [(t.benchmark + '$', r) for t, r in zip(tasks, rounds)]
+        run_info = ezbench.run_commits([tasks[0].commit], benchmarks,
+                                       line_callback=follow_progress)
+        if run_info.exit_code != EzbenchExitCode.TEST_INVALID_NAME or len(tasks) == 1:
+            return run_info
+
+        # core.sh refuses to run anything when one of the benchmarks does not
+        # exist, run the tasks one by one to still get the other results
+        for i in range(current, len(tasks)):
+            if i > current:
+                if self.running_mode() != RunningMode.RUNNING:
+                    break
+                self.__make_task_current(tasks[i])
+
+            run_info = ezbench.run_commits([tasks[i].commit], [tasks[i].benchmark + '$'],
+                                           rounds=rounds[i])
+            if not run_info.success() and run_info.exit_code != EzbenchExitCode.TEST_INVALID_NAME:
+                break
+        return run_info
+
+    def __history_positions(self, git_history, sha1s):
+        # Returns the position of every commit of sha1s in git_history, -1 if
+        # it is not part of it
+        # NOTE: git_history() contains abbreviated SHA1s
+        history = dict()
+        for i, c in enumerate(git_history):
+            history.setdefault(c.sha1, i)
+        lengths = sorted(set([len(h) for h in history]))
+
+        positions = dict()
+        for sha1 in sha1s:
+            pos = -1
+            for length in lengths:
+                if len(sha1) >= length and sha1[:length] in history:
+                    pos = history[sha1[:length]]
+                    break
+            else:
+                # Commits shorter than the abbreviated SHA1s are rare enough
+                if len(lengths) > 0 and len(sha1) < lengths[-1]:
+                    for i, c in enumerate(git_history):
+                        if c.sha1.startswith(sha1):
+                            pos = i
+                            break
+            positions[sha1] = pos
+        return positions
+
+    def __bench_results_index(self, report, positions):
+        # Index the samples of the 'bench' results of the report by benchmark,
+        # as a sorted list of positions in the history and the matching samples
+        index = dict()
+        for c in report.commits:
+            pos = positions.get(c.sha1, -1)
+            if pos < 0:
+                continue
+            for result in c.results:
+                if result.test_type == "bench":
+                    index.setdefault(result.benchmark.full_name, dict())[pos] = result.data
+
+        for benchmark, results in index.items():
+            order = sorted(results)
+            index[benchmark] = (order, [results[p] for p in order])
+        return index
+
+    def __neighbours_data(self, index, positions, commit, benchmark):
+        # Returns the samples of the closest older and newer commits having
+        # results for the benchmark
+        pos = positions.get(commit, -1)
+        if pos < 0 or benchmark not in index:
+            return []
+
+        order, data = index[benchmark]
+        newer = bisect.bisect_left(order, pos) - 1
+        older = bisect.bisect_right(order, pos)
+        neighbours = []
+        if older < len(order):
+            neighbours.append(data[older])
+        if newer >= 0:
+            neighbours.append(data[newer])
+        return neighbours
+
+    def noise_model(self):
+        # Returns the noise model of the benchmarks of the profile of the
+        # report on this machine, indexed by benchmark name
+        prefix = NoiseDB.key(socket.gethostname(), self.profile(), "")
+        db = NoiseDB(self.ezbench_dir + "/timing_DB")
+        return {k[len(prefix):]: m for k, m in db.dump().items() if k.startswith(prefix)}
+
+    def calibrate(self, benchmarks, rounds = 100, wanted_margin = 0.01):
+        # Run the benchmarks many times on the deployed version, in a separate
+        # report, and store their calibration along with the noise model
+        profile = self.profile()
+        if profile is None:
+            self.__log(Criticality.EE, "Cannot calibrate benchmarks without a profile")
+            return None
+
+        # The calibration runs have their own namespace, hidden from the list
+        # of reports, so as removing the previous runs cannot hit a report
+        report_name = ".calibration/" + self.report_name
+        log_folder = "{}/logs/{}".format(self.ezbench_dir, report_name)
+        shutil.rmtree(log_folder, ignore_errors=True)
+
+        ezbench = Ezbench(ezbench_dir = self.ezbench_dir, profile = profile,
+                          report_name = report_name)
+        run_info = ezbench.run_commits(["HEAD"], [], [], dry_run=True)
+        if not run_info.success() or run_info.deployed_commit == "":
+            self.__log(Criticality.EE, "Cannot find the deployed version to calibrate the benchmarks")
+            return None
+
+        self.__log(Criticality.II,
+                   "Calibrate {} using {} runs on the deployed version {}".format(", ".join(benchmarks),
+                                                                                 rounds, run_info.deployed_commit))
+        run_info = ezbench.run_commits([run_info.deployed_commit],
+                                       [b + '$' for b in benchmarks], rounds=rounds)
+        if not run_info.success():
+            return None
+
+        machine = socket.gethostname()
+        db = NoiseDB(self.ezbench_dir + "/timing_DB")
+        calibrations = dict()
+        report = genPerformanceReport(log_folder, silentMode = True)
+        for commit in report.commits:
+            for result in commit.results:
+                if result.test_type != "bench":
+                    continue
+                calibration = calibrateBenchmark(result.runs, wanted_margin)
+                if calibration is None:
+                    continue
+                calibration["version"] = commit.sha1
+                calibration["date"] = datetime.now().isoformat()
+
+                name = result.benchmark.full_name
+                db.set_calibration(machine, profile, name, calibration)
+                db.update([(machine, profile, name, "{}/calibration".format(self.report_name),
+                            result.data[calibration["warmup_runs"]:])])
+                calibrations[name] = calibration
+                self.__log(Criticality.II,
+                           "Calibrated {}: {} rounds wanted".format(name, calibration["rounds"]))
+
+        return calibrations
+
+    def __update_noise_model(self, report):
+        # Learn the noise of the benchmarks from the results of the report and
+        # use it to compute how many runs the results need
+        profile = self.profile()
+        if profile is None:
+            return
+
+        machine = socket.gethostname()
+        results = []
+        for commit in report.commits:
+            for result in commit.results:
+                if result.test_type == "bench":
+                    result_id = "{}/{}".format(self.report_name, commit.sha1)
+                    results.append((machine, profile, result.benchmark.full_name,
+                                    result_id, result.data))
+
+        db = NoiseDB(self.ezbench_dir + "/timing_DB")
+        try:
+            db.update(results)
+        except IOError as e:
+            self.__log(Criticality.WW, "Cannot update the noise model: {}".format(e))
+
+        for commit in report.commits:
+            for result in commit.results:
+                if result.test_type == "bench":
+                    result.noise_sigma = db.sigma(machine, profile, result.benchmark.full_name)
+
+    def __share_results(self, profile, import_runs = True):
+        # Reports not re-using the results of others do not share theirs
+        policy = self.shared_results_policy()
+        if policy == SharedResultsPolicy.OFF:
+            return
+
+        shared = SharedResults(self.ezbench_dir)
+        try:
+            shared.publish(self.log_folder, profile)
+            if import_runs:
+                count = shared.import_runs(self.log_folder, profile, self.state['commits'], policy)
+                if count > 0:
+                    self.__log(Criticality.II,
+                               "Imported {count} runs from the other reports (policy {policy})".format(count=count,
+                                                                                                        policy=policy.name))
+        except (OSError, sqlite3.Error) as e:
+            self.__log(Criticality.WW, "Cannot share the results with the other reports: {}".format(e))
+        finally:
+            shared.close()
+
     def set_commit_url(self, commit_url):
         self.__write_attribute__('commit_url', commit_url, allow_updates = True)
         self.__log(Criticality.II, "Report commit URL has been changed to '{}'".format(commit_url))
 
-    def __add_benchmark_unlocked__(self, commit, benchmark, rounds = None):
+    def __add_benchmark_unlocked__(self, commit, benchmark, rounds = None, noise_db = None):
         if commit not in self.state['commits']:
             self.state['commits'][commit] = dict()
             self.state['commits'][commit]["benchmarks"] = dict()
 
         if rounds is None:
-            rounds = 3
+            rounds = self.__default_rounds_unlocked__(benchmark, noise_db)
         else:
             rounds = int(rounds)
 
@@ -693,6 +1229,11 @@ class SmartEzbench:
         else:
             self.state['commits'][commit]['benchmarks'][benchmark]['rounds'] += rounds
 
+        # We do not know which of the rounds already ran, make sure none of
+        # the rounds asked for here can be skipped by early stopping
+        if rounds > 0:
+            self.state['commits'][commit]['benchmarks'][benchmark].pop('enhancement_rounds', None)
+
         # if the number of rounds is equal to 0 for a benchmark, delete it
         if self.state['commits'][commit]['benchmarks'][benchmark]['rounds'] <= 0:
             del self.state['commits'][commit]['benchmarks'][benchmark]
@@ -701,6 +1242,19 @@ class SmartEzbench:
         if len(self.state['commits'][commit]['benchmarks']) == 0:
             del self.state['commits'][commit]
 
+    def __default_rounds_unlocked__(self, benchmark, noise_db = None):
+        # Use the rounds found by the calibration of the benchmark, if any.
+        # Callers adding many benchmarks pass noise_db to only read it once
+        calibration = None
+        profile = self.__read_attribute_unlocked__('profile')
+        if profile is not None:
+            if noise_db is None:
+                noise_db = NoiseDB(self.ezbench_dir + "/timing_DB")
+            calibration = noise_db.calibration(socket.gethostname(), profile, benchmark)
+        if calibration is None:
+            return 3
+        return calibration["rounds"]
+
     def add_benchmark(self, commit, benchmark, rounds = None):
         self.__reload_state(keep_lock=True)
         self.__add_benchmark_unlocked__(commit, benchmark, rounds)
@@ -715,14 +1269,21 @@ class SmartEzbench:
         else:
             rounds = int(rounds)
 
+        noise_db = None
         for benchmark in sorted(testset.tests.keys()):
-            self.__add_benchmark_unlocked__(commit, benchmark,
-                                            testset.tests[benchmark] * rounds)
+            bench_rounds = testset.tests[benchmark]
+            if bench_rounds is None:
+                if noise_db is None:
+                    noise_db = NoiseDB(self.ezbench_dir + "/timing_DB")
+                bench_rounds = self.__default_rounds_unlocked__(benchmark, noise_db)
+            self.__add_benchmark_unlocked__(commit, benchmark, bench_rounds * rounds)
 
         self.__save_state()
         self.__release_lock()
 
-    def __force_benchmark_rounds_unlocked__(self, commit, benchmark, at_least):
+    # The rounds added by enhancements are recorded as such, early stopping
+    # may skip them but never the other ones (see __add_benchmark_unlocked__)
+    def __force_benchmark_rounds_unlocked__(self, commit, benchmark, at_least, enhancement = False):
         if at_least < 1:
             return 0
         else:
@@ -742,7 +1303,12 @@ class SmartEzbench:
             self.__log(Criticality.WW,
                        "Schedule {} more runs for the benchmark {} on commit {}".format(to_add, benchmark, commit))
 
-            self.state['commits'][commit]['benchmarks'][benchmark]['rounds'] += to_add
+            bench = self.state['commits'][commit]['benchmarks'][benchmark]
+            bench['rounds'] += to_add
+            if enhancement:
+                bench['enhancement_rounds'] = bench.get('enhancement_rounds', 0) + to_add
+            else:
+                bench.pop('enhancement_rounds', None)
 
         if to_add > 0:
             return to_add
@@ -772,6 +1338,13 @@ class SmartEzbench:
                 t.set_timing_information(db)
         return c, tl
 
+    @staticmethod
+    def __skippable_rounds(bench):
+        # The rounds left to run for the benchmark of a task tree which got
+        # added by the enhancements, the requested ones being run first
+        skippable = bench.get('enhancement_rounds', 0)
+        return skippable if skippable < bench['rounds'] else bench['rounds']
+
     def __prioritize_runs(self, task_tree, deployed_version):
         task_list = list()
 
@@ -779,6 +1352,7 @@ class SmartEzbench:
         for commit in task_tree:
             bench_subtests = dict()
             bench_rounds = dict()
+            bench_required = dict()
 
             # First, read all the benchmarks and aggregate them
             for benchmark in task_tree[commit]["benchmarks"]:
@@ -786,8 +1360,12 @@ class SmartEzbench:
                 if basename not in bench_subtests:
                     bench_subtests[basename] = set()
                 bench_subtests[basename] |= set(subtests)
-                bench_rounds[basename] = max(bench_rounds.get(basename, 0),
-                                       task_tree[commit]["benchmarks"][benchmark]["rounds"])
+                rounds = task_tree[commit]["benchmarks"][benchmark]["rounds"]
+                if rounds > bench_rounds.get(basename, 0):
+                    bench_rounds[basename] = rounds
+                required = rounds - self.__skippable_rounds(task_tree[commit]["benchmarks"][benchmark])
+                if required > bench_required.get(basename, 0):
+                    bench_required[basename] = required
 
             # Destroy the state before reconstructing it!
             task_tree[commit]["benchmarks"] = dict()
@@ -795,22 +1373,37 @@ class SmartEzbench:
                 full_name = Benchmark.partial_name(basename, list(bench_subtests[basename]))
                 task_tree[commit]["benchmarks"][full_name] = dict()
                 task_tree[commit]["benchmarks"][full_name]["rounds"] = bench_rounds[basename]
+                task_tree[commit]["benchmarks"][full_name]["enhancement_rounds"] = bench_rounds[basename] - bench_required.get(basename, 0)
 
-        # Schedule the tests using the already-deployed version
-        if deployed_version is not None and deployed_version in task_tree:
-            for benchmark in task_tree[deployed_version]["benchmarks"]:
-                rounds = task_tree[deployed_version]["benchmarks"][benchmark]["rounds"]
-                task_list.append(TaskEntry(deployed_version, benchmark, rounds))
-            del task_tree[deployed_version]
-
-        # Add all the remaining tasks in whatever order!
         for commit in task_tree:
             for benchmark in task_tree[commit]["benchmarks"]:
                 rounds = task_tree[commit]["benchmarks"][benchmark]["rounds"]
-                task_list.append(TaskEntry(commit, benchmark, rounds))
+                skippable = self.__skippable_rounds(task_tree[commit]["benchmarks"][benchmark])
+                task_list.append(TaskEntry(commit, benchmark, rounds, skippable))
+
+        # Order the tasks to build and deploy as few versions as possible
+        planner = self.__task_planner()
+        built_versions = self.__create_ezbench().available_versions()
+        task_list = planner.plan(task_list, deployed_version, built_versions)
+        self.__log(Criticality.II,
+                   "Planned {} tasks, spending an estimated {:.0f}s building and deploying versions".format(len(task_list),
+                                                                                                         planner.switches_cost(task_list, deployed_version, built_versions)))
 
         return task_list
 
+    def __task_planner(self):
+        # Get the estimates of the build, deployment and benchmark times from
+        # the timing_DB, the build time defaulting to 30s like the profiles
+        db = TimingsDB(self.ezbench_dir + "/timing_DB")
+        profile = self.__read_attribute_unlocked__('profile')
+        def median(namespace, key, default = None):
+            data = db.data(namespace, key)
+            return statistics.median(data) if len(data) > 0 else default
+
+        return TaskPlanner(build_time = median("build", profile, 30),
+                           deploy_time = median("deploy", profile, 0),
+                           bench_time = lambda benchmark: median("benchmark", benchmark))
+
     def __change_state_to_run__(self):
         self.__reload_state(keep_lock=True)
         ret = False
@@ -893,11 +1486,24 @@ class SmartEzbench:
         self.__log(Criticality.II, "    - Deployed version: '{0}'".format(run_info.deployed_commit))
         self.__log(Criticality.II, "All the dependencies are met, generate a report...")
 
+        # Re-use the runs already made by other reports in the same environment
+        self.__share_results(profile)
+
         # Generate a report to compare the goal with the current state
         report = genPerformanceReport(self.log_folder, silentMode = True)
         self.__log(Criticality.II,
                    "The report contains {count} commits".format(count=len(report.commits)))
 
+        # Get what is needed to stop the benchmarks as soon as they are conclusive
+        sequential_test = None
+        if self.early_stopping():
+            sequential_test = SequentialTest()
+            positions = self.__history_positions(self.git_history(),
+                                                 [c.sha1 for c in report.commits] + list(self.state['commits']))
+            bench_results = self.__bench_results_index(report, positions)
+
+        prebuild_policy = self.prebuild_policy()
+
         # Walk down the report and get rid of every run that has already been made!
         task_tree = copy.deepcopy(self.state['commits'])
         for commit in report.commits:
@@ -913,7 +1519,19 @@ class SmartEzbench:
                             full_name = Benchmark.partial_name(result.benchmark.full_name, [test])
                             self.__remove_task_from_tasktree__(task_tree, commit, full_name, 10^5) # FIXME: Read the actual round count?
                 else:
-                    self.__remove_task_from_tasktree__(task_tree, commit, result.benchmark.full_name, len(result.data))
+                    rounds = len(result.data)
+                    bench = task_tree.get(commit.sha1, dict()).get("benchmarks", dict()).get(result.benchmark.full_name)
+                    if sequential_test is not None and result.test_type == "bench" and bench is not None:
+                        # Skip the rounds added by the enhancements, but not
+                        # the ones requested by the user
+                        neighbours = self.__neighbours_data(bench_results, positions, commit.sha1,
+                                                            result.benchmark.full_name)
+                        left = bench['rounds'] - rounds
+                        if left > 0 and sequential_test.is_conclusive(result.data, neighbours):
+                            skipped = bench.get('enhancement_rounds', 0)
+                            rounds += skipped if skipped < left else left
+                            bench['enhancement_rounds'] = 0
+                    self.__remove_task_from_tasktree__(task_tree, commit, result.benchmark.full_name, rounds)
 
         # Delete the tests on commits that do not compile
         for commit in report.commits:
@@ -945,21 +1563,32 @@ class SmartEzbench:
             if running_mode != RunningMode.RUNNING:
                 self.__log(Criticality.II,
                        "Running mode changed from RUNNING to {mode}. Exit...".format(mode=running_mode.name))
+                self.__prebuild_stop()
                 self.__done_running__()
                 return False
 
-            self._task_current = e = self._task_list.pop(0)
-            short_name=e.benchmark[:80].rsplit('|', 1)[0]+'...'
-            self.__log(Criticality.DD,
-                       "make {count} runs for benchmark {benchmark} using commit {commit}".format(count=e.rounds,
-                                                                                                  commit=e.commit,
-                                                                                                  benchmark=short_name))
-            self._task_current.started()
+            e = self._task_list[0]
+            self.__start_task(e)
+            self.__log_task_start(e)
+            if prebuild_policy != PrebuildPolicy.OFF:
+                self.__prebuild_next(ezbench, e.commit, prebuild_policy)
+
+            # Run all the tasks of the commit at once. The tasks are kept in
+            # the task list until they start, and removed once core.sh exits,
+            # even if it did not get to run all of them
+            batch = [e] + [x for x in self._task_list if x.commit == e.commit]
             self._task_lock.release()
-            run_info = ezbench.run_commits([e.commit], [e.benchmark + '$'], rounds=e.rounds)
+            if sequential_test is not None:
+                neighbours = [self.__neighbours_data(bench_results, positions, t.commit, t.benchmark)
+                              for t in batch]
+                run_info = self.__run_tasks_sequentially(ezbench, batch, sequential_test, neighbours)
+            else:
+                run_info = self.__run_tasks_batched(ezbench, batch)
             self._task_lock.acquire()
+            self._task_list = [x for x in self._task_list if x not in batch]
 
-            if run_info.success():
+            # No run_info means that there was nothing left to run
+            if run_info is None or run_info.success():
                 continue
 
             # We got an error, let's see what we can do about it!
@@ -974,7 +1603,9 @@ class SmartEzbench:
 
         self._task_current = None
 
+        self.__prebuild_stop()
         self.__done_running__()
+        self.__share_results(profile, import_runs = False)
         self.__log(Criticality.II, "Done")
 
         return True
@@ -1011,10 +1642,50 @@ class SmartEzbench:
 
         # Generate the report, order commits based on the git history
         r = genPerformanceReport(self.log_folder, silentMode = True,
-                                 restrict_to_commits = restrict_to_commits)
+                                 restrict_to_commits = restrict_to_commits,
+                                 result_filter = self.result_filter())
         r.enhance_report([c.sha1 for c in git_history])
         return r
 
+    def rebuild_index(self):
+        index = ReportIndex(self.log_folder)
+        ret = index.rebuild()
+        index.close()
+        if not ret:
+            self.__log(Criticality.EE, "Could not reset the index of the report")
+            return False
+
+        # Re-parse the whole report to re-populate the index
+        report = genPerformanceReport(self.log_folder, silentMode = True)
+        self.__log(Criticality.II,
+                   "Rebuilt the index of the report ({count} commits)".format(count=len(report.commits)))
+        return True
+
+    def compact(self):
+        if self.running_mode() == RunningMode.RUNNING:
+            self.__log(Criticality.EE, "Cannot compact the report while it is running")
+            return False
+        count = compactReport(self.log_folder, silentMode = True)
+        if count < 0:
+            self.__log(Criticality.EE, "Cannot compact the report, it is being written to")
+            return False
+        self.__log(Criticality.II, "Compressed {count} files of the report".format(count=count))
+        return True
+
+    def update_result_store(self):
+        store = ResultStore(self.log_folder)
+        count = store.import_csv()
+        self.__log(Criticality.II,
+                   "Imported {count} files in the result store of the report".format(count=count))
+        return True
+
+    def export_result_store(self):
+        store = ResultStore(self.log_folder)
+        count = store.export_csv()
+        self.__log(Criticality.II,
+                   "Exported {count} files from the result store of the report".format(count=count))
+        return True
+
     def __find_middle_commit__(self, git_history, old, new):
         if not hasattr(self, "__find_middle_commit__cache"):
             self.__find_middle_commit__cache = dict()
@@ -1046,16 +1717,19 @@ class SmartEzbench:
 
     def schedule_enhancements(self, git_history=None, max_variance = 0.025,
                               perf_diff_confidence = 0.95, smallest_perf_change=0.005,
-                              max_run_count = 100, commit_schedule_max = 1):
+                              max_run_count = 100, commit_schedule_max = 1,
+                              change_point_detector = None):
         self.__log(Criticality.II, "Start enhancing the report")
 
         # Generate the report, order commits based on the git history
         if git_history is None:
             git_history = self.git_history()
         commits_rev_order = [c.sha1 for c in git_history]
-        r = genPerformanceReport(self.log_folder, silentMode = True)
+        r = genPerformanceReport(self.log_folder, silentMode = True,
+                                 result_filter = self.result_filter())
         r.enhance_report(commits_rev_order, max_variance, perf_diff_confidence,
-                         smallest_perf_change)
+                         smallest_perf_change, change_point_detector)
+        self.__update_noise_model(r)
 
         # FIXME: Have a proper tracking of state changes to say if this cache
         # is up to date or not. This could be used later to avoid parsing the
@@ -1219,7 +1893,7 @@ class SmartEzbench:
             added = 0
             for t in tasks_sorted:
                 if t[1] == commit:
-                    added += self.__force_benchmark_rounds_unlocked__(t[1], t[2], t[3])
+                    added += self.__force_benchmark_rounds_unlocked__(t[1], t[2], t[3], enhancement = True)
             if added > 0:
                 self.__log(Criticality.II, "{}".format(t[4]))
                 scheduled_commits += 1
@@ -1234,8 +1908,10 @@ class SmartEzbench:
 
 # Report parsing
 class Benchmark:
+    __slots__ = ('full_name', 'prevValue', 'unit_str', '__dict__')
+
     def __init__(self, full_name, unit="undefined"):
-        self.full_name = full_name
+        self.full_name = sys.intern(full_name)
         self.prevValue = -1
         self.unit_str = unit
 
@@ -1268,6 +1944,8 @@ class Benchmark:
         return name
 
 class BenchSubTest:
+    __slots__ = ('benchmark', 'subtest')
+
     def __init__(self, benchmark, subtest):
         self.benchmark = benchmark
         self.subtest = subtest
@@ -1275,11 +1953,17 @@ class BenchSubTest:
     def __str__(self):
         return Benchmark.partial_name(self.benchmark.full_name, [self.subtest])
 
+# numpy.trapz got renamed to numpy.trapezoid in NumPy 2.0
+numpy_trapezoid = getattr(numpy, "trapezoid", None) or getattr(numpy, "trapz")
+
 class Metric:
+    __slots__ = ('name', 'unit', 'data', 'result', 'data_raw_file', '_cache_result')
+
+    # data is a list of (time, value) tuples, stored as a Nx2 array
     def __init__(self, name, unit, data, result, data_raw_file):
-        self.name = name
-        self.unit = unit
-        self.data = data
+        self.name = sys.intern(name)
+        self.unit = sys.intern(unit) if unit is not None else None
+        self.data = numpy.array(data, dtype=float64).reshape(-1, 2)
         self.result = result
         self.data_raw_file = data_raw_file
 
@@ -1287,17 +1971,25 @@ class Metric:
 
     def average(self):
         if self._cache_result is None:
-            s = sum(row[1] for row in self.data)
+            s = float(self.data[:, 1].sum())
             self._cache_result = s / len(self.data)
         return self._cache_result
 
     def exec_time(self):
         if len(self.data) > 0:
-            return self.data[-1][0]
+            return float(self.data[-1][0])
         else:
             return 0
 
+    def integral(self):
+        # Integral of the values over time, using the trapezoidal rule
+        if len(self.data) < 2:
+            return 0
+        return float(numpy_trapezoid(self.data[:, 1], self.data[:, 0]))
+
 class ImgvalFrameResult:
+    __slots__ = ('frameid', 'frame_hash', 'ref_hash', 'rmse')
+
     def __init__(self, frameid, frame_hash, ref_hash, rmse):
         self.frameid = frameid
         self.frame_hash = frame_hash
@@ -1305,29 +1997,44 @@ class ImgvalFrameResult:
         self.rmse = rmse
 
 class ImgvalRun:
-    def __init__(self, runfilepath):
+    def __init__(self, runfilepath, rows = None):
         self.frames = dict()
-        with open(runfilepath, 'rt') as f:
-            for line in f.readlines():
-                fields = line.split(',')
-                if len(fields) == 4:
-                    self.frames[fields[0]] = ImgvalFrameResult(fields[0], fields[1],
-                                                               fields[2], fields[3])
-                else:
-                    print("ERROR: ImgvalRun: Invalid format for file '{}'".format(runfilepath))
+        if rows is None:
+            rows = readImgvalRun(runfilepath)
+        for fields in rows:
+            self.frames[fields[0]] = ImgvalFrameResult(fields[0], fields[1],
+                                                       fields[2], fields[3])
 
 class BenchResult:
+    __slots__ = ('commit', 'benchmark', 'data_raw_file', 'data', 'unit_results', 'unit_str',
+                 'more_is_better', 'test_type', '_runs', '_metrics', '_env_files', '_run_files',
+                 '_index', '_store', '_cache_result', '_cache_mean', '_cache_std',
+                 'noise_sigma', 'dropped', '__dict__')
+
     def __init__(self, commit, benchmark, data_raw_file):
         self.commit = commit
         self.benchmark = benchmark
         self.data_raw_file = data_raw_file
         self.data = []
-        self.runs = []
-        self.metrics = dict()
         self.unit_results = dict()
-        self.env_files = []
         self.unit_str = None
 
+        # runs, metrics and env_files are loaded on first access when the
+        # files they come from are set using set_run_files()
+        self._runs = []
+        self._metrics = dict()
+        self._env_files = []
+        self._run_files = None
+        self._index = None
+        self._store = None
+
+        # standard deviation of the benchmark relative to its mean, as learnt
+        # from the history by NoiseDB, or None if unknown
+        self.noise_sigma = None
+
+        # samples and runs dropped by a ResultFilter, if applied
+        self.dropped = None
+
         # cached data
         self._cache_result = None
         self._cache_mean = None
@@ -1338,6 +2045,115 @@ class BenchResult:
         self._cache_mean = None
         self._cache_std = None
 
+        # Drop the lazily-loaded data, it will be re-read on the next access
+        if self._run_files is not None:
+            self._runs = None
+            self._metrics = None
+            self._env_files = None
+
+    # run_files is a list of (run file, metric files, env file or None) tuples
+    def set_run_files(self, run_files, index, store = None):
+        self._run_files = run_files
+        self._index = index
+        self._store = store
+        self._runs = None
+        self._metrics = None
+        self._env_files = None
+
+    def __load_runs(self):
+        if self._run_files is None or self._runs is not None:
+            return
+
+        # Fill the lists aside and publish them at once, so as concurrent
+        # readers never see partially-loaded runs
+        runs = []
+        metrics = dict()
+        env_files = []
+
+        run_parsers = { "bench": readCsv, "unit": readUnitRun, "imgval": readImgvalRun }
+        if self.test_type not in run_parsers:
+            print("WARNING: Ignoring results because the type '{}' is unknown".format(self.test_type))
+            self._metrics = dict()
+            self._env_files = []
+            self._runs = []
+            return
+
+        # Get the runs from the result store, if possible, and the index
+        contents = dict()
+        files = []
+        for runFile, metric_files, envFile in self._run_files:
+            if self.test_type == "bench" and self._store is not None:
+                content = self._store.load(runFile)
+                if content is not None:
+                    contents[runFile] = (True, content)
+            if runFile not in contents:
+                files.append((runFile, run_parsers[self.test_type]))
+            for metric_file in metric_files:
+                files.append((metric_file, readMetricsCsv))
+        contents.update(zip([f for f, p in files], self._index.load_files(files)))
+
+        for runFile, metric_files, envFile in self._run_files:
+            success, content = contents[runFile]
+            if not success:
+                print("WARNING: Cannot read the run file '{}': {}".format(runFile, content))
+                continue
+
+            if self.test_type == "bench":
+                data, unit, more_is_better = content
+                if len(data) > 0:
+                    # Add the FPS readings of the run
+                    runs.append(data)
+            elif self.test_type == "unit":
+                # Unit test suites have a lot of tests with few different
+                # statuses, share the strings between all the runs
+                runs.append(dict([(sys.intern(test), sys.intern(status))
+                                  for test, status in content.items()]))
+            elif self.test_type == "imgval":
+                runs.append(ImgvalRun(runFile, content))
+
+            # Add the environment file
+            env_files.append(envFile)
+
+            # Look for metrics!
+            for metric_file in metric_files:
+                success, values = contents[metric_file]
+                if success:
+                    self.add_metrics(metric_file, values, metrics)
+
+        self._metrics = metrics
+        self._env_files = env_files
+        self._runs = runs
+
+    @property
+    def runs(self):
+        self.__load_runs()
+        return self._runs
+
+    @runs.setter
+    def runs(self, runs):
+        self.__load_runs()
+        self._runs = runs
+
+    @property
+    def metrics(self):
+        self.__load_runs()
+        return self._metrics
+
+    @metrics.setter
+    def metrics(self, metrics):
+        self.__load_runs()
+        self._metrics = metrics
+
+    @property
+    def env_files(self):
+        self.__load_runs()
+        return self._env_files
+
+    @env_files.setter
+    def env_files(self, env_files):
+        self.__load_runs()
+        self._env_files = env_files
+
     def result(self, metric = "default"):
         if self._cache_result is None:
             self._cache_result = dict()
@@ -1376,6 +2192,36 @@ class BenchResult:
                 self._cache_mean = (value, (value, value))
                 self._cache_std = (float("inf"), (float("inf"), float("inf")))
 
+    @staticmethod
+    def compute_stats(results, alpha = 0.95):
+        # Compute the statistics of many results at once, exactly like
+        # __compute_stats__ would. The results are grouped by sample count to
+        # get dense arrays which scipy processes in one call per group.
+        groups = dict()
+        for result in results:
+            if result._cache_mean is None or result._cache_std is None:
+                if len(result.data) > 1:
+                    groups.setdefault(len(result.data), []).append(result)
+
+        for n, group in groups.items():
+            x = numpy.array([result.data for result in group], dtype=float64)
+            xbar = x.mean(axis=1)
+            C = x.var(axis=1)
+
+            # Same distributions as stats.mvsdist()
+            if n > 1000:
+                mdist = stats.norm(loc=xbar, scale=numpy.sqrt(C / n))
+                sdist = stats.norm(loc=numpy.sqrt(C), scale=numpy.sqrt(C / (2. * n)))
+            else:
+                mdist = stats.t(n - 1, loc=xbar, scale=numpy.sqrt(C / (n - 1)))
+                sdist = stats.gengamma((n - 1) / 2., -2, scale=numpy.sqrt(n * C / 2.))
+
+            m_stat, (m_min, m_max) = mdist.mean(), mdist.interval(alpha)
+            s_stat, (s_min, s_max) = sdist.mean(), sdist.interval(alpha)
+            for i, result in enumerate(group):
+                result._cache_mean = (m_stat[i], (m_min[i], m_max[i]))
+                result._cache_std = (s_stat[i], (s_min[i], s_max[i]))
+
     def margin(self):
         self.__compute_stats__()
         if self._cache_mean[0] > 0:
@@ -1394,8 +2240,10 @@ class BenchResult:
         wanted_samples = 2
 
         if wanted_margin is not None:
-            # TODO: Get sigma from the benchmark instead!
-            sigma = (self._cache_std[1][1] - self._cache_std[1][0]) / 2
+            if self.noise_sigma is not None:
+                sigma = self.noise_sigma * self._cache_mean[0]
+            else:
+                sigma = (self._cache_std[1][1] - self._cache_std[1][0]) / 2
             target_margin = self._cache_mean[0] * wanted_margin
             wanted_samples = math.ceil(self.__samples_needed__(sigma,
                                                                target_margin,
@@ -1403,41 +2251,17 @@ class BenchResult:
 
         return margin, wanted_samples
 
-    def add_metrics(self, metric_file):
-        values = dict()
-        with open(metric_file, 'rt') as f:
-
-            # Do not try to open files bigger than 1MB
-            if os.fstat(f.fileno()).st_size > 1e6:
-                raise ValueError('The metric file is too big (> 1MB)')
-
-            reader = csv.DictReader(f)
-            try:
-                # Collect stats about each metrics
-                for row in reader:
-                    if row is None or len(row) == 0:
-                        continue
-
-                    # Verify that all the fields are present or abort...
-                    allValuesOK = True
-                    for field in values:
-                        if row[field] is None:
-                            allValuesOK = False
-                            break
-                    if not allValuesOK:
-                        break
-
-                    for field in row:
-                        if field not in values:
-                            values[field] = list()
-                        values[field].append(float(row[field]))
-            except csv.Error as e:
-                sys.stderr.write('file %s, line %d: %s\n' % (filepath, reader.line_num, e))
-                return [], "none"
+    # Add the metrics found in a metric file to metrics, or to self.metrics if
+    # it is None
+    def add_metrics(self, metric_file, values = None, metrics = None):
+        if metrics is None:
+            metrics = self.metrics
+        if values is None:
+            values = readMetricsCsv(metric_file)
 
         # Find the time values and store them aside after converting them to seconds
         time_unit_re = re.compile(r'^time \((.+)\)$')
-        time = list()
+        time = numpy.zeros(0)
         for field in values:
             m = time_unit_re.match(field)
             if m is not None:
@@ -1453,8 +2277,7 @@ class BenchResult:
                     factor = 1e-9
                 else:
                     print("unknown time unit '{}'".format(unit))
-                for v in values[field]:
-                    time.append(v * factor)
+                time = numpy.asarray(values[field], dtype=float64) * factor
 
         # Create the metrics
         metric_name_re = re.compile(r'^(.+) \((.+)\)$')
@@ -1470,41 +2293,53 @@ class BenchResult:
                 continue
 
             # Make sure that the metric does not already exist for this result
-            if metric_name not in self.metrics:
-                self.metrics[metric_name] = list()
+            if metric_name not in metrics:
+                metrics[metric_name] = list()
 
             metric = Metric(metric_name, unit, [], self, metric_file)
-            for v in range(0, len(values[field])):
-                metric.data.append((time[v] - time[0], values[field][v]))
-            self.metrics[metric_name].append(metric)
+            if len(values[field]) > 0:
+                count = len(values[field])
+                if len(time) >= count:
+                    t = time[:count] - time[0]
+                else:
+                    t = numpy.zeros(count)
+                metric.data = column_stack((t, numpy.asarray(values[field], dtype=float64)))
+            metrics[metric_name].append(metric)
 
             # Try to add more metrics by combining them
             if unit == "W" or unit == "J":
                 power_value = None
                 if unit == "W":
                     if metric.exec_time() > 0:
+                        # Integrate the power over time, as the samples may
+                        # not be evenly spaced, and get the average power
                         energy_name = metric_name + ":energy"
-                        power_value =  metric.average()
-                        value = power_value * metric.exec_time()
+                        value = metric.integral()
+                        power_value = value / metric.exec_time()
                         energy_metric = Metric(energy_name, "J", [(metric.exec_time(), value)], self, metric_file)
-                        self.metrics[energy_name] = [energy_metric]
+                        metrics[energy_name] = [energy_metric]
                 elif unit == "J":
                     if metric.exec_time() > 0:
                         energy_name = metric_name + ":power"
                         power_value = metric.average() / metric.exec_time()
                         power_metric = Metric(energy_name, "W", [(metric.exec_time(), power_value)], self, metric_file)
-                        self.metrics[energy_name] = [power_metric]
+                        metrics[energy_name] = [power_metric]
 
                 if power_value is not None and self.unit_str == "FPS":
                     efficiency_name = metric_name + ":efficiency"
                     value = self.result()[0] / power_value
                     unit = "{}/W".format(self.unit_str)
                     efficiency_metric = Metric(efficiency_name, unit, [(metric.exec_time(), value)], self, metric_file)
-                    self.metrics[efficiency_name] = [efficiency_metric]
+                    metrics[efficiency_name] = [efficiency_metric]
 
 
 class Commit:
-    def __init__(self, sha1, full_name, compile_log, patch, label):
+    __slots__ = ('sha1', 'full_name', 'compile_log', 'patch', 'results', 'geom_mean_cache',
+                 'label', 'full_sha1', 'author', 'commiter', 'author_date', 'commit_date',
+                 'title', 'commit_log', 'signed_of_by', 'reviewed_by', 'tested_by', 'bugs',
+                 'compil_exit_code', 'git_distance_head', 'same_build_as', '__dict__')
+
+    def __init__(self, sha1, full_name, compile_log, patch, label, index = None):
         self.sha1 = sha1
         self.full_name = full_name
         self.compile_log = compile_log
@@ -1525,62 +2360,39 @@ class Commit:
         self.reviewed_by = set()
         self.tested_by = set()
         self.bugs = set()
-        try:
-            with open(patch, 'r') as f:
-                log_started = False
-                fdo_bug_re = re.compile('fdo#(\d+)')
-                basefdourl = "https://bugs.freedesktop.org/show_bug.cgi?id="
-                for line in f:
-                    line = line.strip()
-                    if line == "---": # Detect the end of the header
-                        break
-                    elif line.startswith('commit'):
-                        self.full_sha1 = line.split(' ')[1]
-                    elif line.startswith('Author:'):
-                        self.author = line[12:]
-                    elif line.startswith('AuthorDate: '):
-                        self.author_date = datetime.fromtimestamp(mktime_tz(parsedate_tz(line[12:])))
-                    elif line.startswith('Commit:'):
-                        self.commiter = line[12:]
-                    elif line.startswith('CommitDate: '):
-                        self.commit_date = datetime.fromtimestamp(mktime_tz(parsedate_tz(line[12:])))
-                    elif line == '':
-                        # The commit log is about to start
-                        log_started = True
-                    elif log_started:
-                        if self.title == '':
-                            self.title = line
-                        else:
-                            self.commit_log += line + '\n'
-                            if line.startswith('Reviewed-by: '):
-                                self.reviewed_by |= {line[13:]}
-                            elif line.startswith('Signed-off-by: '):
-                                self.signed_of_by |= {line[15:]}
-                            elif line.startswith('Tested-by: '):
-                                self.tested_by |= {line[11:]}
-                            elif line.startswith('Bugzilla: '):
-                                self.bugs |= {line[10:]}
-                            elif line.startswith('Fixes: '):
-                                self.bugs |= {line[7:]}
-                            else:
-                                fdo_bug_m = fdo_bug_re.search(line)
-                                if fdo_bug_m is not None:
-                                    bugid = fdo_bug_m.groups()[0]
-                                    self.bugs |= {basefdourl + bugid}
-        except Exception:
-            pass
+
+        # sha1 of the commit whose build got re-used because both commits
+        # produce identical binaries, see readIdenticalBuilds()
+        self.same_build_as = None
+
+        if index is None:
+            index = ReportIndex(os.getcwd(), persistent = False)
+        header, exit_code = index.load_commit(sha1, patch, compile_log)
+        if header is not None:
+            if header['full_sha1'] is not None:
+                self.full_sha1 = header['full_sha1']
+            if header['author'] is not None:
+                self.author = sys.intern(header['author'])
+            if header['commiter'] is not None:
+                self.commiter = sys.intern(header['commiter'])
+            if header['author_date'] is not None:
+                self.author_date = datetime.fromtimestamp(header['author_date'])
+            if header['commit_date'] is not None:
+                self.commit_date = datetime.fromtimestamp(header['commit_date'])
+            self.title = header['title']
+            self.commit_log = header['commit_log']
+            self.signed_of_by = set([sys.intern(p) for p in header['signed_of_by']])
+            self.reviewed_by = set([sys.intern(p) for p in header['reviewed_by']])
+            self.tested_by = set([sys.intern(p) for p in header['tested_by']])
+            self.bugs = set(header['bugs'])
 
         # Look for the exit code
         self.compil_exit_code = EzbenchExitCode.UNKNOWN
-        try:
-            with open(compile_log, 'r') as f:
-                for line in f:
-                    pass
-                # Line contains the last line of the report, parse it
-                if line.startswith("Exiting with error code "):
-                    self.compil_exit_code = EzbenchExitCode(int(line[24:]))
-        except Exception:
-            pass
+        if exit_code is not None:
+            try:
+                self.compil_exit_code = EzbenchExitCode(exit_code)
+            except ValueError:
+                pass
 
     def build_broken(self):
         return (self.compil_exit_code.value >= EzbenchExitCode.COMP_DEP_UNK_ERROR.value and
@@ -1606,6 +2418,8 @@ class Commit:
         return value
 
 class EventCommitRange:
+    __slots__ = ('old', 'new')
+
     def __init__(self, old, new = None):
         self.old = old
         if new is None:
@@ -1644,6 +2458,8 @@ class EventCommitRange:
         float("inf")
 
 class EventBuildBroken:
+    __slots__ = ('commit_range',)
+
     def __init__(self, commit_range):
         self.commit_range = commit_range
 
@@ -1651,6 +2467,8 @@ class EventBuildBroken:
         return "{} broke the build".format(self.commit_range)
 
 class EventBuildFixed:
+    __slots__ = ('broken_commit_range', 'fixed_commit_range')
+
     def __init__(self, broken_commit_range, fixed_commit_range):
         self.broken_commit_range = broken_commit_range
         self.fixed_commit_range = fixed_commit_range
@@ -1698,6 +2516,8 @@ class EventBuildFixed:
         return "{} ({})".format(main, parenthesis)
 
 class EventPerfChange:
+    __slots__ = ('benchmark', 'commit_range', 'old_perf', 'new_perf', 'confidence')
+
     def __init__(self, benchmark, commit_range, old_perf, new_perf, confidence):
         self.benchmark = benchmark
         self.commit_range = commit_range
@@ -1720,6 +2540,8 @@ class EventPerfChange:
                           self.confidence)
 
 class EventInsufficientSignificance:
+    __slots__ = ('result', 'wanted_margin')
+
     def __init__(self, result, wanted_margin):
         self.result = result
         self.wanted_margin = wanted_margin
@@ -1737,6 +2559,8 @@ class EventInsufficientSignificance:
                           margin * 100, self.wanted_margin * 100, wanted_n)
 
 class EventUnitResultChange:
+    __slots__ = ('bench_sub_test', 'commit_range', 'old_status', 'new_status')
+
     def __init__(self, bench_sub_test, commit_range, old_status, new_status):
         self.bench_sub_test = bench_sub_test
         self.commit_range = commit_range
@@ -1749,6 +2573,8 @@ class EventUnitResultChange:
                           self.old_status, self.new_status)
 
 class EventUnitResultUnstable:
+    __slots__ = ('bench_sub_test', 'commit', 'prev_status', 'new_status')
+
     def __init__(self, bench_sub_test, commit, prev_status, new_status):
         self.bench_sub_test = bench_sub_test
         self.commit = commit
@@ -1761,6 +2587,8 @@ class EventUnitResultUnstable:
                           self.prev_status, self.new_status)
 
 class EventRenderingChange:
+    __slots__ = ('benchmark', 'commit_range', 'old_result', 'new_result', 'frameid')
+
     def __init__(self, benchmark, commit_range, old_result, new_result):
         if old_result.frameid != new_result.frameid:
             raise ValueError("The frame ID of the old and new result do not match")
@@ -1797,129 +2625,727 @@ class Report:
                 return result
         return None
 
+    # The performance changes are found by comparing every result with the
+    # previous one, unless a ChangePointDetector is given to look for them in
+    # the whole history of every benchmark
     def enhance_report(self, commits_rev_order, max_variance = 0.025,
-                       perf_diff_confidence = 0.95, smallest_perf_change=0.005):
+                       perf_diff_confidence = 0.95, smallest_perf_change=0.005,
+                       change_point_detector = None):
         if len(commits_rev_order) > 0:
             # Get rid of the commits that are not in the commits list
-            to_del = list()
-            for c in range(0, len(self.commits)):
-                if self.commits[c].sha1 not in commits_rev_order:
-                    to_del.append(c)
-            for v in reversed(to_del):
-                del self.commits[v]
+            git_distance_head = dict()
+            for i in range(0, len(commits_rev_order)):
+                git_distance_head.setdefault(commits_rev_order[i], i)
+            self.commits[:] = [c for c in self.commits if c.sha1 in git_distance_head]
 
             # Add the index inside the commit
             for commit in self.commits:
-                commit.git_distance_head = commits_rev_order.index(commit.sha1)
+                commit.git_distance_head = git_distance_head[commit.sha1]
 
             # Sort the remaining commits
             self.commits.sort(key=lambda commit: len(commits_rev_order) - commit.git_distance_head)
 
         # Generate events
-        commit_prev = None
-        bench_prev = dict()
-        unittest_prev = dict()
-        build_broken_since = None
+        detector = EventDetector(len(commits_rev_order) > 0, max_variance,
+                                 perf_diff_confidence, smallest_perf_change,
+                                 change_point_detector is None)
+        detector.prepare(self.commits)
         for commit in self.commits:
-            commit_range = EventCommitRange(commit_prev, commit)
-
-            # Look for compilation errors
-            if commit.build_broken() and build_broken_since is None:
-                self.events.append(EventBuildBroken(commit_range))
-                build_broken_since = EventCommitRange(commit_prev, commit)
-            elif not commit.build_broken() and build_broken_since is not None:
-                self.events.append(EventBuildFixed(build_broken_since, commit_range))
-                build_broken_since = None
-
-            # Look for performance regressions
+            self.events.extend(detector.add_commit(commit))
+
+        if change_point_detector is not None and len(commits_rev_order) > 0:
+            self.events.extend(change_point_detector.events(self.commits, perf_diff_confidence,
+                                                            smallest_perf_change))
+
+def ttestResultPairs(pairs):
+    # Returns the p-values of stats.ttest_ind() for the (old, new) pairs of
+    # results. Pairs are grouped by sample counts to be tested in one call.
+    pvalues = [None] * len(pairs)
+    groups = dict()
+    for i, (old, new) in enumerate(pairs):
+        groups.setdefault((len(old.data), len(new.data)), []).append(i)
+
+    for (n_old, n_new), group in groups.items():
+        if n_old == 0 or n_new == 0:
+            continue
+        old = numpy.array([pairs[i][0].data for i in group], dtype=float64)
+        new = numpy.array([pairs[i][1].data for i in group], dtype=float64)
+        with numpy.errstate(all='ignore'):
+            t, p = stats.ttest_ind(old, new, axis=1, equal_var=True)
+        for i, p_value in zip(group, numpy.atleast_1d(p)):
+            pvalues[i] = p_value
+
+    return pvalues
+
+class UnitResultsTable:
+    # Unit test results of a benchmark stored as a matrix of statuses, the
+    # subtests and statuses being interned as integers: the subtests are the
+    # columns and the statuses are stored as uint8, 0 meaning that the subtest
+    # was not run. The statuses are interned per table, which is only used by
+    # one EventDetector at a time. The statuses of the last commit having
+    # results for every subtest are kept to be compared with the next commit.
+    def __init__(self, benchmark):
+        self.benchmark = benchmark
+        self.names = []
+        self.ids = dict()
+        self.statuses = [None]
+        self.status_ids = dict()
+
+        # Statuses of the last results, and the commits they come from
+        self.prev_status = numpy.zeros(0, dtype=numpy.uint8)
+        self.prev_commit = numpy.zeros(0, dtype=numpy.intp)
+        self.commits = []
+
+    def status_id(self, status):
+        if status not in self.status_ids:
+            if len(self.statuses) > 255:
+                raise ValueError("Too many different unit test statuses")
+            self.status_ids[status] = len(self.statuses)
+            self.statuses.append(status)
+        return self.status_ids[status]
+
+    def __columns(self, tests):
+        for test in tests:
+            if test not in self.ids:
+                self.ids[test] = len(self.names)
+                self.names.append(test)
+        return numpy.fromiter(map(self.ids.__getitem__, tests), dtype=numpy.intp, count=len(tests))
+
+    # Returns the matrix of statuses of the runs (runs x subtests) and, for
+    # every run, the columns of its subtests in the order of the run
+    def matrix(self, runs):
+        columns = []
+        codes = []
+        for run in runs:
+            columns.append(self.__columns(list(run.keys())))
+            for status in set(run.values()):
+                self.status_id(status)
+            codes.append(numpy.fromiter(map(self.status_ids.__getitem__, run.values()),
+                                        dtype=numpy.uint8, count=len(run)))
+
+        m = numpy.zeros((len(runs), len(self.names)), dtype=numpy.uint8)
+        for r in range(0, len(runs)):
+            m[r, columns[r]] = codes[r]
+        return m, columns
+
+    def add_result(self, result, commit, with_history):
+        # Returns the EventUnitResultUnstable and EventUnitResultChange events
+        # of a result, and sets its unit_results to the status of the last
+        # run of every subtest
+        events = []
+        m, columns = self.matrix(result.runs)
+        runs, tests = m.shape
+        if runs == 0:
+            return events
+        all_tests = numpy.arange(tests)
+
+        # Status of the previous run of every subtest, for every run
+        last = numpy.maximum.accumulate(numpy.where(m != 0, numpy.arange(runs)[:, None], -1), axis=0)
+        prev_run = numpy.vstack((numpy.full((1, tests), -1), last[:-1]))
+        prev = numpy.where(prev_run >= 0, m[prev_run.clip(0), all_tests], 0)
+        unstable = (m != 0) & (prev != 0) & (m != prev)
+        for r in numpy.flatnonzero(unstable.any(axis=1)):
+            for c in columns[r][unstable[r, columns[r]]]:
+                events.append(EventUnitResultUnstable(BenchSubTest(result.benchmark, self.names[c]),
+                                                      commit, self.statuses[prev[r, c]],
+                                                      self.statuses[m[r, c]]))
+
+        # Last status of every subtest, in the order they appear in the runs
+        status = numpy.where(last[-1] >= 0, m[last[-1].clip(0), all_tests], 0)
+        order = numpy.concatenate(columns)
+        order = order[numpy.sort(numpy.unique(order, return_index=True)[1])]
+        for test, code in zip([self.names[c] for c in order], status[order]):
+            result.unit_results[test] = self.statuses[code]
+
+        # Compare with the previous commits
+        if len(self.prev_status) < tests:
+            self.prev_status = numpy.concatenate((self.prev_status,
+                                                  numpy.zeros(tests - len(self.prev_status), dtype=numpy.uint8)))
+            self.prev_commit = numpy.concatenate((self.prev_commit,
+                                                  numpy.zeros(tests - len(self.prev_commit), dtype=numpy.intp)))
+        if with_history:
+            changed = (status != 0) & (self.prev_status != 0) & (status != self.prev_status)
+            for c in order[changed[order]]:
+                commit_range = EventCommitRange(self.commits[self.prev_commit[c]], commit)
+                events.append(EventUnitResultChange(BenchSubTest(result.benchmark, self.names[c]),
+                                                    commit_range, self.statuses[self.prev_status[c]],
+                                                    self.statuses[status[c]]))
+
+            has_status = status != 0
+            self.prev_status[has_status] = status[has_status]
+            self.prev_commit[has_status] = len(self.commits)
+            self.commits.append(commit)
+
+        return events
+
+class EventDetector:
+    # Generate the events of a report one commit at a time, the commits being
+    # added from the oldest to the newest. Only the last result of every
+    # benchmark and the last status of every unit test (see UnitResultsTable)
+    # are kept to be compared with the next commits. Without a git history (with_history == False),
+    # only the events that do not need to compare commits are generated. The
+    # performance changes are left to a ChangePointDetector when perf_changes
+    # is False.
+    def __init__(self, with_history, max_variance = 0.025,
+                 perf_diff_confidence = 0.95, smallest_perf_change=0.005,
+                 perf_changes = True):
+        self.with_history = with_history
+        self.perf_changes = perf_changes
+        self.max_variance = max_variance
+        self.perf_diff_confidence = perf_diff_confidence
+        self.smallest_perf_change = smallest_perf_change
+
+        self.commit_prev = None
+        self.bench_prev = dict()
+        self.unittest_prev = dict()
+        self.build_broken_since = None
+        self._pvalues = dict()
+
+    # Compute the statistics needed by the next calls to add_commit() for the
+    # commits in a handful of vectorized calls instead of one call per result.
+    # The commits must be given in the order they will be added.
+    def prepare(self, commits):
+        results = []
+        pairs = []
+        bench_prev = dict([(bench, result) for bench, result in self.bench_prev.items()
+                           if result.test_type == "bench"])
+        for commit in commits:
             for result in commit.results:
+                if result.test_type == "imgval":
+                    bench_prev.pop(result.benchmark.full_name, None)
+                if result.test_type != "bench":
+                    continue
+                results.append(result)
                 bench = result.benchmark.full_name
-                bench_unit = result.benchmark.unit_str
+                if self.with_history and self.perf_changes and bench in bench_prev:
+                    pairs.append((bench_prev[bench], result))
+                bench_prev[bench] = result
+
+        BenchResult.compute_stats(results)
+        for (old, new), p in zip(pairs, ttestResultPairs(pairs)):
+            self._pvalues[(id(old), id(new))] = (old, new, p)
+
+    def add_commit(self, commit):
+        events = []
+        commit_range = EventCommitRange(self.commit_prev, commit)
+
+        # Look for compilation errors
+        if commit.build_broken() and self.build_broken_since is None:
+            events.append(EventBuildBroken(commit_range))
+            self.build_broken_since = EventCommitRange(self.commit_prev, commit)
+        elif not commit.build_broken() and self.build_broken_since is not None:
+            events.append(EventBuildFixed(self.build_broken_since, commit_range))
+            self.build_broken_since = None
+
+        bench_prev = self.bench_prev
+        unittest_prev = self.unittest_prev
+
+        # Look for performance regressions
+        for result in commit.results:
+            bench = result.benchmark.full_name
+            bench_unit = result.benchmark.unit_str
 
-                if result.test_type == "bench":
-                    perf = result.result()[0]
+            if result.test_type == "bench":
+                perf = result.result()[0]
 
-                    if result.margin() > max_variance:
-                        self.events.append(EventInsufficientSignificance(result, max_variance))
+                if result.margin() > self.max_variance:
+                    events.append(EventInsufficientSignificance(result, self.max_variance))
 
-                    # All the other events require a git history which we do not have, continue...
-                    if len(commits_rev_order) == 0:
-                        continue
+                # All the other events require a git history which we do not have, continue...
+                if not self.with_history:
+                    continue
 
-                    if bench in bench_prev:
-                        # We got previous perf results, compare!
+                if bench in bench_prev and self.perf_changes:
+                    # We got previous perf results, compare!
+                    old, new, p = self._pvalues.pop((id(bench_prev[bench]), id(result)),
+                                                    (None, None, None))
+                    if p is None or old is not bench_prev[bench] or new is not result:
                         t, p = stats.ttest_ind(bench_prev[bench].data, result.data, equal_var=True)
-                        perf = result.result()[0]
-                        old_perf = bench_prev[bench].result()[0]
-                        if old_perf > 0:
-                            diff = abs(perf - old_perf) / old_perf
-                        else:
-                            diff = float('inf')
-
-                        # If we are not $perf_diff_confidence sure that this is the
-                        # same normal distribution, say that the performance changed
-                        confidence = 1 - p
-                        if confidence >= perf_diff_confidence and diff >= smallest_perf_change:
-                            commit_range = EventCommitRange(bench_prev[bench].commit, commit)
-                            self.events.append(EventPerfChange(result.benchmark,
-                                                            commit_range,
-                                                            old_perf, perf, confidence))
-                    bench_prev[bench] = result
-                elif result.test_type == "unit":
-                    # Aggregate the results
-                    for run in result.runs:
-                        for test in run:
-                            subtest = BenchSubTest(result.benchmark, test)
-                            if (test in result.unit_results and
-                                result.unit_results[test] != run[test]):
-                                self.events.append(EventUnitResultUnstable(subtest,
-                                                                           commit,
-                                                                           result.unit_results[test],
-                                                                           run[test]))
-                            result.unit_results[test] = run[test]
-
-                    # All the other events require a git history which we do not have, continue...
-                    if len(commits_rev_order) == 0:
-                        continue
+                    perf = result.result()[0]
+                    old_perf = bench_prev[bench].result()[0]
+                    if old_perf > 0:
+                        diff = abs(perf - old_perf) / old_perf
+                    else:
+                        diff = float('inf')
+
+                    # If we are not $perf_diff_confidence sure that this is the
+                    # same normal distribution, say that the performance changed
+                    confidence = 1 - p
+                    if confidence >= self.perf_diff_confidence and diff >= self.smallest_perf_change:
+                        commit_range = EventCommitRange(bench_prev[bench].commit, commit)
+                        events.append(EventPerfChange(result.benchmark,
+                                                      commit_range,
+                                                      old_perf, perf, confidence))
+                bench_prev[bench] = result
+            elif result.test_type == "unit":
+                # Find the unstable results and the changes with the previous commits
+                if bench not in unittest_prev:
+                    unittest_prev[bench] = UnitResultsTable(result.benchmark)
+                events.extend(unittest_prev[bench].add_result(result, commit, self.with_history))
+            elif result.test_type == "imgval":
+                # TODO: Aggregate the results if we ever want to verify the
+                # stability of the rendering
+
+                if bench in bench_prev:
+                    commit_range = EventCommitRange(bench_prev[bench].commit, commit)
+                    for frame in result.runs[0].frames:
+                        frame_prev = bench_prev[bench].runs[0].frames[frame]
+                        frame = result.runs[0].frames[frame]
+
+                        if frame_prev.frame_hash != frame.frame_hash:
+                            event = EventRenderingChange(result.benchmark, commit_range,
+                                                         frame_prev, frame)
+                            events.append(event)
+                bench_prev[bench] = result
+            else:
+                print("WARNING: enhance_report: unknown test type {}".format(result.test_type))
+
+        self.commit_prev = commit
+        return events
+
+class ChangePointDetector(abc.ABC):
+    # Find the performance changes in the whole history of every benchmark,
+    # instead of comparing every result with the previous one. Every commit
+    # having results is a point of the series of the benchmark, weighted by
+    # the inverse of the variance of its mean. The variance accounts for the
+    # noise of the runs (pooled variance of the samples of the commits) and
+    # for the noise between commits (estimated from the differences between
+    # consecutive commits, which is robust to the changes themselves).
+    #
+    # Subclasses implement change_points(), which segments a series using
+    # the weighted sum of squares as a cost, and a penalty of
+    # $penalty * log(points) per change point.
+    def __init__(self, penalty = 3.0, min_size = 1):
+        self.penalty = penalty
+        self.min_size = min_size
+
+    # cumsums is the (weights, weighted values, weighted squared values)
+    # tuple of cumulative sums, starting with 0. Returns the sorted list of
+    # the indexes where a new segment starts.
+    @abc.abstractmethod
+    def change_points(self, cumsums, beta):
+        pass
+
+    @staticmethod
+    def _cost(cumsums, start, end):
+        # Weighted sum of squares of the segments [start, end)
+        w, wx, wxx = cumsums
+        sw = w[end] - w[start]
+        swx = wx[end] - wx[start]
+        with numpy.errstate(all='ignore'):
+            return numpy.where(sw > 0, (wxx[end] - wxx[start]) - swx * swx / sw, 0)
+
+    def __series(self, commits):
+        # Returns the series of every benchmark as a list of results and the
+        # (count, sum, sum of squares) arrays of their samples
+        series = dict()
+        for commit in commits:
+            for result in commit.results:
+                if result.test_type == "bench" and len(result.data) > 0:
+                    series.setdefault(result.benchmark, []).append(result)
+
+        for benchmark, results in series.items():
+            n = numpy.array([len(r.data) for r in results], dtype=float64)
+            s = numpy.array([numpy.sum(r.data) for r in results], dtype=float64)
+            ss = numpy.array([numpy.dot(r.data, r.data) for r in results], dtype=float64)
+            yield benchmark, results, n, s, ss
+
+    def __weights(self, n, s, ss):
+        means = s / n
+        scale = abs(numpy.mean(means)) * 1e-6 + 1e-12
+
+        # Noise of the runs
+        dof = numpy.sum(n - 1)
+        var_runs = numpy.sum(ss - s * s / n) / dof if dof > 0 else 0
+
+        # Noise between the commits, from the median absolute deviation of
+        # the differences between consecutive commits
+        var_mean = var_runs / n
+        if len(means) > 2:
+            d = numpy.diff(means)
+            var_commits = (1.4826 * numpy.median(numpy.abs(d - numpy.median(d)))) ** 2 / 2
+            var_mean = var_mean + numpy.maximum(0, var_commits - numpy.median(var_mean))
+
+        return 1 / numpy.maximum(var_mean, scale * scale)
+
+    # Returns, for every change point of the series, the index of the change
+    # point, the old and new performance, and the confidence in the change
+    def __changes(self, cps, n, s, ss):
+        bounds = [0] + cps + [len(n)]
+        seg_n = numpy.add.reduceat(n, bounds[:-1])
+        seg_s = numpy.add.reduceat(s, bounds[:-1])
+        seg_ss = numpy.add.reduceat(ss, bounds[:-1])
+        seg_mean = seg_s / seg_n
+        with numpy.errstate(all='ignore'):
+            seg_std = numpy.sqrt(numpy.maximum(seg_ss - seg_s * seg_mean, 0) / (seg_n - 1))
+            t, p = stats.ttest_ind_from_stats(seg_mean[:-1], seg_std[:-1], seg_n[:-1],
+                                              seg_mean[1:], seg_std[1:], seg_n[1:],
+                                              equal_var=True)
+        return seg_mean[:-1], seg_mean[1:], 1 - numpy.nan_to_num(p, nan=1.0)
+
+    def events(self, commits, perf_diff_confidence = 0.95, smallest_perf_change = 0.005):
+        events = []
+        for benchmark, results, n, s, ss in self.__series(commits):
+            if len(results) < 2:
+                continue
 
-                    # Check for differences with the previous commit
-                    for test in result.unit_results:
-                        subtest = BenchSubTest(result.benchmark, test)
-                        if not str(subtest) in unittest_prev:
-                            continue
+            weights = self.__weights(n, s, ss)
+            means = s / n
+            cumsums = tuple(numpy.concatenate(([0], numpy.cumsum(v)))
+                            for v in (weights, weights * means, weights * means * means))
+            beta = self.penalty * math.log(len(results))
+            cps = list(self.change_points(cumsums, beta))
+
+            # Drop the change points which are too small or not significant,
+            # starting with the smallest change then the least significant
+            # one, until they all are
+            while len(cps) > 0:
+                old, new, confidence = self.__changes(cps, n, s, ss)
+                with numpy.errstate(all='ignore'):
+                    diff = numpy.where(old > 0, numpy.abs(new - old) / old, float('inf'))
+                bad = (diff < smallest_perf_change) | (confidence < perf_diff_confidence)
+                if not bad.any():
+                    break
+                candidates = numpy.flatnonzero(bad)
+                order = numpy.lexsort((confidence[candidates], diff[candidates]))
+                del cps[int(candidates[order[0]])]
+
+            for i, cp in enumerate(cps):
+                commit_range = EventCommitRange(results[cp - 1].commit, results[cp].commit)
+                events.append(EventPerfChange(benchmark, commit_range,
+                                              float(old[i]), float(new[i]), float(confidence[i])))
+        return events
+
+class BinarySegmentationDetector(ChangePointDetector):
+    # Split the series where it lowers the cost the most, as long as it
+    # lowers it by more than the penalty, then do the same on both halves.
+    # Every split is found using one vectorized evaluation of the cost.
+    def change_points(self, cumsums, beta):
+        cps = []
+        segments = [(0, len(cumsums[0]) - 1)]
+        while len(segments) > 0:
+            start, end = segments.pop()
+            splits = numpy.arange(start + self.min_size, end - self.min_size + 1)
+            if len(splits) == 0:
+                continue
+            gain = (self._cost(cumsums, start, end) - self._cost(cumsums, start, splits) -
+                    self._cost(cumsums, splits, end))
+            best = int(numpy.argmax(gain))
+            if gain[best] > beta:
+                cps.append(int(splits[best]))
+                segments.extend([(start, int(splits[best])), (int(splits[best]), end)])
+        return sorted(cps)
+
+class PeltDetector(ChangePointDetector):
+    # Optimal segmentation, using the Pruned Exact Linear Time algorithm
+    # (Killick et al, 2012). The cost of ending a segment at every point is
+    # evaluated for all the candidate segment starts at once.
+    def change_points(self, cumsums, beta):
+        count = len(cumsums[0]) - 1
+        F = numpy.full(count + 1, float('inf'))
+        F[0] = -beta
+        last = numpy.zeros(count + 1, dtype=int)
+        candidates = numpy.array([0])
+        for t in range(1, count + 1):
+            eligible = candidates <= t - self.min_size
+            starts = candidates[eligible]
+            if len(starts) > 0:
+                costs = F[starts] + self._cost(cumsums, starts, t)
+                best = int(numpy.argmin(costs))
+                F[t] = costs[best] + beta
+                last[t] = starts[best]
+
+                # Prune the starts which cannot be optimal anymore
+                candidates = numpy.concatenate((starts[costs <= F[t]], candidates[~eligible]))
+            candidates = numpy.append(candidates, t)
+
+        cps = []
+        t = last[count]
+        while t > 0:
+            cps.append(int(t))
+            t = last[t]
+        return sorted(cps)
+
+class SequentialTest:
+    # Decide, once the rounds requested for a benchmark got run, if its result
+    # is conclusive enough to skip the rounds added by schedule_enhancements().
+    # A result is conclusive when Wald's
+    # Sequential Probability Ratio Test concluded against every neighbour
+    # commit having results or, when there are no neighbours, when its
+    # confidence margin (see BenchResult.confidence_margin()) is below
+    # max_variance. The SPRT compares the hypotheses "same performance as the
+    # neighbour" and "performance changed by smallest_perf_change", in both
+    # directions, with the error rates alpha and beta. The performance of the
+    # neighbours is considered as known.
+    #
+    # Looking at the samples before all the rounds got run and stopping on a
+    # change makes false changes more likely than with a fixed number of
+    # rounds, so a change is only accepted when a t-test also rejects the
+    # "same performance" hypothesis with a p-value below change_pvalue.
+    def __init__(self, max_variance = 0.025, smallest_perf_change = 0.005,
+                 alpha = 0.05, beta = 0.05, change_pvalue = 0.002, min_rounds = 3):
+        self.max_variance = max_variance
+        self.smallest_perf_change = smallest_perf_change
+        self.change_pvalue = change_pvalue
+        self.min_rounds = min_rounds
+        self.accept_change = math.log((1 - beta) / alpha)
+        self.accept_same = math.log(beta / (1 - alpha))
+
+    def margin_is_conclusive(self, data):
+        result = BenchResult(None, None, None)
+        result.data = data
+        return result.confidence_margin()[0] <= self.max_variance
+
+    # Returns True if the SPRT concluded that data and neighbour have the
+    # same performance or a different one, False if it needs more samples
+    def comparison_is_conclusive(self, data, neighbour):
+        data = numpy.asarray(data, dtype=float64)
+        neighbour = numpy.asarray(neighbour, dtype=float64)
+        if len(data) < 2 or len(neighbour) < 2:
+            return False
 
-                        before = unittest_prev[str(subtest)][2]
-                        after = result.unit_results[test]
-                        if before == after:
-                            continue
+        # Pooled variance of the two sets of samples
+        dof = len(data) + len(neighbour) - 2
+        var = (data.var() * len(data) + neighbour.var() * len(neighbour)) / dof
+        if var == 0:
+            return True
 
-                        subtest = BenchSubTest(result.benchmark, test)
-                        commit_range = EventCommitRange(unittest_prev[str(subtest)][1], commit)
-                        self.events.append(EventUnitResultChange(subtest, commit_range, before, after))
+        mu0 = neighbour.mean()
+        same = 0
+        for direction in [-1, 1]:
+            mu1 = mu0 * (1 + direction * self.smallest_perf_change)
+            llr = (mu1 - mu0) / var * numpy.sum(data - (mu0 + mu1) / 2)
+            if llr >= self.accept_change:
+                t, p = stats.ttest_ind(data, neighbour, equal_var=True)
+                return p < self.change_pvalue
+            elif llr <= self.accept_same:
+                same += 1
+        return same == 2
+
+    def is_conclusive(self, data, neighbours = []):
+        if len(data) < self.min_rounds:
+            return False
 
-                    # Add all the results to the prev
-                    for test in result.unit_results:
-                        subtest = BenchSubTest(result.benchmark, test)
-                        unittest_prev[str(subtest)] = (subtest, commit, result.unit_results[test])
-                elif result.test_type == "imgval":
-                    # TODO: Aggregate the results if we ever want to verify the
-                    # stability of the rendering
+        # A small margin is not enough to see a change against a neighbour
+        neighbours = [n for n in neighbours if len(n) > 1]
+        if len(neighbours) == 0:
+            return self.margin_is_conclusive(data)
+        return all([self.comparison_is_conclusive(data, n) for n in neighbours])
+
+def countWarmupSamples(values, max_count = None):
+    # Returns how many of the first values are outside of the steady state,
+    # estimated on the second half of the values as mean ± 3 sigma
+    if len(values) < 4:
+        return 0
+    if max_count is None:
+        max_count = len(values) // 2
+
+    steady = numpy.asarray(values[len(values) // 2:], dtype=float64)
+    mean, std = steady.mean(), steady.std()
+    count = 0
+    while count < max_count and abs(values[count] - mean) > 3 * std:
+        count += 1
+    return count
+
+def calibrateBenchmark(runs, wanted_margin = 0.01, confidence = 0.95):
+    # Characterize a benchmark from many runs on the same version: the
+    # warm-up runs and samples within a run, the standard deviation of the
+    # steady runs relative to their mean, and the number of rounds needed to
+    # reach the wanted margin once the warm-up runs are discarded
+    runs = [r for r in runs if len(r) > 0]
+    if len(runs) < 4:
+        return None
 
-                    if bench in bench_prev:
-                        commit_range = EventCommitRange(bench_prev[bench].commit, commit)
-                        for frame in result.runs[0].frames:
-                            frame_prev = bench_prev[bench].runs[0].frames[frame]
-                            frame = result.runs[0].frames[frame]
-
-                            if frame_prev.frame_hash != frame.frame_hash:
-                                event = EventRenderingChange(result.benchmark, commit_range,
-                                                            frame_prev, frame)
-                                self.events.append(event)
-                    bench_prev[bench] = result
-                else:
-                    print("WARNING: enhance_report: unknown test type {}".format(result.test_type))
+    means = [sum(r) / len(r) for r in runs]
+    warmup_runs = countWarmupSamples(means)
+    warmup_samples = [countWarmupSamples(r) for r in runs if len(r) >= 4]
+    steady = numpy.asarray(means[warmup_runs:], dtype=float64)
+    mean = steady.mean()
+    if mean == 0:
+        return None
+
+    result = BenchResult(None, None, None)
+    result.data = list(steady)
+    result.noise_sigma = steady.std(ddof=1) / abs(mean)
+    margin, wanted_rounds = result.confidence_margin(wanted_margin, confidence)
+    if wanted_rounds < 2:
+        wanted_rounds = 2
 
-            commit_prev = commit
+    if warmup_runs > 0:
+        warmup_change = (sum(means[:warmup_runs]) / warmup_runs - mean) / mean
+    else:
+        warmup_change = 0
+
+    return {"runs": len(runs), "mean": float(mean), "sigma": float(result.noise_sigma),
+            "margin": float(margin), "wanted_margin": wanted_margin,
+            "warmup_runs": warmup_runs, "warmup_change": float(warmup_change),
+            "warmup_samples": int(numpy.median(warmup_samples)) if len(warmup_samples) > 0 else 0,
+            "rounds": int(warmup_runs + wanted_rounds)}
+
+class ResultFilter:
+    # Pre-processing of the 'bench' results, applied between loading them and
+    # computing their statistics. The first warmup_samples samples of every
+    # run are discarded, warmup_samples being a number or a dictionary of
+    # benchmark regexps to numbers. Outliers are then rejected among the
+    # samples of every run, if frames is set, and among the runs, if runs is
+    # set, using either the median absolute deviation (outliers = "mad",
+    # threshold on the modified z-score, 5 by default) or the inter-quartile
+    # range (outliers = "iqr", threshold in IQRs, 3 by default). The default
+    # thresholds are conservative as benchmarks rarely have more than a few
+    # runs, and the MAD and IQR are at least min_spread times the median so as
+    # the values of very stable results do not all become outliers. What got
+    # dropped is stored in the 'dropped' attribute of the results.
+    methods = { "mad": 5.0, "iqr": 3.0 }
+
+    def __init__(self, warmup_samples = 0, outliers = None, threshold = None,
+                 frames = True, runs = True, min_spread = 0.005):
+        if outliers is not None and outliers not in self.methods:
+            raise ValueError("Unknown outlier rejection method '{}'".format(outliers))
+        self.warmup_samples = warmup_samples
+        self.outliers = outliers
+        self.threshold = threshold if threshold is not None else self.methods.get(outliers)
+        self.frames = frames
+        self.runs = runs
+        self.min_spread = min_spread
+
+        self._warmup_res = []
+        if type(warmup_samples) is dict:
+            self._warmup_res = [(re.compile(k), int(v)) for k, v in warmup_samples.items()]
+
+    def to_dict(self):
+        return {"warmup_samples": self.warmup_samples, "outliers": self.outliers,
+                "threshold": self.threshold, "frames": self.frames, "runs": self.runs,
+                "min_spread": self.min_spread}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(**d)
+
+    def warmup(self, benchmark):
+        if type(self.warmup_samples) is not dict:
+            return int(self.warmup_samples)
+        for r, count in self._warmup_res:
+            if r.search(benchmark):
+                return count
+        return 0
+
+    def outliers_mask(self, x):
+        # Returns which values of every row of the 2D array x are outliers
+        mask = numpy.zeros(x.shape, dtype=bool)
+        if self.outliers is None or x.shape[1] < 3:
+            return mask
+
+        median = numpy.median(x, axis=1, keepdims=True)
+        min_spread = self.min_spread * numpy.abs(median)
+        if self.outliers == "mad":
+            mad = numpy.maximum(numpy.median(numpy.abs(x - median), axis=1, keepdims=True), min_spread)
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                z = 0.6745 * numpy.abs(x - median) / mad
+            mask = (z > self.threshold) & (mad > 0)
+        elif self.outliers == "iqr":
+            q1, q3 = numpy.percentile(x, [25, 75], axis=1, keepdims=True)
+            iqr = numpy.maximum(q3 - q1, min_spread)
+            mask = (x < q1 - self.threshold * iqr) | (x > q3 + self.threshold * iqr)
+        return mask
+
+    def apply(self, results):
+        results = [r for r in results if r.test_type == "bench" and len(r.data) > 0]
+
+        # Trim the runs of every result, grouped by size to be processed at once
+        values = []
+        dropped = []
+        frame_groups = dict()
+        trim_frames = self.frames and self.outliers is not None
+        for i in range(0, len(results)):
+            result = results[i]
+            values.append(numpy.array(result.data, dtype=float64))
+            dropped.append({"warmup_samples": 0, "outlier_samples": 0, "outlier_runs": []})
+
+            # Only load the runs of the results which need to be trimmed
+            warmup = self.warmup(result.benchmark.full_name)
+            if warmup == 0 and not trim_frames:
+                continue
+            runs = result.runs
+            if len(runs) != len(values[i]):
+                continue
+            for r in range(0, len(runs)):
+                run = numpy.asarray(runs[r], dtype=float64)
+                w = warmup if warmup < len(run) else len(run) - 1
+                dropped[i]["warmup_samples"] += w
+                frame_groups.setdefault(len(run) - w, []).append((i, r, w, run[w:]))
+
+        for group in frame_groups.values():
+            x = numpy.array([g[3] for g in group])
+            if trim_frames:
+                mask = self.outliers_mask(x)
+            else:
+                mask = numpy.zeros(x.shape, dtype=bool)
+            means = numpy.where(mask, 0, x).sum(axis=1) / (~mask).sum(axis=1)
+            counts = mask.sum(axis=1)
+            for (i, r, w, run), mean, count in zip(group, means, counts):
+                if w > 0 or count > 0:
+                    values[i][r] = mean
+                    dropped[i]["outlier_samples"] += int(count)
+
+        # Reject the outlier runs, grouped by count
+        run_groups = dict()
+        if self.runs:
+            for i in range(0, len(results)):
+                run_groups.setdefault(len(values[i]), []).append(i)
+        for n, group in run_groups.items():
+            mask = self.outliers_mask(numpy.array([values[i] for i in group]))
+            for i, m in zip(group, mask):
+                dropped[i]["outlier_runs"] = [int(r) for r in numpy.flatnonzero(m)]
+                values[i] = values[i][~m]
+
+        for i in range(0, len(results)):
+            d = dropped[i]
+            if d["warmup_samples"] > 0 or d["outlier_samples"] > 0 or len(d["outlier_runs"]) > 0:
+                results[i].data = list(values[i])
+                results[i].invalidate_cache()
+            results[i].dropped = d
+
+# Suffixes of the compressed files of a report, see compactReport()
+compressed_suffixes = [".gz", ".zst"]
+
+def uncompressedReportFileName(filename):
+    for suffix in compressed_suffixes:
+        if filename.endswith(suffix):
+            return filename[:-len(suffix)]
+    return filename
+
+def statReportFile(path):
+    # Stat the file path or, if it does not exist, its compressed version
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        for suffix in compressed_suffixes:
+            try:
+                return os.stat(path + suffix)
+            except FileNotFoundError:
+                pass
+        raise
+
+def reportFilePath(path):
+    # Returns the path of the file path, or of its compressed version
+    if not os.path.exists(path):
+        for suffix in compressed_suffixes:
+            if os.path.exists(path + suffix):
+                return path + suffix
+    return path
+
+def openReportFile(path, mode = 'rt'):
+    # Open the file path of a report for reading, decompressing it if needed
+    if 'b' not in mode and 't' not in mode:
+        mode += 't'
+    real_path = reportFilePath(path)
+    if real_path.endswith(".gz"):
+        return gzip.open(real_path, mode)
+    elif real_path.endswith(".zst"):
+        if zstandard is None:
+            raise IOError("Cannot read '{}', the python module zstandard is missing".format(real_path))
+        return zstandard.open(real_path, mode)
+    return open(real_path, mode)
 
 def readCsv(filepath):
     data = []
@@ -1927,7 +3353,7 @@ def readCsv(filepath):
     h1 = re.compile('^# (.*) of \'(.*)\' using commit (.*)$')
     h2 = re.compile('^# (.*) \\((.*) is better\\) of \'(.*)\' using (commit|version) (.*)$')
 
-    with open(filepath, 'rt') as f:
+    with openReportFile(filepath, 'rt') as f:
         reader = csv.reader(f)
         unit = None
         more_is_better = True
@@ -1961,17 +3387,1179 @@ def readCsv(filepath):
 
 def readUnitRun(filepath):
     tests = dict()
-    with open(filepath, 'rt') as f:
+    with openReportFile(filepath, 'rt') as f:
         for line in f.readlines():
             fields = line.split(':')
             if len(fields) == 2:
                 tests[fields[0]] = fields[1].strip()
     return tests
 
-def readCommitLabels():
+def readImgvalRun(filepath):
+    rows = []
+    with openReportFile(filepath, 'rt') as f:
+        for line in f.readlines():
+            fields = line.split(',')
+            if len(fields) == 4:
+                rows.append(fields)
+            else:
+                print("ERROR: ImgvalRun: Invalid format for file '{}'".format(filepath))
+    return rows
+
+def readMetricsCsv(filepath):
+    with openReportFile(filepath, 'rt') as f:
+        try:
+            header = next(csv.reader([f.readline()]), [])
+        except csv.Error as e:
+            sys.stderr.write('file %s, line 1: %s\n' % (filepath, e))
+            return dict()
+        content = f.read()
+    if len(header) == 0:
+        return dict()
+
+    # Only keep the complete rows, up to the first incomplete one, which
+    # happens when the file got truncated
+    lines = content.splitlines()
+    if not content.endswith('\n') and len(lines) > 0:
+        lines.pop()
+    separators = len(header) - 1
+    rows = [l for l in lines if len(l) > 0]
+    for i in range(0, len(rows)):
+        if rows[i].count(',') != separators:
+            rows = rows[:i]
+            break
+    if len(rows) == 0:
+        return dict([(field, []) for field in header])
+
+    # Parse all the rows at once, the values are stored in lists to be
+    # stored in the report index
+    data = numpy.loadtxt(rows, delimiter=',', dtype=float64, ndmin=2)
+    return dict([(header[i], data[:, i].tolist()) for i in range(0, len(header))])
+
+def readCommitPatch(filepath):
+    header = dict()
+    header['full_sha1'] = None
+    header['author'] = None
+    header['commiter'] = None
+    header['author_date'] = None
+    header['commit_date'] = None
+    header['title'] = ''
+    header['commit_log'] = ''
+    header['signed_of_by'] = []
+    header['reviewed_by'] = []
+    header['tested_by'] = []
+    header['bugs'] = []
+
+    with openReportFile(filepath, 'rt') as f:
+        log_started = False
+        fdo_bug_re = re.compile('fdo#(\d+)')
+        basefdourl = "https://bugs.freedesktop.org/show_bug.cgi?id="
+        for line in f:
+            # The commit log is indented, stop at the beginning of the diff
+            # instead of reading the whole patch
+            if log_started and len(line.strip()) > 0 and not line.startswith(" "):
+                break
+
+            line = line.strip()
+            if line == "---": # Detect the end of the header
+                break
+            elif line.startswith('commit'):
+                header['full_sha1'] = line.split(' ')[1]
+            elif line.startswith('Author:'):
+                header['author'] = line[12:]
+            elif line.startswith('AuthorDate: '):
+                header['author_date'] = mktime_tz(parsedate_tz(line[12:]))
+            elif line.startswith('Commit:'):
+                header['commiter'] = line[12:]
+            elif line.startswith('CommitDate: '):
+                header['commit_date'] = mktime_tz(parsedate_tz(line[12:]))
+            elif line == '':
+                # The commit log is about to start
+                log_started = True
+            elif log_started:
+                if header['title'] == '':
+                    header['title'] = line
+                else:
+                    header['commit_log'] += line + '\n'
+                    if line.startswith('Reviewed-by: '):
+                        header['reviewed_by'].append(line[13:])
+                    elif line.startswith('Signed-off-by: '):
+                        header['signed_of_by'].append(line[15:])
+                    elif line.startswith('Tested-by: '):
+                        header['tested_by'].append(line[11:])
+                    elif line.startswith('Bugzilla: '):
+                        header['bugs'].append(line[10:])
+                    elif line.startswith('Fixes: '):
+                        header['bugs'].append(line[7:])
+                    else:
+                        fdo_bug_m = fdo_bug_re.search(line)
+                        if fdo_bug_m is not None:
+                            bugid = fdo_bug_m.groups()[0]
+                            header['bugs'].append(basefdourl + bugid)
+
+    return header
+
+def readCompileLogExitCode(filepath):
+    # Only read the end of the file, compilation logs can be big
+    with open(filepath, 'rb') as f:
+        size = f.seek(0, os.SEEK_END)
+        if size > 4096:
+            f.seek(size - 4096, os.SEEK_SET)
+        else:
+            f.seek(0, os.SEEK_SET)
+        lines = f.read().decode(errors='replace').splitlines()
+
+    # Parse the last line of the report
+    line = lines[-1] if len(lines) > 0 else ""
+    if line.startswith("Exiting with error code "):
+        return int(line[24:])
+    return None
+
+def readReportFiles(log_folder, files):
+    parsed = []
+    for filename, parser in files:
+        try:
+            parsed.append((filename, True, parser(os.path.join(log_folder, filename))))
+        except Exception as e:
+            parsed.append((filename, False, e))
+    return parsed
+
+class ReportIndex:
+    # Cache of the parsed content of the files of a report, stored in the
+    # report folder. Entries are keyed by the path of the file relative to the
+    # report folder and are invalidated when the size or the modification
+    # time of the file change.
+    #
+    # The metadata of the commits (header of the patch and exit code of the
+    # compilation) are stored separately, keyed by sha1. The header of a
+    # commit does not change when the patch gets re-generated, so it is kept
+    # as long as the size of the patch stays the same.
+    #
+    # The files and commits seen since the index got opened are tracked in
+    # temporary tables, to let prune() drop the other ones without keeping
+    # the list of all the files of the report in memory.
+    #
+    # The results of a report keep using the index to load their runs on
+    # demand, from any thread, so the connection is shared between threads
+    # and every access to it is serialized by _lock. It stays open until
+    # close() gets called or the index gets garbage-collected.
+    #
+    # Multiple processes may load the same report at the same time. The reads
+    # are grouped in a read-only transaction and the new entries are written
+    # in a separate one, by save() or once flush_entries of them are pending.
+    # A connection thus never needs to upgrade its read lock to a write lock,
+    # which would fail right away when another connection is writing.
+    version = 2
+    db_name = "report_index.sqlite"
+
+    # Minimum amount of files to parse before using multiple processes
+    parallel_min_files = 500
+
+    # Maximum amount of new entries to keep in memory before writing them
+    flush_entries = 1000
+
+    def __init__(self, log_folder, persistent = True):
+        self.log_folder = os.path.abspath(log_folder)
+        self.db_path = "{}/{}".format(self.log_folder, self.db_name)
+        self.persistent = persistent
+        self._prefetched = dict()
+        self._pending_files = dict()
+        self._pending_commits = dict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.db = None
+
+        if persistent:
+            self.__open()
+
+    def __open(self, recreate = False):
+        try:
+            self.db = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False,
+                                      isolation_level=None)
+            self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self.db.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, "
+                            "size INTEGER, mtime INTEGER, content TEXT)")
+            self.db.execute("CREATE TABLE IF NOT EXISTS commits (sha1 TEXT PRIMARY KEY, "
+                            "patch_size INTEGER, header TEXT, compile_log_size INTEGER, "
+                            "compile_log_mtime INTEGER, exit_code INTEGER)")
+            self.db.execute("CREATE TEMP TABLE IF NOT EXISTS seen_files (path TEXT PRIMARY KEY)")
+            self.db.execute("CREATE TEMP TABLE IF NOT EXISTS seen_commits (sha1 TEXT PRIMARY KEY)")
+            row = self.db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if row is None or int(row[0]) != self.version:
+                self.db.execute("DELETE FROM files")
+                self.db.execute("DELETE FROM commits")
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)",
+                                (str(self.version),))
+        except sqlite3.DatabaseError as e:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+
+            # The index is only a cache, re-create it when corrupted
+            if not recreate and not isinstance(e, sqlite3.OperationalError):
+                print("WARNING: Re-creating the corrupted report index '{}': {}".format(self.db_path, e))
+                try:
+                    os.remove(self.db_path)
+                    return self.__open(recreate = True)
+                except OSError:
+                    pass
+
+            print("WARNING: Cannot use the report index '{}': {}".format(self.db_path, e))
+            self.persistent = False
+
+    def __disable(self, e):
+        print("WARNING: Disabling the report index '{}': {}".format(self.db_path, e))
+        try:
+            self.db.close()
+        except sqlite3.Error:
+            pass
+        self.persistent = False
+        self.db = None
+        self._pending_files = dict()
+        self._pending_commits = dict()
+
+    def __mark_seen(self, table, keys):
+        if self.db is None:
+            return
+        try:
+            self.db.executemany("INSERT OR IGNORE INTO temp.{} VALUES (?)".format(table),
+                                [(key,) for key in keys])
+        except sqlite3.DatabaseError as e:
+            self.__disable(e)
+
+    def __is_fresh(self, filename, st):
+        try:
+            row = self.__select("SELECT size, mtime FROM files WHERE path = ?", (filename,))
+            return row is not None and row[0] == st.st_size and row[1] == st.st_mtime_ns
+        except sqlite3.DatabaseError as e:
+            self.__disable(e)
+            return False
+
+    def __select(self, query, args):
+        if not self.db.in_transaction:
+            self.db.execute("BEGIN")
+        return self.db.execute(query, args).fetchone()
+
+    def __end_read(self):
+        if self.db is not None and self.db.in_transaction:
+            self.db.execute("COMMIT")
+
+    def __store(self, filename, st, content):
+        if self.db is None:
+            return
+        self._pending_files[filename] = (filename, st.st_size, st.st_mtime_ns, json.dumps(content))
+        if len(self._pending_files) + len(self._pending_commits) >= self.flush_entries:
+            self.__flush()
+
+    # Write the pending entries, after ending the read transaction. Has to be
+    # called before any other write.
+    def __flush(self):
+        if self.db is None:
+            return
+        try:
+            self.__end_read()
+            if len(self._pending_files) + len(self._pending_commits) == 0:
+                return
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                self.db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                                    self._pending_files.values())
+                self.db.executemany("INSERT OR REPLACE INTO commits VALUES (?, ?, ?, ?, ?, ?)",
+                                    self._pending_commits.values())
+                self.db.execute("COMMIT")
+            except sqlite3.DatabaseError:
+                self.db.execute("ROLLBACK")
+                raise
+        except sqlite3.DatabaseError as e:
+            self.__disable(e)
+        self._pending_files = dict()
+        self._pending_commits = dict()
+
+    # files is a list of lists of (filename, parser) tuples, one list per
+    # commit. Parse all the files that are not up to date in the index using
+    # up to $workers processes, then keep them aside until load() is called.
+    # The files prefetched previously and not loaded since get dropped.
+    def prefetch(self, files, workers = None):
+        if workers is None:
+            workers = os.cpu_count()
+
+        stale = []
+        stale_count = 0
+        with self._lock:
+            self._prefetched = dict()
+            for commit_files in files:
+                commit_stale = []
+                for filename, parser in commit_files:
+                    try:
+                        st = statReportFile(os.path.join(self.log_folder, filename))
+                    except OSError:
+                        continue
+                    if self.db is None or not self.__is_fresh(filename, st):
+                        commit_stale.append((filename, parser))
+                if len(commit_stale) > 0:
+                    stale.append(commit_stale)
+                    stale_count += len(commit_stale)
+
+        # Small reports are faster to load serially, let load() do the work
+        if workers is None or workers < 2 or stale_count < self.parallel_min_files:
+            return
+
+        # Forking the multi-threaded ezbenchd could leave the workers with
+        # locks held by the other threads, start them from a fork server
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context("forkserver")
+        else:
+            mp_context = multiprocessing.get_context("spawn")
+
+        try:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                                                        mp_context=mp_context) as executor:
+                futures = [executor.submit(readReportFiles, self.log_folder, commit_stale)
+                           for commit_stale in stale]
+                for future in futures:
+                    results = future.result()
+                    with self._lock:
+                        for filename, success, content in results:
+                            self._prefetched[filename] = (success, content)
+        except (OSError, concurrent.futures.process.BrokenProcessPool) as e:
+            print("WARNING: Parallel loading of the report failed ({}), load it serially".format(e))
+
+    def load(self, filename, parser):
+        with self._lock:
+            path = os.path.join(self.log_folder, filename)
+            st = statReportFile(path)
+            self.__mark_seen("seen_files", [filename])
+
+            # Use the prefetched content, if available
+            if filename in self._prefetched:
+                self.misses += 1
+                success, content = self._prefetched.pop(filename)
+                if not success:
+                    raise content
+                self.__store(filename, st, content)
+                return content
+
+            if self.db is None:
+                return parser(path)
+
+            try:
+                row = self.__select("SELECT size, mtime, content FROM files WHERE path = ?", (filename,))
+                if row is not None and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+                    self.hits += 1
+                    return json.loads(row[2])
+            except sqlite3.DatabaseError as e:
+                self.__disable(e)
+                return parser(path)
+
+            # The file is new or changed, parse it and update the index
+            self.misses += 1
+            content = parser(path)
+            self.__store(filename, st, content)
+            return content
+
+    # Update the size and modification time of the entries of filename after
+    # it got rewritten with the same content, e.g. when getting compressed.
+    # old_st is the stat of the file before it got rewritten.
+    def touch(self, filename, old_st):
+        with self._lock:
+            self.__flush()
+            if self.db is None:
+                return
+            try:
+                st = statReportFile(os.path.join(self.log_folder, filename))
+                self.db.execute("UPDATE files SET size = ?, mtime = ? WHERE path = ? AND size = ? AND mtime = ?",
+                                (st.st_size, st.st_mtime_ns, filename, old_st.st_size, old_st.st_mtime_ns))
+                if filename.endswith(".patch"):
+                    self.db.execute("UPDATE commits SET patch_size = ? WHERE sha1 = ? AND patch_size = ?",
+                                    (st.st_size, os.path.basename(filename)[:-6], old_st.st_size))
+            except OSError:
+                pass
+            except sqlite3.DatabaseError as e:
+                self.__disable(e)
+
+    def __stat(self, filename):
+        try:
+            return statReportFile(os.path.join(self.log_folder, filename))
+        except OSError:
+            return None
+
+    def __commit_row(self, sha1):
+        if self.db is None:
+            return None
+        try:
+            return self.__select("SELECT patch_size, header, compile_log_size, compile_log_mtime, "
+                                 "exit_code FROM commits WHERE sha1 = ?", (sha1,))
+        except sqlite3.DatabaseError as e:
+            self.__disable(e)
+            return None
+
+    # Returns the list of (filename, parser) tuples of the commit metadata
+    # which are not up to date in the index, to be given to prefetch()
+    def stale_commit_files(self, sha1, patch, compile_log):
+        with self._lock:
+            row = self.__commit_row(sha1)
+            patch_st = self.__stat(patch)
+            compile_log_st = self.__stat(compile_log)
+
+            files = []
+            if patch_st is not None and (row is None or row[0] != patch_st.st_size):
+                files.append((patch, readCommitPatch))
+            if compile_log_st is not None and (row is None or row[2] != compile_log_st.st_size or
+                                               row[3] != compile_log_st.st_mtime_ns):
+                files.append((compile_log, readCompileLogExitCode))
+            return files
+
+    def __parse(self, filename, parser):
+        if filename in self._prefetched:
+            success, content = self._prefetched.pop(filename)
+            if not success:
+                raise content
+            return content
+        return parser(os.path.join(self.log_folder, filename))
+
+    # Returns the header of the patch and the exit code of the compilation of
+    # a commit, or None when they are not available. Missing entries are
+    # added to the index.
+    def load_commit(self, sha1, patch, compile_log):
+        with self._lock:
+            self.__mark_seen("seen_commits", [sha1])
+            row = self.__commit_row(sha1)
+            patch_st = self.__stat(patch)
+            compile_log_st = self.__stat(compile_log)
+
+            header = None
+            patch_size = None
+            if patch_st is not None:
+                if row is not None and row[0] == patch_st.st_size and row[1] is not None:
+                    header = json.loads(row[1])
+                else:
+                    try:
+                        header = self.__parse(patch, readCommitPatch)
+                        patch_size = patch_st.st_size
+                    except Exception:
+                        pass
+                    row = None
+
+            exit_code = None
+            compile_log_size = compile_log_mtime = None
+            if compile_log_st is not None:
+                compile_log_size = compile_log_st.st_size
+                compile_log_mtime = compile_log_st.st_mtime_ns
+                if row is not None and row[2] == compile_log_size and row[3] == compile_log_mtime:
+                    exit_code = row[4]
+                else:
+                    try:
+                        exit_code = self.__parse(compile_log, readCompileLogExitCode)
+                    except Exception:
+                        compile_log_size = compile_log_mtime = None
+                    row = None
+
+            if row is not None:
+                self.hits += 1
+                return header, exit_code
+            self.misses += 1
+
+            if self.db is not None:
+                if patch_size is None and patch_st is not None and header is not None:
+                    patch_size = patch_st.st_size
+                self._pending_commits[sha1] = (sha1, patch_size,
+                                               json.dumps(header) if header is not None else None,
+                                               compile_log_size, compile_log_mtime, exit_code)
+
+            return header, exit_code
+
+    # Load a list of (filename, parser) tuples, possibly after the index got
+    # closed, in which case it gets re-opened until the next close(). The new
+    # entries are saved right away, to not keep other writers waiting.
+    # Returns a list of (success, content or exception) tuples.
+    def load_files(self, files):
+        with self._lock:
+            if self.db is None and self.persistent:
+                self.__open()
+
+            contents = []
+            for filename, parser in files:
+                try:
+                    contents.append((True, self.load(filename, parser)))
+                except Exception as e:
+                    contents.append((False, e))
+
+            self.save()
+        return contents
+
+    # Mark files as being part of the report, even if they did not get loaded
+    def keep(self, filenames):
+        with self._lock:
+            self.__mark_seen("seen_files", filenames)
+
+    def prune(self):
+        # Drop the entries of the files which have not been loaded since the
+        # index got opened, they got removed from the report.
+        with self._lock:
+            self.__flush()
+            if self.db is None:
+                return
+            try:
+                self.db.execute("DELETE FROM files WHERE path NOT IN (SELECT path FROM temp.seen_files)")
+                self.db.execute("DELETE FROM commits WHERE sha1 NOT IN (SELECT sha1 FROM temp.seen_commits)")
+            except sqlite3.DatabaseError as e:
+                self.__disable(e)
+
+    def rename(self, old_filename, new_filename):
+        with self._lock:
+            self.__flush()
+            if self.db is None:
+                return
+            try:
+                self.db.execute("UPDATE OR REPLACE files SET path = ? WHERE path = ?",
+                                (new_filename, old_filename))
+            except sqlite3.DatabaseError as e:
+                self.__disable(e)
+
+    def rebuild(self):
+        with self._lock:
+            if self.db is None:
+                return False
+            self._pending_files = dict()
+            self._pending_commits = dict()
+            self.__flush()
+            if self.db is None:
+                return False
+            try:
+                self.db.execute("DELETE FROM files")
+                self.db.execute("DELETE FROM commits")
+                self.db.execute("DELETE FROM temp.seen_files")
+                self.db.execute("DELETE FROM temp.seen_commits")
+                self.db.execute("VACUUM")
+            except sqlite3.DatabaseError as e:
+                self.__disable(e)
+                return False
+            return True
+
+    # Write the pending changes to the disk, but keep the index open
+    def save(self):
+        with self._lock:
+            self.__flush()
+
+    # End the reads, to let the other connections write to the index
+    def unlock(self):
+        with self._lock:
+            try:
+                self.__end_read()
+            except sqlite3.DatabaseError as e:
+                self.__disable(e)
+
+    def close(self):
+        with self._lock:
+            self._prefetched = dict()
+            self.__flush()
+            if self.db is None:
+                return
+            try:
+                self.db.close()
+            except sqlite3.Error as e:
+                print("WARNING: Could not close the report index '{}': {}".format(self.db_path, e))
+            self.db = None
+
+    def __del__(self):
+        if getattr(self, "db", None) is not None:
+            self.close()
+
+class ResultStore:
+    # Memory-mappable, columnar copy of the samples of the 'bench' results of
+    # a report, stored in the folder result_store/ of the report. Every
+    # benchmark gets a .npy array holding all its samples and an index telling
+    # which slice of the samples comes from which result or run file, along
+    # with the size and modification time the file had when it got imported.
+    # Files are keyed by their name, regardless of the folder they are in.
+    # The benchmark files are named after the URL-quoted name of the benchmark,
+    # shortened and suffixed by its hash when it would not fit in a file name.
+    #
+    # The CSV files written by core.sh stay the reference: a slice is only
+    # used if the file it got imported from did not change or got removed.
+    # Removed files can be written back using export_csv().
+    #
+    # Every rewrite of the samples of a benchmark goes to a new file, named
+    # after the generation recorded in the index, so as readers never mix an
+    # index with the samples of another generation. The samples of the old
+    # generations get removed, their readers then fall back to the CSV files.
+    # Writers are serialized using the file 'lock' of the store.
+    version = 2
+    folder_name = "result_store"
+    max_bench_file_len = 200
+
+    def __init__(self, log_folder):
+        self.log_folder = os.path.abspath(log_folder)
+        self.path = "{}/{}".format(self.log_folder, self.folder_name)
+        self.hits = 0
+        self.__load_index()
+
+    def __load_index(self):
+        self._entries = dict()
+        self._samples = dict()
+        try:
+            with open(self.path + "/version", 'r') as f:
+                if int(f.read()) != self.version:
+                    return
+            indexes = [f for f in os.listdir(self.path) if f.endswith(".index.npy")]
+        except (IOError, ValueError):
+            return
+        for index_file in indexes:
+            bench_file = index_file[:-len(".index.npy")]
+            try:
+                index = numpy.load("{}/{}".format(self.path, index_file))
+            except (IOError, ValueError) as e:
+                print("WARNING: Ignoring the corrupted result store index '{}': {}".format(index_file, e))
+                continue
+            for row in index:
+                self._entries[str(row['name'])] = (bench_file, int(row['offset']), int(row['count']),
+                                                   int(row['size']), int(row['mtime']),
+                                                   str(row['unit']), bool(row['more_is_better']),
+                                                   str(row['generation']))
+
+    def __samples_file(self, bench_file, generation):
+        return "{}.{}.samples.npy".format(bench_file, generation)
+
+    # Returns the samples of a generation of a benchmark, or None when they
+    # cannot be read, e.g. after getting replaced by a newer generation
+    def __samples(self, bench_file, generation):
+        key = (bench_file, generation)
+        if key not in self._samples:
+            path = "{}/{}".format(self.path, self.__samples_file(bench_file, generation))
+            try:
+                self._samples[key] = numpy.load(path, mmap_mode='r')
+            except (IOError, ValueError) as e:
+                print("WARNING: Cannot read the samples of the result store: {}".format(e))
+                self._samples[key] = None
+        return self._samples[key]
+
+    def __bench_file(self, bench_name):
+        bench_file = urllib.parse.quote(bench_name, safe='')
+        if len(bench_file) > self.max_bench_file_len:
+            digest = hashlib.sha1(bench_name.encode()).hexdigest()
+            bench_file = "{}-{}".format(bench_file[:self.max_bench_file_len - len(digest) - 1],
+                                        digest)
+        return bench_file
+
+    def __index_array(self, index):
+        # Size the strings of the index after the longest ones, as numpy
+        # silently truncates the strings that do not fit
+        name_len = max([len(row[0]) for row in index] + [1])
+        unit_len = max([len(row[5]) for row in index] + [1])
+        generation_len = max([len(row[7]) for row in index] + [1])
+        dtype = [('name', 'U{}'.format(name_len)), ('offset', 'i8'), ('count', 'i8'),
+                 ('size', 'i8'), ('mtime', 'i8'), ('unit', 'U{}'.format(unit_len)),
+                 ('more_is_better', '?'), ('generation', 'U{}'.format(generation_len))]
+        return numpy.array(index, dtype=dtype)
+
+    def filenames(self):
+        return list(self._entries.keys())
+
+    # Returns the (data, unit, more_is_better) tuple read from the result file
+    # or run file filename, with data being a read-only view of the store, or
+    # None if the file is unknown or changed since it got imported.
+    def load(self, filename):
+        entry = self._entries.get(os.path.basename(filename))
+        if entry is None:
+            return None
+        bench_file, offset, count, size, mtime, unit, more_is_better, generation = entry
+
+        try:
+            st = statReportFile(os.path.join(self.log_folder, filename))
+            if st.st_size != size or st.st_mtime_ns != mtime:
+                return None
+        except OSError:
+            pass
+
+        samples = self.__samples(bench_file, generation)
+        if samples is None or offset + count > len(samples):
+            return None
+        data = samples[offset:offset + count]
+
+        self.hits += 1
+        if unit == "":
+            unit = None
+        return data, unit, more_is_better
+
+    # Import the samples of the 'bench' results and runs of the report. Only
+    # the benchmarks having new, modified or removed files get rewritten.
+    def import_csv(self):
+        try:
+            with open(self.log_folder + "/commit_list", 'r') as f:
+                sha1s = set([l.split()[0] for l in f.readlines() if len(l.split()) > 0])
+        except IOError:
+            return 0
+
+        os.makedirs(self.path, exist_ok=True)
+        with open(self.path + "/lock", 'w') as lock_fd:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            try:
+                # Another writer may have updated the store in the mean time
+                self.__load_index()
+                return self.__import_csv(sha1s)
+            finally:
+                fcntl.flock(lock_fd, fcntl.LOCK_UN)
+
+    def __import_csv(self, sha1s):
+
+        testFiles, runFiles, metricFiles, commitFiles, allFiles = listReportFiles(self.log_folder,
+                                                                                  sha1s,
+                                                                                  self.filenames())
+
+        # List all the files of every benchmark
+        bench_files = dict()
+        for sha1 in sha1s:
+            commit_runs = runFiles.get(sha1, dict())
+            for testName, testFile, testType in testFiles.get(sha1, []):
+                if testType != "bench":
+                    continue
+                bench_name = testName[len(sha1) + len(testType) + 2:]
+                files = bench_files.setdefault(self.__bench_file(bench_name), [])
+                files.append(testFile)
+                files.extend([runFile for runName, runFile in commit_runs.get(testName, [])])
+
+        generation = "{:x}".format(time.time_ns())
+        imported = 0
+        for bench_file, files in bench_files.items():
+            changed = False
+            index = []
+            samples = []
+            offset = 0
+            for filename in files:
+                name = os.path.basename(filename)
+                path = os.path.join(self.log_folder, filename)
+                entry = self._entries.get(name)
+                content = None
+                if os.path.exists(reportFilePath(path)):
+                    st = statReportFile(path)
+                    if entry is None or entry[3] != st.st_size or entry[4] != st.st_mtime_ns:
+                        data, unit, more_is_better = readCsv(path)
+                        size, mtime = st.st_size, st.st_mtime_ns
+                        imported += 1
+                        changed = True
+                        content = (data, unit, more_is_better)
+                if content is None and entry is not None:
+                    content = self.load(name)
+                    size, mtime = entry[3], entry[4]
+                if content is None and os.path.exists(reportFilePath(path)):
+                    # The samples of the entry are not readable anymore
+                    content = readCsv(path)
+                    size, mtime = st.st_size, st.st_mtime_ns
+                    imported += 1
+                    changed = True
+                if content is None:
+                    continue
+                data, unit, more_is_better = content
+                if unit is None:
+                    unit = ""
+
+                index.append((name, offset, len(data), size, mtime, unit, more_is_better,
+                              generation))
+                samples.append(numpy.asarray(data, dtype=float64))
+                offset += len(data)
+            changed = changed or len(index) != len([e for e in self._entries.values()
+                                                    if e[0] == bench_file])
+            if not changed:
+                continue
+
+            # Write the new files aside and atomically replace the old ones
+            # to keep the memory mappings of the current readers valid
+            prefix = "{}/{}".format(self.path, bench_file)
+            if len(samples) > 0:
+                samples = numpy.concatenate(samples)
+            else:
+                samples = numpy.empty(0, dtype=float64)
+            samples_file = "{}/{}".format(self.path, self.__samples_file(bench_file, generation))
+            with open(samples_file + ".tmp", 'wb') as f:
+                numpy.save(f, samples)
+            with open(prefix + ".index.npy.tmp", 'wb') as f:
+                numpy.save(f, self.__index_array(index))
+            os.replace(samples_file + ".tmp", samples_file)
+            os.replace(prefix + ".index.npy.tmp", prefix + ".index.npy")
+
+        # Remove the benchmarks which are not part of the report anymore
+        for index_file in glob.glob(self.path + "/*.index.npy"):
+            if os.path.basename(index_file)[:-len(".index.npy")] not in bench_files:
+                os.remove(index_file)
+
+        with open(self.path + "/version", 'w') as f:
+            f.write(str(self.version))
+
+        # Remove the samples of the previous generations
+        self.__load_index()
+        current = set([self.__samples_file(e[0], e[7]) for e in self._entries.values()])
+        for samples_file in glob.glob(self.path + "/*.samples.npy"):
+            if os.path.basename(samples_file) not in current:
+                os.remove(samples_file)
+
+        return imported
+
+    # Write back the result and run files missing from the report, or all of
+    # them if overwrite is True. Files are written at the root of the report
+    # or in the folder of their commit, if it exists.
+    def export_csv(self, overwrite = False):
+        header = "# {unit} ({more_less} is better) of '{bench}' using version {sha1}\n"
+        exported = 0
+        for name, entry in self._entries.items():
+            sha1, bench_name = name.split("_bench_", 1)
+            bench_name = re.sub(r'#\d+$', '', bench_name)
+            commit_path = os.path.join(self.log_folder, sha1, name)
+            root_path = os.path.join(self.log_folder, name)
+            if not overwrite and (os.path.exists(commit_path) or os.path.exists(root_path)):
+                continue
+
+            if os.path.exists(root_path) and not os.path.exists(commit_path):
+                path = root_path
+            elif os.path.isdir(os.path.join(self.log_folder, sha1)):
+                path = commit_path
+            else:
+                path = root_path
+
+            data, unit, more_is_better = self.load(name)
+            with open(path, 'w') as f:
+                if re.search(r'#\d+$', name) is None:
+                    f.write(header.format(unit=unit if unit is not None else "FPS",
+                                          more_less="more" if more_is_better else "less",
+                                          bench=bench_name, sha1=sha1))
+                for value in data:
+                    f.write("{}\n".format(value))
+            exported += 1
+
+        return exported
+
+# Entries of the environment dumps which do not change the results of a run
+volatile_env_entries = ['^DATE', '^ENV.ENV_DUMP_FILE', '^ENV.ENV_DUMP_METRIC_FILE', '_PID',
+                        'SHA1$', '.pid$', 'X\'s pid$', 'extension count$', 'window id$',
+                        '^THROTTLING']
+
+# Categories of the environment dumps describing the machine
+machine_env_categories = set(['BIOS', 'CPU_FREQ', 'CPU_GOVERNOR', 'DRM', 'INTEL_DRM',
+                              'INTEL_PSTATE', 'KERNEL', 'MOTHERBOARD', 'PROCESSOR',
+                              'RAM_STICK'])
+
+def readEnvFingerprints(filepath):
+    # Returns the (strict, machine) fingerprints of an environment dump, as
+    # used by the STRICT and MACHINE shared results policies
+    env = EnvDumpReport(filepath, False)
+    if not hasattr(env, "values"):
+        raise IOError("Cannot read the environment dump '{}'".format(filepath))
+    entries = sorted(["{}={}".format(k, v) for k, v in env.to_set(volatile_env_entries)])
+    machine = [e for e in entries if e.split('.')[0].split('=')[0] in machine_env_categories]
+
+    fingerprint = lambda l: hashlib.sha1("\n".join(l).encode()).hexdigest()
+    return fingerprint(entries), fingerprint(machine)
+
+class SharedResults:
+    # Results shared between all the reports of an ezbench folder, stored in
+    # its folder shared_results/. Runs are keyed by the profile, the commit,
+    # the benchmark and the fingerprints of the environment they got executed
+    # in, and get copied along with their environment dump and metrics:
+    #   - <profile>/<sha1>/: patch and compilation log of the commit
+    #   - <profile>/<sha1>/<run id>/: files of a run
+    #
+    # Only the 'bench' results are shared. Commits are matched on their sha1,
+    # regardless of how much it got abbreviated. Runs are identified by the
+    # hash of their content, which prevents importing a run twice. The run
+    # files already published or imported by a report are tracked as its
+    # sources, to only hash and copy the new ones.
+    version = 1
+    folder_name = "shared_results"
+
+    def __init__(self, ezbench_dir):
+        self.path = "{}/{}".format(os.path.abspath(ezbench_dir), self.folder_name)
+        self.db = None
+
+    def __open(self):
+        if self.db is not None:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        self.db = sqlite3.connect(self.path + "/index.sqlite", timeout=60)
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS commits (profile TEXT, sha1 TEXT, "
+                        "full_name TEXT, PRIMARY KEY (profile, sha1))")
+        self.db.execute("CREATE TABLE IF NOT EXISTS runs (id TEXT PRIMARY KEY, profile TEXT, "
+                        "sha1 TEXT, benchmark TEXT, unit TEXT, more_is_better INTEGER, "
+                        "value REAL, strict_fp TEXT, machine_fp TEXT, files TEXT)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS runs_bench ON runs (profile, benchmark)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS sources (path TEXT PRIMARY KEY, "
+                        "size INTEGER, mtime INTEGER, id TEXT)")
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None:
+            self.db.execute("INSERT OR IGNORE INTO meta VALUES ('version', ?)", (str(self.version),))
+        elif int(row[0]) != self.version:
+            raise sqlite3.DatabaseError("Unsupported version {} of the shared results".format(row[0]))
+
+    def close(self):
+        if self.db is not None:
+            self.db.commit()
+            self.db.close()
+            self.db = None
+
+    def __commit_folder(self, profile, sha1):
+        return "{}/{}/{}".format(self.path, urllib.parse.quote(profile, safe=''), sha1)
+
+    def __read_commit_list(self, log_folder):
+        commits = dict()
+        try:
+            with open(log_folder + "/commit_list", 'r') as f:
+                for line in f.readlines():
+                    if len(line.split()) > 0:
+                        commits[line.split()[0]] = line.strip(' \t\n\r')
+        except IOError:
+            pass
+        return commits
+
+    def __find_commit(self, profile, sha1):
+        rows = self.db.execute("SELECT sha1, full_name FROM commits WHERE profile = ? AND "
+                               "(sha1 LIKE ? OR ? LIKE sha1 || '%')",
+                               (profile, sha1 + '%', sha1)).fetchall()
+        return rows[0] if len(rows) > 0 else None
+
+    # Copy the new runs of the report log_folder to the shared results.
+    # Returns the number of runs added. Other reports may publish the same
+    # runs at the same time, the first one to commit wins.
+    def publish(self, log_folder, profile):
+        self.__open()
+        with self.db:
+            return self.__publish(os.path.abspath(log_folder), profile)
+
+    def __publish(self, log_folder, profile):
+        commits = self.__read_commit_list(log_folder)
+        testFiles, runFiles, metricFiles, commitFiles, allFiles = listReportFiles(log_folder,
+                                                                                  set(commits.keys()))
+
+        known = dict()
+        for path, size, mtime in self.db.execute("SELECT path, size, mtime FROM sources WHERE "
+                                                 "path LIKE ?", (log_folder + "/%",)):
+            known[path] = (size, mtime)
+
+        published = 0
+        seen = set()
+        for sha1, full_name in commits.items():
+            commit_runs = runFiles.get(sha1, dict())
+            commit_metrics = metricFiles.get(sha1, dict())
+            sha1_folder = sha1 + "/" if sha1 in commitFiles else ""
+            for testName, testFile, testType in testFiles.get(sha1, []):
+                if testType != "bench":
+                    continue
+                bench_name = testName[len(sha1) + len(testType) + 2:]
+                data = None
+                for runName, runFile in commit_runs.get(testName, []):
+                    path = os.path.join(log_folder, runFile)
+                    envFile = runFile + ".env_dump"
+                    seen.add(path)
+                    try:
+                        st = statReportFile(path)
+                    except OSError:
+                        continue
+                    # Compressing the file keeps its modification time
+                    if path in known and known[path][1] == st.st_mtime_ns:
+                        continue
+
+                    # Get the value of the run from the result file
+                    if data is None:
+                        data, unit, more_is_better = readCsv(os.path.join(log_folder, testFile))
+                    run_id = int(runName[runName.rindex('#') + 1:])
+                    if run_id >= len(data) or data[run_id] == 0:
+                        continue
+
+                    files = [runFile] + commit_metrics.get(runName, [])
+                    if envFile in allFiles:
+                        files.append(envFile)
+                    commit = self.__find_commit(profile, sha1)
+                    shared_sha1 = commit[0] if commit is not None else sha1
+                    h = hashlib.sha1("{} {} {}".format(shared_sha1, bench_name, data[run_id]).encode())
+                    for filename in files:
+                        with openReportFile(os.path.join(log_folder, filename), 'rb') as f:
+                            h.update(f.read())
+                    shared_id = h.hexdigest()
+
+                    if self.db.execute("SELECT id FROM runs WHERE id = ?", (shared_id,)).fetchone() is None:
+                        fps = (None, None)
+                        if envFile in allFiles:
+                            try:
+                                fps = readEnvFingerprints(os.path.join(log_folder, envFile))
+                            except Exception as e:
+                                print("WARNING: Cannot read the environment of '{}': {}".format(runFile, e))
+
+                        # Copy the commit, if it is not known yet
+                        if commit is None:
+                            folder = self.__commit_folder(profile, sha1)
+                            os.makedirs(folder, exist_ok=True)
+                            for suffix in [".patch", "_compile_log"]:
+                                src = os.path.join(log_folder, sha1_folder + sha1 + suffix)
+                                if os.path.exists(reportFilePath(src)):
+                                    with openReportFile(src, 'rb') as f_src:
+                                        with open(folder + "/" + sha1 + suffix, 'wb') as f_dst:
+                                            shutil.copyfileobj(f_src, f_dst)
+                            self.db.execute("INSERT OR IGNORE INTO commits VALUES (?, ?, ?)",
+                                            (profile, sha1, full_name))
+                            commit = (sha1, full_name)
+
+                        # Copy the files of the run, named after their suffix
+                        folder = "{}/{}".format(self.__commit_folder(profile, commit[0]), shared_id)
+                        os.makedirs(folder, exist_ok=True)
+                        suffixes = []
+                        for filename in files:
+                            suffix = os.path.basename(filename)[len(runName):]
+                            with openReportFile(os.path.join(log_folder, filename), 'rb') as f_src:
+                                with open(folder + "/run" + suffix, 'wb') as f_dst:
+                                    shutil.copyfileobj(f_src, f_dst)
+                            suffixes.append(suffix)
+                        cursor = self.db.execute("INSERT OR IGNORE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                                 (shared_id, profile, commit[0], bench_name, unit,
+                                                  more_is_better, data[run_id], fps[0], fps[1],
+                                                  json.dumps(suffixes)))
+                        published += cursor.rowcount
+
+                    self.db.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)",
+                                    (path, st.st_size, st.st_mtime_ns, shared_id))
+
+        # Forget about the runs which got removed from the report
+        self.db.executemany("DELETE FROM sources WHERE path = ?",
+                            [(p,) for p in known.keys() if p not in seen])
+        return published
+
+    def __reference_fingerprints(self, log_folder):
+        # Returns the fingerprints of the most recent runs of the report, for
+        # every benchmark and for the report as a whole
+        refs = dict()
+        latest = (-1, None, None)
+        rows = self.db.execute("SELECT runs.benchmark, runs.strict_fp, runs.machine_fp, sources.mtime "
+                               "FROM sources JOIN runs ON sources.id = runs.id WHERE "
+                               "sources.path LIKE ? AND runs.strict_fp IS NOT NULL",
+                               (log_folder + "/%",))
+        for benchmark, strict_fp, machine_fp, mtime in rows:
+            if benchmark not in refs or refs[benchmark][0] < mtime:
+                refs[benchmark] = (mtime, strict_fp, machine_fp)
+            if latest[0] < mtime:
+                latest = (mtime, strict_fp, machine_fp)
+        return refs, latest
+
+    # Returns False when the run could not be imported
+    def __import_run(self, log_folder, profile, sha1, bench_name, run):
+        shared_id, shared_sha1, unit, more_is_better, value, suffixes = run
+
+        # Do not add incomplete runs to the report
+        src = "{}/{}/run".format(self.__commit_folder(profile, shared_sha1), shared_id)
+        suffixes = json.loads(suffixes)
+        missing = [src + suffix for suffix in suffixes if not os.path.exists(src + suffix)]
+        if len(missing) > 0:
+            print("WARNING: Cannot import the shared run {}, missing {}".format(shared_id, missing))
+            return False
+
+        # Look for the result file of the benchmark, create it if needed
+        if os.path.isdir(os.path.join(log_folder, sha1)):
+            folder = os.path.join(log_folder, sha1)
+        else:
+            folder = log_folder
+        test_file = "{}/{}_bench_{}".format(folder, sha1, bench_name)
+        if not os.path.exists(test_file):
+            header = "# {unit} ({more_less} is better) of '{bench}' using version {sha1}\n"
+            with open(test_file, 'w') as f:
+                f.write(header.format(unit=unit if unit is not None else "FPS",
+                                      more_less="more" if more_is_better else "less",
+                                      bench=bench_name, sha1=sha1))
+
+        # Find the first run id available, like core.sh does
+        run_id = 0
+        while os.path.exists(reportFilePath("{}#{}".format(test_file, run_id))):
+            run_id += 1
+
+        for suffix in suffixes:
+            shutil.copyfile(src + suffix, "{}#{}{}".format(test_file, run_id, suffix))
+        with open(test_file, 'a') as f:
+            f.write("{}\n".format(value))
+
+        # Register the run as coming from this report, to not publish it back
+        path = "{}#{}".format(test_file, run_id)
+        st = os.stat(path)
+        self.db.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)",
+                        (path, st.st_size, st.st_mtime_ns, shared_id))
+        return True
+
+    # Import, from the other reports, the runs missing from the report
+    # log_folder to get the wanted number of rounds of every benchmark. The
+    # wanted runs use the same layout as the 'commits' attribute of the state
+    # of SmartEzbench. Returns the number of runs imported.
+    def import_runs(self, log_folder, profile, wanted, policy):
+        if policy == SharedResultsPolicy.OFF:
+            return 0
+        self.__open()
+        with self.db:
+            return self.__import_runs(os.path.abspath(log_folder), profile, wanted, policy)
+
+    def __import_runs(self, log_folder, profile, wanted, policy):
+        commits = self.__read_commit_list(log_folder)
+        testFiles, runFiles, metricFiles, commitFiles, allFiles = listReportFiles(log_folder,
+                                                                                  set(commits.keys()))
+        refs, latest = self.__reference_fingerprints(log_folder)
+
+        # Do not import the runs the report already has
+        present = set([r[0] for r in self.db.execute("SELECT id FROM sources WHERE path LIKE ?",
+                                                     (log_folder + "/%",))])
+
+        imported = 0
+        for sha1 in wanted:
+            commit = None
+            for bench_name, info in wanted[sha1]["benchmarks"].items():
+                # Find out what the runs should match
+                if policy == SharedResultsPolicy.STRICT:
+                    if bench_name not in refs:
+                        continue
+                    query, ref = "AND strict_fp = ?", (refs[bench_name][1],)
+                elif policy == SharedResultsPolicy.MACHINE:
+                    if latest[2] is None:
+                        continue
+                    query, ref = "AND machine_fp = ?", (latest[2],)
+                else:
+                    query, ref = "", ()
+
+                # Count the runs the report already has
+                done = 0
+                for testName, testFile, testType in testFiles.get(sha1, []):
+                    if testType == "bench" and testName == "{}_bench_{}".format(sha1, bench_name):
+                        done = len(readCsv(os.path.join(log_folder, testFile))[0])
+                missing = info['rounds'] - done
+                if missing <= 0:
+                    continue
+
+                runs = self.db.execute("SELECT id, sha1, unit, more_is_better, value, files FROM runs "
+                                       "WHERE profile = ? AND benchmark = ? AND (sha1 LIKE ? OR "
+                                       "? LIKE sha1 || '%') " + query,
+                                       (profile, bench_name, sha1 + '%', sha1) + ref).fetchall()
+                runs = [r for r in runs if r[0] not in present][:missing]
+                if len(runs) == 0:
+                    continue
+
+                # Add the commit to the report, if needed
+                if commit is None:
+                    commit = self.__find_commit(profile, sha1)
+                    if commit is None:
+                        break
+                    if sha1 not in commits:
+                        folder = os.path.join(log_folder, sha1)
+                        os.makedirs(folder, exist_ok=True)
+                        for suffix in [".patch", "_compile_log"]:
+                            src = "{}/{}{}".format(self.__commit_folder(profile, commit[0]),
+                                                   commit[0], suffix)
+                            if os.path.exists(src):
+                                shutil.copyfile(src, "{}/{}{}".format(folder, sha1, suffix))
+                        with open(log_folder + "/commit_list", 'a') as f:
+                            f.write(sha1 + commit[1][len(commit[0]):] + "\n")
+                        commits[sha1] = commit[1]
+
+                for run in runs:
+                    if self.__import_run(log_folder, profile, sha1, bench_name, run):
+                        present.add(run[0])
+                        imported += 1
+
+        return imported
+
+def readCommitLabels(log_folder = "."):
     labels = dict()
     try:
-        f = open( "commit_labels", "r")
+        f = open(os.path.join(log_folder, "commit_labels"), "r")
         try:
             labelLines = f.readlines()
         finally:
@@ -1987,26 +4575,181 @@ def readCommitLabels():
 
     return labels
 
-def readNotes():
+# Returns a dict associating the commits that got tested with the build of
+# another commit, because both produce identical binaries, to this other commit
+def readIdenticalBuilds(log_folder = "."):
+    identical = dict()
+    try:
+        with open(os.path.join(log_folder, "identical_builds"), "r") as f:
+            lines = f.readlines()
+    except IOError:
+        return identical
+
+    for line in lines:
+        fields = line.split()
+        if len(fields) == 2:
+            identical[fields[0]] = fields[1]
+
+    return identical
+
+def readNotes(log_folder = "."):
     try:
-        with open("notes", 'rt') as f:
+        with open(os.path.join(log_folder, "notes"), 'rt') as f:
             return f.readlines()
     except:
         return []
 
-def genPerformanceReport(log_folder, silentMode = False, restrict_to_commits = []):
-    benchmarks = []
-    commits = []
-    labels = dict()
-    notes = []
+def listReportFiles(log_folder, wanted_sha1s, extra_files = [], root_files = None):
+    # Classify all the result files in one pass. The files of a commit are
+    # stored in a folder named after the commit, or at the root of the report
+    # for reports created before this layout got introduced. The result files
+    # are indexed per commit:
+    #   - testFiles[sha1]: list of (name, path, type) of the result files
+    #   - runFiles[sha1][test name]: list of (name, path) of the runs
+    #   - metricFiles[sha1][run name]: list of the paths of the metric files
+    # Paths are relative to the report folder. The files of extra_files which
+    # cannot be found in the report are considered to be at its root. If
+    # root_files is set, the root of the report is not listed and only the
+    # files of root_files are considered to be there.
+    testFiles = dict()
+    runFiles = dict()
+    metricFiles = dict()
+    commitFiles = dict()
+    allFiles = set()
+    commit_dirs = []
+    commit_bench_file_re = re.compile(r'^(.+)_(bench|unit|imgval)_[^\.]+(.metrics_.+)?$')
+    run_file_re = re.compile(r'#\d+$')
+    def classify_file(filename, path, sha1 = None):
+        # Compressed files are listed under their uncompressed name, unless
+        # the uncompressed file exists too
+        name = uncompressedReportFileName(filename)
+        if name != filename:
+            path = path[:len(name) - len(filename)]
+            if os.path.exists(os.path.join(log_folder, path)):
+                return
+            filename = name
 
-    # Save the current working directory and switch to the log folder
-    cwd = os.getcwd()
-    os.chdir(log_folder)
+        allFiles.add(path)
+        m = commit_bench_file_re.match(filename)
+        if m is None:
+            return
+        if sha1 is None:
+            sha1 = m.group(1)
+
+        dot = filename.find(".")
+        if dot >= 0:
+            if filename.startswith(".metrics_", dot):
+                metricFiles.setdefault(sha1, dict()).setdefault(filename[:dot], []).append(path)
+        elif run_file_re.search(filename) is not None:
+            test_name = filename[:filename.rindex("#")]
+            runFiles.setdefault(sha1, dict()).setdefault(test_name, []).append((filename, path))
+        else:
+            testFiles.setdefault(sha1, []).append((filename, path, m.group(2)))
+
+    if root_files is None:
+        with os.scandir(log_folder) as it:
+            for entry in it:
+                if entry.is_dir():
+                    if entry.name in wanted_sha1s:
+                        commit_dirs.append(entry.name)
+                    continue
+                classify_file(entry.name, entry.name)
+    else:
+        for filename in root_files:
+            classify_file(filename, filename)
+        commit_dirs = [sha1 for sha1 in wanted_sha1s
+                       if os.path.isdir(os.path.join(log_folder, sha1))]
+    for sha1 in commit_dirs:
+        commitFiles[sha1] = set()
+        for f in os.listdir(os.path.join(log_folder, sha1)):
+            classify_file(f, "{}/{}".format(sha1, f), sha1)
+            commitFiles[sha1].add(uncompressedReportFileName(f))
+
+    if len(extra_files) > 0:
+        names = set([os.path.basename(path) for path in allFiles])
+        for f in extra_files:
+            if f not in names:
+                classify_file(f, f)
+
+    return testFiles, runFiles, metricFiles, commitFiles, allFiles
+
+def listReportRootFiles(log_folder, sha1s):
+    # Returns a dictionary associating the commits of sha1s to the files found
+    # at the root of the report which belong to them, as stored by the reports
+    # created before the files of every commit got their own folder
+    sha1_lengths = set([len(sha1) for sha1 in sha1s])
+    root_files = dict()
+    with os.scandir(log_folder) as it:
+        for entry in it:
+            if entry.is_dir():
+                continue
+            for length in sha1_lengths:
+                if (entry.name[:length] in sha1s and len(entry.name) > length and
+                    entry.name[length] in "_."):
+                    root_files.setdefault(entry.name[:length], []).append(entry.name)
+                    break
+    return root_files
+
+def planReportCommit(log_folder, sha1, root_files = [], extra_files = []):
+    # Returns the (compile_log, patch, tests) files of a commit of a report,
+    # along with the number of files of the commit. tests is a list of
+    # (result file, type, benchmark name, runs) tuples, runs being a list of
+    # (run file, metric files, env file or None) tuples. See listReportFiles()
+    # for root_files and extra_files.
+    testFiles, runFiles, metricFiles, commitFiles, allFiles = listReportFiles(log_folder, set([sha1]),
+                                                                              extra_files, root_files)
+
+    compile_log = sha1 + "_compile_log"
+    patch = sha1 + ".patch"
+    if compile_log in commitFiles.get(sha1, []):
+        compile_log = "{}/{}".format(sha1, compile_log)
+    if patch in commitFiles.get(sha1, []):
+        patch = "{}/{}".format(sha1, patch)
+
+    tests = []
+    commit_runs = runFiles.get(sha1, dict())
+    commit_metrics = metricFiles.get(sha1, dict())
+    for testName, testFile, testType in testFiles.get(sha1, []):
+        # Get the bench name
+        bench_name = testName[len(sha1) + len(testType) + 2:]
+
+        # Look for the runs and their metrics
+        runsFiles = commit_runs.get(testName, [])
+        runsFiles.sort(key=lambda x: '{0:0>100}'.format(x[0]).lower()) # Sort the runs in natural order
+        runs = []
+        for runName, runFile in runsFiles:
+            envFile = runFile + ".env_dump"
+            if envFile not in allFiles:
+                envFile = None
+            runs.append((runFile, commit_metrics.get(runName, []), envFile))
+
+        tests.append((testFile, testType, bench_name, runs))
+
+    return (compile_log, patch, tests), len(allFiles)
+
+def iter_report(log_folder, commits_rev_order = [], silentMode = True,
+                restrict_to_commits = [], use_index = True, workers = None,
+                use_store = True, benchmarks = None, result_filter = None,
+                batch_files = 10000):
+    # Generate the commits of a report along with their results, one at a time,
+    # to allow going through huge reports in bounded memory: the files of the
+    # commits are listed and parsed by batches of about $batch_files files,
+    # ahead of the commits being generated. The commits are
+    # generated in the order of the commit_list file or, if commits_rev_order
+    # is set, from the oldest to the newest commit of commits_rev_order, with
+    # the commits not found in it being skipped. The Benchmark objects of the
+    # results get stored in the benchmarks dictionary, if set. The results are
+    # pre-processed by result_filter, if set (see ResultFilter).
+    if benchmarks is None:
+        benchmarks = dict()
+
+    # All the files are accessed through absolute paths to allow loading
+    # multiple reports concurrently from different threads
+    folder = os.path.abspath(log_folder)
 
     # Look for the commit_list file
     try:
-        f = open( "commit_list", "r")
+        f = open(os.path.join(folder, "commit_list"), "r")
         try:
             commitsLines = f.readlines()
         finally:
@@ -2014,146 +4757,304 @@ def genPerformanceReport(log_folder, silentMode = False, restrict_to_commits = [
     except IOError:
         if not silentMode:
             sys.stderr.write("The log folder '{0}' does not contain a commit_list file\n".format(log_folder))
-        return Report(log_folder, benchmarks, commits, notes)
+        return
 
     # Read all the commits' labels
-    labels = readCommitLabels()
+    labels = readCommitLabels(folder)
+    identical_builds = readIdenticalBuilds(folder)
 
     # Check that there are commits
     if (len(commitsLines) == 0):
         if not silentMode:
             sys.stderr.write("The commit_list file is empty\n")
-        return Report(log_folder, benchmarks, commits, notes)
+        return
 
-    # Find all the result files and sort them by sha1
-    files_list = os.listdir()
-    testFiles = dict()
-    commit_bench_file_re = re.compile(r'^(.+)_(bench|unit|imgval)_[^\.]+(.metrics_.+)?$')
-    for f in files_list:
-        if os.path.isdir(f):
-            continue
-        m = commit_bench_file_re.match(f)
-        if m is not None:
-            sha1 = m.groups()[0]
-            if sha1 not in testFiles:
-                testFiles[sha1] = []
-            testFiles[sha1].append((f, m.groups()[1]))
-    files_list = None
-
-    # Gather all the information from the commits
-    if not silentMode:
-        print ("Reading the results for {0} commits".format(len(commitsLines)))
-    commits_txt = ""
-    table_entries_txt = ""
+    # Find out which commits should be read
+    commits_info = []
     for commitLine in commitsLines:
         full_name = commitLine.strip(' \t\n\r')
         sha1 = commitLine.split()[0]
-        compile_log = sha1 + "_compile_log"
-        patch = sha1 + ".patch"
         label = labels.get(sha1, sha1)
         if (len(restrict_to_commits) > 0 and sha1 not in restrict_to_commits
             and label not in restrict_to_commits):
             continue
-        commit = Commit(sha1, full_name, compile_log, patch, label)
+        commits_info.append((sha1, full_name, label))
+
+    # Put the commits in the git order
+    git_distance_head = dict()
+    if len(commits_rev_order) > 0:
+        for i in range(0, len(commits_rev_order)):
+            git_distance_head.setdefault(commits_rev_order[i], i)
+        commits_info = [c for c in commits_info if c[0] in git_distance_head]
+        commits_info.sort(key=lambda c: len(commits_rev_order) - git_distance_head[c[0]])
+    wanted_sha1s = set([sha1 for sha1, full_name, label in commits_info])
+
+    # Open the index of the already-parsed files
+    index = ReportIndex(folder, persistent = use_index)
+    try:
+        # The samples of the result store are looked up by file name
+        store = None
+        store_files = dict()
+        if use_store and os.path.isdir(os.path.join(folder, ResultStore.folder_name)):
+            store = ResultStore(folder)
+            for filename in store.filenames():
+                store_files.setdefault(filename.split("_bench_")[0], []).append(filename)
+
+        # Only the root of the report gets listed up front, the folders of the
+        # commits are listed batch by batch
+        root_files = listReportRootFiles(folder, wanted_sha1s)
 
-        # Add the commit to the list of commits
-        commit.results = sorted(commit.results, key=lambda res: res.benchmark.full_name)
-        commits.append(commit)
+        if not silentMode:
+            print ("Reading the results for {0} commits".format(len(commitsLines)))
+
+        next_commit = 0
+        while next_commit < len(commits_info):
+            # Find out which files are needed by the commits of the batch
+            commits_plan = []
+            batch_count = 0
+            while next_commit < len(commits_info) and batch_count < batch_files:
+                sha1, full_name, label = commits_info[next_commit]
+                plan, count = planReportCommit(folder, sha1, root_files.get(sha1, []),
+                                               store_files.get(sha1, []))
+                commits_plan.append((sha1, full_name, label) + plan)
+                batch_count += count
+                next_commit += 1
+
+            # Parse all the files which are not already in the index, in
+            # parallel when there are enough of them. The samples found in the
+            # result store do not need to be parsed at all. The runs and
+            # metrics are only read when accessed, but should be kept in the
+            # index.
+            stored = dict()
+            files_to_parse = []
+            files_to_keep = []
+            for sha1, full_name, label, compile_log, patch, tests in commits_plan:
+                commit_files = index.stale_commit_files(sha1, patch, compile_log)
+                for testFile, testType, bench_name, runs in tests:
+                    if testType == "bench" and store is not None:
+                        content = store.load(testFile)
+                        if content is not None:
+                            stored[testFile] = content
+
+                    if testFile not in stored:
+                        commit_files.append((testFile, readCsv))
+                    for runFile, metric_files, envFile in runs:
+                        files_to_keep.append(runFile)
+                        files_to_keep.extend(metric_files)
+                files_to_parse.append(commit_files)
+            index.keep(files_to_keep)
+            index.prefetch(files_to_parse, workers)
+            files_to_parse = files_to_keep = None
+
+            # Gather all the information from the commits
+            for sha1, full_name, label, compile_log, patch, tests in commits_plan:
+                commit = Commit(sha1, full_name, compile_log, patch, label, index)
+                commit.same_build_as = identical_builds.get(sha1)
+                if sha1 in git_distance_head:
+                    commit.git_distance_head = git_distance_head[sha1]
+
+                # find all the benchmarks
+                for testFile, testType, bench_name, runs in tests:
+                    # Find the right Benchmark or create one if none are found
+                    benchmark = benchmarks.get(bench_name)
+                    if benchmark is None:
+                        benchmark = Benchmark(bench_name)
+                        benchmarks[bench_name] = benchmark
+
+                    # Create the result object
+                    result = BenchResult(commit, benchmark, testFile)
+
+                    # Read the data and abort if there is no data
+                    if testFile in stored:
+                        result.data, result.unit_str, result.more_is_better = stored[testFile]
+                    else:
+                        result.data, result.unit_str, result.more_is_better = index.load(testFile, readCsv)
+                    if len(result.data) == 0:
+                        continue
 
-        # If there are no results, just continue
-        if sha1 not in testFiles:
-            continue
+                    if result.unit_str is None:
+                        result.unit_str = "FPS"
+                    else:
+                        result.unit_str = sys.intern(result.unit_str)
+
+                    result.test_type = testType
+
+                    # Check that the result file has the same default v
+                    if benchmark.unit_str != result.unit_str:
+                        if benchmark.unit_str != "undefined":
+                            msg = "The unit used by the benchmark '{bench}' changed from '{unit_old}' to '{unit_new}' in commit {commit}"
+                            print(msg.format(bench=bench_name,
+                                             unit_old=benchmark.unit_str,
+                                             unit_new=result.unit_str,
+                                             commit=commit.sha1))
+                        benchmark.unit_str = result.unit_str
+
+                    # The runs, metrics and environment files are read on demand
+                    result.set_run_files(runs, index, store)
+
+                    # Add the result to the commit's results
+                    commit.results.append(result)
+                    commit.compil_exit_code = EzbenchExitCode.NO_ERROR # The deployment must have been successful if there is data
+
+                if result_filter is not None:
+                    result_filter.apply(commit.results)
+
+                # Do not keep the other writers of the index waiting while the
+                # commit gets processed
+                index.unlock()
+                yield commit
+
+            # Let the other readers of the report use the new entries
+            index.save()
+
+        # Save the index, forgetting about the files that disappeared
+        if len(restrict_to_commits) == 0 and len(commits_rev_order) == 0:
+            index.prune()
+    finally:
+        # The results load their runs using the index, keep it open until
+        # they all get garbage-collected
+        index.save()
+
+def genPerformanceReport(log_folder, silentMode = False, restrict_to_commits = [],
+                         use_index = True, workers = None, use_store = True,
+                         result_filter = None):
+    benchmarks = dict()
+    commits = list(iter_report(log_folder, silentMode = silentMode,
+                               restrict_to_commits = restrict_to_commits,
+                               use_index = use_index, workers = workers,
+                               use_store = use_store, benchmarks = benchmarks,
+                               result_filter = result_filter))
 
-        # find all the benchmarks
-        for testFile, testType in testFiles[sha1]:
-            # Skip when the file is a run file (finishes by #XX)
-            if re.search(r'#\d+$', testFile) is not None:
-                continue
+    # Sort the list of benchmarks
+    benchmarks = sorted(benchmarks.values(), key=lambda bench: bench.full_name)
 
-            # Skip on unrelated files
-            if "." in testFile:
-                continue
+    # Read the notes
+    notes = readNotes(os.path.abspath(log_folder))
 
-            # Get the bench name
-            bench_name = testFile[len(commit.sha1) + len(testType) + 2:]
+    return Report(log_folder, benchmarks, commits, notes)
 
-            # Find the right Benchmark or create one if none are found
-            try:
-                benchmark = next(b for b in benchmarks if b.full_name == bench_name)
-            except StopIteration:
-                benchmark = Benchmark(bench_name)
-                benchmarks.append(benchmark)
+def migrateReportLayout(log_folder, silentMode = False):
+    # Move the files of every commit found at the root of the report to the
+    # folder named after the commit. Returns the number of files moved, or -1
+    # if the report is currently being written to.
+    log_folder = os.path.abspath(log_folder)
+    try:
+        with open(log_folder + "/commit_list", "r") as f:
+            sha1s = set([line.split()[0] for line in f.readlines() if len(line.split()) > 0])
+    except IOError:
+        if not silentMode:
+            sys.stderr.write("The log folder '{0}' does not contain a commit_list file\n".format(log_folder))
+        return 0
+    sha1_lengths = set([len(sha1) for sha1 in sha1s])
 
-            # Create the result object
-            result = BenchResult(commit, benchmark, testFile)
+    with open(log_folder + "/lock", 'w') as lock_fd:
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX|fcntl.LOCK_NB)
+        except IOError:
+            if not silentMode:
+                sys.stderr.write("The report '{0}' is being written to, try again later\n".format(log_folder))
+            return -1
 
-            # Read the data and abort if there is no data
-            result.data, result.unit_str, result.more_is_better = readCsv(testFile)
-            if len(result.data) == 0:
-                continue
+        index = ReportIndex(log_folder)
+        moved = 0
+        with os.scandir(log_folder) as it:
+            for entry in it:
+                if not entry.is_file():
+                    continue
 
-            if result.unit_str is None:
-                result.unit_str = "FPS"
-
-            result.test_type = testType
-
-            # Check that the result file has the same default v
-            if benchmark.unit_str != result.unit_str:
-                if benchmark.unit_str != "undefined":
-                    msg = "The unit used by the benchmark '{bench}' changed from '{unit_old}' to '{unit_new}' in commit {commit}"
-                    print(msg.format(bench=bench_name,
-                                     unit_old=benchmark.unit_str,
-                                     unit_new=result.unit_str,
-                                     commit=commit.sha1))
-                benchmark.unit_str = result.unit_str
-
-            # Look for the runs
-            run_re = re.compile(r'^{testFile}#[0-9]+$'.format(testFile=testFile))
-            runsFiles = [f for f,t in testFiles[sha1] if run_re.search(f)]
-            runsFiles.sort(key=lambda x: '{0:0>100}'.format(x).lower()) # Sort the runs in natural order
-            result.metrics = dict()
-            for runFile in runsFiles:
-                if testType == "bench":
-                    data, unit, more_is_better = readCsv(runFile)
-                    if len(data) > 0:
-                        # Add the FPS readings of the run
-                        result.runs.append(data)
-                elif testType == "unit":
-                    result.runs.append(readUnitRun(runFile))
-                elif testType == "imgval":
-                    result.runs.append(ImgvalRun(runFile))
-                else:
-                    print("WARNING: Ignoring results because the type '{}' is unknown".format(testType))
+                sha1 = None
+                for length in sha1_lengths:
+                    if (entry.name[:length] in sha1s and len(entry.name) > length and
+                        entry.name[length] in "_."):
+                        sha1 = entry.name[:length]
+                        break
+                if sha1 is None:
                     continue
 
-                # Add the environment file
-                envFile = runFile + ".env_dump"
-                if not os.path.isfile(envFile):
-                    envFile = None
-                result.env_files.append(envFile)
+                commit_dir = "{}/{}".format(log_folder, sha1)
+                if not os.path.isdir(commit_dir):
+                    os.mkdir(commit_dir)
+                new_name = "{}/{}".format(sha1, entry.name)
+                os.rename(entry.path, "{}/{}".format(log_folder, new_name))
+                index.rename(entry.name, new_name)
+                moved += 1
+        index.close()
 
-                # Look for metrics!
-                metrics_re = re.compile(r'^{}.metrics_.+$'.format(runFile))
-                for metric_file in [f for f,t in testFiles[sha1] if metrics_re.search(f)]:
-                    try:
-                        result.add_metrics(metric_file)
-                    except ValueError:
-                        pass
+        fcntl.flock(lock_fd, fcntl.LOCK_UN)
 
-            # Add the result to the commit's results
-            commit.results.append(result)
-            commit.compil_exit_code = EzbenchExitCode.NO_ERROR # The deployment must have been successful if there is data
+    if not silentMode:
+        print("Moved {} files of '{}' to per-commit folders".format(moved, log_folder))
+    return moved
+
+def compactReport(log_folder, compression = None, silentMode = False):
+    # Compress the patches and the files of every run of the report (results,
+    # outputs, environment dumps and metrics) using gzip or, if available and
+    # unless asked otherwise, zstd. The files are read transparently by
+    # openReportFile(). Returns the number of files compressed, or -1 if the
+    # report is currently being written to.
+    if compression is None:
+        compression = "zst" if zstandard is not None else "gz"
+    if compression == "zst" and zstandard is None:
+        raise ValueError("zstd compression requires the python module zstandard")
+    elif compression not in ["gz", "zst"]:
+        raise ValueError("Unknown compression '{}'".format(compression))
+
+    log_folder = os.path.abspath(log_folder)
+    try:
+        with open(log_folder + "/commit_list", "r") as f:
+            sha1s = set([line.split()[0] for line in f.readlines() if len(line.split()) > 0])
+    except IOError:
+        if not silentMode:
+            sys.stderr.write("The log folder '{0}' does not contain a commit_list file\n".format(log_folder))
+        return 0
 
-    # Sort the list of benchmarks
-    benchmarks = sorted(benchmarks, key=lambda bench: bench.full_name)
+    def is_cold(name):
+        return (("#" in name or name.endswith(".patch")) and
+                uncompressedReportFileName(name) == name and not name.endswith(".tmp"))
 
-    # Read the notes before going back to the original folder
-    notes = readNotes()
+    with open(log_folder + "/lock", 'w') as lock_fd:
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX|fcntl.LOCK_NB)
+        except IOError:
+            if not silentMode:
+                sys.stderr.write("The report '{0}' is being written to, try again later\n".format(log_folder))
+            return -1
 
-    # Go back to the original folder
-    os.chdir(cwd)
+        # List the files of the commits, in their folder or at the root
+        files = []
+        with os.scandir(log_folder) as it:
+            for entry in it:
+                if entry.is_dir() and entry.name in sha1s:
+                    files.extend(["{}/{}".format(entry.name, f) for f in os.listdir(entry.path)
+                                  if is_cold(f)])
+                elif entry.is_file() and is_cold(entry.name) and entry.name.split("_")[0].split(".")[0] in sha1s:
+                    files.append(entry.name)
+
+        index = ReportIndex(log_folder)
+        saved = 0
+        for filename in files:
+            path = "{}/{}".format(log_folder, filename)
+            compressed = "{}.{}".format(path, compression)
+            st = os.stat(path)
+            with open(path, 'rb') as f_src:
+                if compression == "gz":
+                    f_dst = gzip.open(compressed + ".tmp", 'wb')
+                else:
+                    f_dst = zstandard.open(compressed + ".tmp", 'wb')
+                with f_dst:
+                    shutil.copyfileobj(f_src, f_dst)
+            os.utime(compressed + ".tmp", ns=(st.st_atime_ns, st.st_mtime_ns))
+            os.replace(compressed + ".tmp", compressed)
+            os.remove(path)
+            index.touch(filename, st)
+            saved += st.st_size - os.stat(compressed).st_size
+        index.close()
+
+        fcntl.flock(lock_fd, fcntl.LOCK_UN)
 
-    return Report(log_folder, benchmarks, commits, notes)
+    if not silentMode:
+        print("Compressed {} files of '{}', saving {:.1f} MB".format(len(files), log_folder, saved / 1e6))
+    return len(files)
 
 def getPerformanceResultsCommitBenchmark(commit, benchmark):
     for result in commit.results:
@@ -32,6 +32,7 @@ import datetime
 import argparse
 import signal
 import time
+import io
 import os
 
 ezbench_dir = os.path.abspath(sys.path[0] + "/../")
@@ -173,7 +174,10 @@ def setup_http_server(bind_ip = "0.0.0.0", port = 8080):
             real_path = os.path.realpath(path)
             if real_path.startswith(chroot_folder):
                 try:
-                    with open(real_path, 'rb') as f:
+                    # Compressed files are served decompressed
+                    with openReportFile(real_path, 'rb') as f:
+                        if reportFilePath(real_path) != real_path:
+                            f = io.BytesIO(f.read())
                         f.seek(0, os.SEEK_END)
                         size = f.tell()
                         f.seek(0, os.SEEK_SET)